@@ -16,5 +16,30 @@ def load_config(app, overrides):
     app.config["JWT_COOKIE_SECURE"] = True
     app.config["JWT_COOKIE_CSRF_PROTECT"] = False
     app.config['FLASK_ADMIN_SWATCH'] = 'darkly'
+    app.config.setdefault('AUTO_SCHEDULE_BULK_INSERT', True)
+    app.config.setdefault('AUTO_SCHEDULE_CHUNK_SIZE', 1000)
+    app.config.setdefault('AUTO_SCHEDULE_TIME_BUDGET', 2.0)
+    app.config.setdefault('AUTO_SCHEDULE_JOB_WORKERS', 2)
+    app.config.setdefault('AUTO_SCHEDULE_JOB_MAX_PENDING', 32)
+    app.config.setdefault('AUTO_SCHEDULE_JOB_TIMEOUT', 3600)
+    app.config.setdefault('SHIFT_PAGE_SIZE', 100)
+    app.config.setdefault('SHIFT_PAGE_MAX', 1000)
+    app.config.setdefault('SHIFT_STREAM_BATCH_SIZE', 1000)
+    app.config.setdefault('ROSTER_WINDOW_DAYS', 7)
+    app.config.setdefault('LISTING_CACHE_SIZE', 256)
+    app.config.setdefault('LISTING_CACHE_TTL', 30)
+    app.config.setdefault('CLOCK_QUEUE_FLUSH_MS', 50)
+    app.config.setdefault('CLOCK_QUEUE_MAX_BATCH', 200)
+    app.config.setdefault('CLOCK_QUEUE_WAIT_SECONDS', 2.0)
+    app.config.setdefault('CLOCK_QUEUE_RESULT_TTL', 3600)
+    app.config.setdefault('SHIFT_IMPORT_CHUNK_SIZE', 5000)
+    app.config.setdefault('USER_IMPORT_CHUNK_SIZE', 500)
+    app.config.setdefault('USER_IMPORT_JOB_WORKERS', 1)
+    app.config.setdefault('USER_IMPORT_JOB_MAX_PENDING', 4)
+    app.config.setdefault('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    app.config.setdefault('PASSWORD_VERIFY_WORKERS', 2)
+    app.config.setdefault('PASSWORD_VERIFY_MAX_PENDING', 64)
+    app.config.setdefault('IDENTITY_CACHE_SIZE', 1024)
+    app.config.setdefault('IDENTITY_CACHE_TTL', 60)
     for key in overrides:
         app.config[key] = overrides[key]
\ No newline at end of file
@@ -2,5 +2,14 @@
 from .user import *
 from .admin import *
 from .staff import *
+from .passwords import *
 from .auth import *
-from .initialize import *
\ No newline at end of file
+from .initialize import *
+from .pagination import *
+from .streaming import *
+from .cache import *
+from .versions import *
+from .clock_queue import *
+from .shift_import import *
+from .user_import import *
+from .jobs import *
\ No newline at end of file
@@ -1,10 +1,22 @@
 from App.models.strategy import ScheduleStrategyFactory
-from App.models.auto_scheduler import AutoScheduler 
+from App.models.auto_scheduler import AutoScheduler, compute_assignments
+from App.models.shift_template import ShiftTemplate
+from App.models.availability import StaffAvailability
+from App.models.rescheduler import IncrementalRescheduler
+from App.models.staff_roster import StaffRoster
 from datetime import datetime, timedelta
 import random
+import time
+from concurrent.futures import as_completed
+from flask import current_app
 from App.models import Admin, Staff, Shift, Schedule
 from App.database import db
-from App.controllers.user import get_user
+from App.controllers.user import check_role
+from App.controllers.pagination import shift_page
+from App.controllers.streaming import iter_shift_json
+from App.controllers.cache import cached_listing, invalidate_listings, listing_cache_stats
+from App.controllers.versions import bump_roster_version
+from App.controllers.concurrency import make_process_pool
 
 
 def random_shift_time(start_hour=6, end_hour=22, min_duration=4, max_duration=8):
@@ -17,28 +29,37 @@ def random_shift_time(start_hour=6, end_hour=22, min_duration=4, max_duration=8)
     return start, end
 
 def generate_random_templates(schedule_id, num_templates):
-    shifts = []
+    templates = []
 
     for _ in range(num_templates):
         start, end = random_shift_time()
-        shift = Shift(
-            staff_id=None,
-            schedule_id=schedule_id,
-            start_time=start,
-            end_time=end
+        templates.append(ShiftTemplate.from_times(start, end))
+
+    return templates
+
+def _strategy_options(method_type, staff_ids, shift_templates, avoid_overlaps=False, max_hours=None):
+    availability = None
+    if (avoid_overlaps or max_hours is not None) and shift_templates:
+        availability = StaffAvailability.load(
+            staff_ids,
+            min(t.start_time for t in shift_templates),
+            max(t.end_time for t in shift_templates),
+            max_hours=max_hours,
         )
-        shifts.append(shift)
 
-    return shifts
+    options = {"availability": availability}
+    if isinstance(method_type, str) and method_type.lower().strip() == "optimal":
+        options["time_budget"] = current_app.config.get('AUTO_SCHEDULE_TIME_BUDGET', 2.0)
+    return options
 
-def auto_schedule(schedule_id: int, method_type: str):
+def auto_schedule(schedule_id: int, method_type: str, avoid_overlaps: bool = False, max_hours: float = None, progress=None):
     schedule = Schedule.query.filter_by(id=schedule_id).first()
     if not schedule:
         return {"status": "error", "message": "Schedule not found"}
     
-    staff_list = Staff.query.all()
+    roster = StaffRoster.load()
     
-    num = staff_list.__len__()
+    num = len(roster)
     if num == 0:
         return {"status": "error", "message": "No staff available for scheduling"}
     
@@ -46,24 +67,141 @@ def auto_schedule(schedule_id: int, method_type: str):
     
     print(shift_templates)
 
+    options = _strategy_options(method_type, roster.id_list(), shift_templates, avoid_overlaps, max_hours)
+    availability = options["availability"]
+
     try:
-        strategy = ScheduleStrategyFactory.create_strategy(method_type)
+        strategy = ScheduleStrategyFactory.create_strategy(method_type, **options)
     except ValueError as e:
         return {"status": "error", "message": str(e)}
     
-    scheduler = AutoScheduler(strategy, staff_list, shift_templates, schedule_id)
+    scheduler = AutoScheduler(
+        strategy, roster, shift_templates, schedule_id,
+        bulk=current_app.config.get('AUTO_SCHEDULE_BULK_INSERT', False),
+        chunk_size=current_app.config.get('AUTO_SCHEDULE_CHUNK_SIZE', 1000),
+        progress=(lambda done: progress(done, num)) if progress else None,
+    )
     result = scheduler.generate_schedule()
+    bump_roster_version(schedule_id)
+    db.session.commit()
+    invalidate_listings(min(t.start_time for t in shift_templates), max(t.start_time for t in shift_templates))
     
     try:
-        return {"status": "success", "data": result}
+        response = {"status": "success", "data": result}
+        if availability is not None:
+            response["unfilled"] = [
+                {"start_time": t.start_time.isoformat(), "end_time": t.end_time.isoformat()}
+                for t in strategy.unfilled
+            ]
+        return response
     except Exception as e:
         return {"status": "error", "message": f"Auto-scheduling failed: {e}"}
 
 
-def schedule_shift(admin_id: int, staff_id: int, schedule_id: int, start_time, end_time):
-    actor = get_user(admin_id)
-    if not actor or actor.role != "admin":
-        raise PermissionError("Only admins can schedule shifts")
+def _save_batch_result(schedule_id, compute, chunk_size):
+    """Run ``compute()`` for one batch schedule and write its rows; returns ``(computed, result)``."""
+    computed = None
+    try:
+        computed = compute()
+        save_started = time.perf_counter()
+        saved = AutoScheduler(None, [], [], schedule_id, chunk_size=chunk_size).stream_schedule(computed["rows"])
+        return computed, {
+            "schedule_id": schedule_id,
+            "status": "success",
+            "count": saved["count"],
+            "unfilled": computed["unfilled"],
+            "compute_seconds": round(computed["compute_seconds"], 4),
+            "save_seconds": round(time.perf_counter() - save_started, 4),
+        }
+    except Exception as e:
+        return computed, {"schedule_id": schedule_id, "status": "error", "message": f"Auto-scheduling failed: {e}"}
+
+
+def auto_schedule_batch(admin_id: int, schedule_ids, method_type: str, max_workers: int = None, avoid_overlaps: bool = False, max_hours: float = None, role: str = None):
+    """Auto-schedule many schedules, computing each one in a worker process.
+
+    Workers only see plain data (staff ids and ``ShiftTemplate`` tuples) and
+    return assignment rows; every schedule is then written and committed
+    from this process on its own, so one failure does not affect the rest.
+
+    With ``avoid_overlaps`` or ``max_hours`` each schedule has to see the
+    shifts given out to the ones before it, so the batch runs one schedule
+    at a time in this process against a single ``StaffAvailability``.
+    """
+    check_role(admin_id, role, "admin", "Only admins can auto-schedule")
+    started = time.perf_counter()
+    schedule_ids = list(dict.fromkeys(schedule_ids))
+    try:
+        ScheduleStrategyFactory.create_strategy(method_type)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+
+    found = set(db.session.execute(db.select(Schedule.id).where(Schedule.id.in_(schedule_ids))).scalars())
+    staff_ids = StaffRoster.load().id_list()
+    if not staff_ids:
+        return {"status": "error", "message": "No staff available for scheduling"}
+
+    results = {sid: {"schedule_id": sid, "status": "error", "message": "Schedule not found"}
+               for sid in schedule_ids if sid not in found}
+    chunk_size = current_app.config.get('AUTO_SCHEDULE_CHUNK_SIZE', 1000)
+    templates = {sid: generate_random_templates(sid, num_templates=len(staff_ids)) for sid in schedule_ids if sid in found}
+
+    if avoid_overlaps or max_hours is not None:
+        every_template = [t for batch in templates.values() for t in batch]
+        options = _strategy_options(method_type, staff_ids, every_template, avoid_overlaps, max_hours)
+        availability = options["availability"]
+        for sid, schedule_templates in templates.items():
+            # the strategy records its assignments in the shared availability
+            computed, results[sid] = _save_batch_result(
+                sid, lambda: compute_assignments(method_type, staff_ids, schedule_templates, sid, options), chunk_size)
+            if computed is not None and results[sid]["status"] != "success" and availability is not None:
+                # the save failed, so these shifts do not exist; free their staff again
+                for row in computed["rows"]:
+                    availability.remove(row["staff_id"], ShiftTemplate.from_times(row["start_time"], row["end_time"]))
+    else:
+        with make_process_pool(max_workers) as pool:
+            futures = {}
+            for sid, schedule_templates in templates.items():
+                options = _strategy_options(method_type, staff_ids, schedule_templates)
+                futures[pool.submit(compute_assignments, method_type, staff_ids, schedule_templates, sid, options)] = sid
+            for future in as_completed(futures):
+                sid = futures[future]
+                _, results[sid] = _save_batch_result(sid, future.result, chunk_size)
+
+    succeeded = [sid for sid, r in results.items() if r["status"] == "success"]
+    if succeeded:
+        bump_roster_version(*succeeded)
+        db.session.commit()
+        invalidate_listings()
+    ordered = [results[sid] for sid in schedule_ids]
+    return {
+        "status": "success",
+        "results": ordered,
+        "failed": sum(1 for r in ordered if r["status"] != "success"),
+        "elapsed_seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+def reschedule_staff_delta(admin_id: int, schedule_id: int, added_ids=(), removed_ids=(), avoid_overlaps: bool = False, max_hours: float = None, role: str = None):
+    check_role(admin_id, role, "admin", "Only admins can reschedule staff")
+    schedule = db.session.get(Schedule, schedule_id)
+    if not schedule:
+        return {"status": "error", "message": "Schedule not found"}
+
+    try:
+        rescheduler = IncrementalRescheduler(schedule_id, added_ids, removed_ids, avoid_overlaps, max_hours)
+        changes = rescheduler.apply()
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    if changes:
+        bump_roster_version(schedule_id)
+        db.session.commit()
+        invalidate_listings(staff_ids={c["from_staff_id"] for c in changes} | {c["to_staff_id"] for c in changes})
+    return {"status": "success", "data": changes}
+
+
+def schedule_shift(admin_id: int, staff_id: int, schedule_id: int, start_time, end_time, role: str = None):
+    check_role(admin_id, role, "admin", "Only admins can schedule shifts")
     if not staff_id or not schedule_id:
         raise ValueError("staff_id and schedule_id are required")
 
@@ -76,22 +214,36 @@ def schedule_shift(admin_id: int, staff_id: int, schedule_id: int, start_time, e
     shift = Shift(staff_id=staff_id, schedule_id=schedule_id, start_time=start_time, end_time=end_time)
     
     db.session.add(shift)
+    bump_roster_version(schedule_id)
     db.session.commit()
-    
-    schedule = Schedule(created_by=admin_id, admin_id=admin_id, staff_id=None, name=f"Schedule_{schedule_id}_{datetime.utcnow().isoformat()}")
-    
-    db.session.add(schedule)
-    db.session.commit()
+    invalidate_listings(start_time, start_time, {staff_id})
     return shift.get_json()
 
 
-def get_shift_report(admin_id: int):
-    actor = get_user(admin_id)
-    if not actor or actor.role != "admin":
-        raise PermissionError("Only admins can view shift reports")
+def get_shift_report(admin_id: int, role: str = None):
+    check_role(admin_id, role, "admin", "Only admins can view shift reports")
+
+    def load():
+        shifts = Shift.query.options(*Shift.json_load_options()).order_by(Shift.start_time, Shift.id).all()
+        return [s.get_json() for s in shifts]
+    return cached_listing(("report",), load)
+
+def get_shift_report_page(admin_id: int, limit: int = None, cursor: str = None, role: str = None):
+    """A page of the shift report plus the cursor for the next one (None at the end)."""
+    check_role(admin_id, role, "admin", "Only admins can view shift reports")
+
+    query = Shift.query.options(*Shift.json_load_options())
+    return cached_listing(("report_page", limit, cursor), lambda: shift_page(query, limit, cursor))
+
+def stream_shift_report(admin_id: int, ndjson: bool = False, batch_size: int = None, role: str = None):
+    """Check access now and return a generator of JSON text for the full report."""
+    check_role(admin_id, role, "admin", "Only admins can view shift reports")
+
+    return iter_shift_json(Shift.query.options(*Shift.json_load_options()), batch_size, ndjson)
 
-    shifts = Shift.query.order_by(Shift.start_time).all()
-    return [s.get_json() for s in shifts]
+def get_listing_cache_stats(admin_id: int, role: str = None):
+    check_role(admin_id, role, "admin", "Only admins can view cache statistics")
+    return listing_cache_stats()
 
 def viewShift(shift_id: int):
     shift = Shift.query.get(shift_id)
@@ -1,28 +1,97 @@
+from collections import namedtuple
+from functools import wraps
+from flask import current_app, jsonify
 from flask_jwt_extended import (
     create_access_token, jwt_required, JWTManager,
-    get_jwt_identity, verify_jwt_in_request
+    get_jwt, get_jwt_identity, verify_jwt_in_request, current_user
 )
 from App.models import User
 from App.database import db
+from App.controllers.passwords import verify_user_password
+from App.controllers.ttl_cache import MISSING, TTLCache
+
+# what a request knows about its caller; cached between requests instead of the User row
+Identity = namedtuple("Identity", ["id", "username", "role", "token_version"])
+
+
+def token_claims(user):
+    return {"role": user.role, "ver": user.token_version}
+
+
+def _identity_cache():
+    app = current_app._get_current_object()
+    cache = app.extensions.get("identity_cache")
+    if cache is None:
+        cache = app.extensions["identity_cache"] = TTLCache(
+            max_entries=app.config.get("IDENTITY_CACHE_SIZE", 1024),
+            ttl=app.config.get("IDENTITY_CACHE_TTL", 60),
+        )
+    return cache
+
+
+def load_identity(user_id):
+    """The caller's ``Identity``, from the cache or one narrow ``user`` row read; None if missing."""
+    user_id = int(user_id)
+    cache = _identity_cache()
+    identity = cache.get(user_id)
+    if identity is MISSING:
+        row = db.session.execute(
+            db.select(User.id, User.username, User.role, User.token_version).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        identity = Identity(*row)
+        cache.put(user_id, identity)
+    return identity
+
+
+def invalidate_identity(user_id=None):
+    """Forget the cached identity of ``user_id`` in this process, or every identity when None.
+
+    Other worker processes keep theirs until IDENTITY_CACHE_TTL runs out.
+    """
+    if user_id is None:
+        _identity_cache().invalidate()
+    else:
+        _identity_cache().pop(int(user_id))
+
+
+def role_required(*roles):
+    """``jwt_required`` that also checks the token's ``role`` claim.
+
+    Tokens issued before the claim existed fall back to the cached
+    identity's role, so neither path queries the user table on a hit.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            role = get_jwt().get("role") or current_user.role
+            if role not in roles:
+                return jsonify({"error": f"This endpoint requires the {' or '.join(roles)} role"}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
 
 def login(username, password):
   result = db.session.execute(db.select(User).filter_by(username=username))
   user = result.scalar_one_or_none()
-  if user and user.check_password(password):
+  if user and verify_user_password(user, password):
     
-    return create_access_token(identity=str(user.id))
+    return create_access_token(identity=str(user.id), additional_claims=token_claims(user))
   return None
 
 def loginCLI(username, password):
     result = db.session.execute(db.select(User).filter_by(username=username))
     user = result.scalar_one_or_none()
 
-    if user and user.check_password(password):
+    if user and verify_user_password(user, password):
         
         if user.active_token:
             return {"message": "User already logged in", "token": user.active_token}
 
-        token = create_access_token(identity=str(user.id))
+        token = create_access_token(identity=str(user.id), additional_claims=token_claims(user))
         user.active_token = token
         db.session.commit()
         return {"message": "Login successful", "token": token}
@@ -40,7 +109,9 @@ def logout(username):
         return {"message": f"User {username} is not logged in"}
 
     user.active_token = None
+    user.token_version += 1
     db.session.commit()
+    invalidate_identity(user.id)
     return {"message": f"User {username} logged out successfully"}
 
 def setup_jwt(app):
@@ -53,12 +124,15 @@ def setup_jwt(app):
 
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
-        identity = jwt_data["sub"]
         try:
-            user_id = int(identity)
+            user_id = int(jwt_data["sub"])
         except (TypeError, ValueError):
             return None
-        return db.session.get(User, user_id)
+        identity = load_identity(user_id)
+        # a token from before the user's last logout no longer loads
+        if identity is None or identity.token_version != jwt_data.get("ver", 0):
+            return None
+        return identity
 
     return jwt
 
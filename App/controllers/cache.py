@@ -0,0 +1,100 @@
+from flask import current_app
+from App.controllers.ttl_cache import MISSING, TTLCache
+from App.controllers.versions import roster_version
+
+
+class _ListingCache(TTLCache):
+    """``TTLCache`` for serialised shift listings.
+
+    Each entry is tagged with the window of shift start times it covers
+    (None for unbounded), for per-staff listings whose shifts it holds, and
+    the roster version it was loaded at. A write drops only the entries
+    whose window and staff it could have changed. A lookup at a different
+    version is a miss, so a write committed by another process, which never
+    reaches this cache's ``invalidate``, still retires them. Cached values
+    are shared between callers and must not be mutated.
+
+    ``generation`` counts invalidations. A loader reads it before querying
+    and passes it to ``put``, which drops the value if an invalidation ran
+    in between, since the load may have read rows from before that write.
+    """
+
+    def __init__(self, max_entries, ttl, **kwargs):
+        super().__init__(max_entries, ttl, **kwargs)
+        self.generation = 0
+        self.stale_puts = 0
+
+    def get(self, key, version=None):
+        return super().get(key, lambda tag: tag[2] == version)
+
+    def put(self, key, value, window=None, staff_id=None, generation=None, version=None):
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                self.stale_puts += 1
+                return
+            self._store(key, value, (window, staff_id, version))
+
+    def invalidate(self, start=None, end=None, staff_ids=None):
+        with self.lock:
+            self.generation += 1
+            return self._drop(lambda key, tag: _affected(tag, start, end, staff_ids))
+
+    def stats(self):
+        return dict(super().stats(), stale_puts=self.stale_puts)
+
+
+def _affected(tag, start, end, staff_ids):
+    window, staff_id, _ = tag
+    if staff_id is not None and staff_ids is not None and staff_id not in staff_ids:
+        return False
+    if window is None:
+        return True
+    window_start, window_end = window
+    if start is not None and window_end is not None and start >= window_end:
+        return False
+    if end is not None and window_start is not None and end < window_start:
+        return False
+    return True
+
+
+def _listing_cache():
+    app = current_app._get_current_object()
+    cache = app.extensions.get("listing_cache")
+    if cache is None:
+        cache = app.extensions["listing_cache"] = _ListingCache(
+            max_entries=app.config.get("LISTING_CACHE_SIZE", 256),
+            ttl=app.config.get("LISTING_CACHE_TTL", 30),
+        )
+    return cache
+
+
+def cached_listing(key, loader, window=None, staff_id=None):
+    """Return the cached value for ``key``, calling ``loader()`` on a miss.
+
+    ``window`` is the ``(start, end)`` range of shift start times the value
+    covers, either side None for unbounded; ``staff_id`` marks a listing of
+    one staff member's shifts only. Entries are tagged with the current
+    ``roster_version()``, the same number listing ETags are built from, so
+    a cached body is never served under a newer tag.
+    """
+    cache = _listing_cache()
+    version = roster_version()
+    value = cache.get(key, version)
+    if value is MISSING:
+        generation = cache.generation
+        value = loader()
+        cache.put(key, value, window, staff_id, generation, version)
+    return value
+
+
+def invalidate_listings(start=None, end=None, staff_ids=None):
+    """Drop cached listings that could include shifts starting in ``[start, end]``.
+
+    Leave ``start``/``end`` as None when the affected times are unknown, and
+    ``staff_ids`` as None when any staff member's shifts may have changed.
+    """
+    return _listing_cache().invalidate(start, end, staff_ids)
+
+
+def listing_cache_stats():
+    return _listing_cache().stats()
@@ -0,0 +1,233 @@
+import itertools
+import os
+import secrets
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, insert
+from App.models import Shift, ClockEventResult
+from App.database import db
+from App.controllers.concurrency import at_shutdown, make_event, make_lock, start_daemon_thread
+from App.controllers.cache import invalidate_listings
+from App.controllers.versions import bump_roster_version
+from App.controllers.staff import clock_error
+from App.controllers.user import check_role
+
+
+ERROR_LENGTH = ClockEventResult.__table__.c.error.type.length
+
+
+class _ClockEventQueue:
+    """Accepts clock events at once and writes them in grouped transactions.
+
+    Each event gets a sequence number when queued and keeps the time it
+    was accepted, which is what gets recorded. A loop on a daemon thread
+    flushes every ``flush_interval`` seconds, and a submit that fills a batch of
+    ``max_batch`` flushes straight away. A flush applies every event with
+    the usual conditional UPDATE inside one transaction, with a savepoint
+    per event so one that raises is marked failed without undoing the
+    others. It resolves repeats of the same staff member, shift and event
+    without touching the database, and bumps the roster versions once for
+    the whole batch.
+
+    Sequences are ``<pid>-<random>-<n>`` strings, unique across workers and
+    restarts. Per-event results are kept in memory (the most recent
+    ``keep_results``) and, once flushed, in ``ClockEventResult`` for
+    ``result_ttl`` seconds, so any worker can report an event that has been
+    written; only the accepting worker knows about one still queued.
+    """
+
+    def __init__(self, app, flush_interval, max_batch, keep_results, result_ttl=3600):
+        self.app = app
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.keep_results = keep_results
+        self.result_ttl = result_ttl
+        self.origin = f"{os.getpid()}-{secrets.token_hex(4)}"
+        self.lock = make_lock()
+        self.flush_lock = make_lock()
+        self.pending = deque()
+        self.results = OrderedDict()
+        self.sequence = itertools.count(1)
+        self.closed = False
+        self.stopping = make_event()
+        self.flushes = 0
+        if flush_interval:
+            start_daemon_thread(self._flush_loop, "clock-events")
+
+    def submit(self, staff_id, shift_id, event):
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Clock event queue is shut down")
+            sequence = f"{self.origin}-{next(self.sequence)}"
+            self.pending.append((sequence, int(staff_id), int(shift_id), event, datetime.now()))
+            self.results[sequence] = {"sequence": sequence, "staff_id": int(staff_id), "status": "queued"}
+            full = len(self.pending) >= self.max_batch
+        if full:
+            self.flush(block=False)
+        return sequence
+
+    def result(self, sequence):
+        with self.lock:
+            result = self.results.get(sequence)
+            return dict(result) if result else None
+
+    def wait(self, sequence, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            result = self.result(sequence)
+            if result is None or result["status"] != "queued" or time.monotonic() >= deadline:
+                return result
+            time.sleep(0.005)
+
+    def flush(self, block=True):
+        """Write out everything queued so far; returns the number of events applied or rejected."""
+        if not self.flush_lock.acquire(blocking=block):
+            return 0
+        try:
+            with self.lock:
+                batch = list(self.pending)
+                self.pending.clear()
+            if batch:
+                with self.app.app_context():
+                    self._write(batch)
+                self.flushes += 1
+            return len(batch)
+        finally:
+            self.flush_lock.release()
+
+    def close(self):
+        """Stop accepting events, stop the loop and drain the queue."""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        self.stopping.set()
+        self.flush()
+
+    def _flush_loop(self):
+        while not self.stopping.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception("Clock event flush failed")
+
+    def _write(self, batch):
+        outcomes = {}
+        applied = set()
+        touched = []
+        try:
+            for sequence, staff_id, shift_id, event, at in batch:
+                if (staff_id, shift_id, event) in applied:
+                    reason = "already"  # coalesced: an earlier event in this batch set it
+                else:
+                    try:
+                        # a savepoint per event, so one that errors fails alone
+                        with db.session.begin_nested():
+                            row = Shift.record_clock(event, staff_id, shift_id, at)
+                            reason = Shift.clock_failure(event, staff_id, shift_id) if row is None else None
+                    except Exception as e:
+                        outcomes[sequence] = {"status": "failed", "error": f"Clock event failed: {e}"}
+                        continue
+                    if row is not None:
+                        applied.add((staff_id, shift_id, event))
+                        touched.append(row)
+                        outcomes[sequence] = {"status": "applied", "shift": Shift.row_json(row)}
+                        continue
+                outcomes[sequence] = {"status": "rejected", "error": clock_error(event, reason)}
+            if touched:
+                bump_roster_version(*{row["schedule_id"] for row in touched})
+            self._record(batch, outcomes)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            touched = []
+            outcomes = {sequence: {"status": "failed", "error": f"Clock event failed: {e}"} for sequence, *_ in batch}
+            try:
+                self._record(batch, outcomes)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception("Could not record failed clock events")
+
+        if touched:
+            starts = [row["start_time"] for row in touched]
+            invalidate_listings(min(starts), max(starts), {row["staff_id"] for row in touched})
+        with self.lock:
+            for sequence, outcome in outcomes.items():
+                self.results[sequence].update(outcome)
+            while len(self.results) > self.keep_results:
+                oldest = next(iter(self.results))
+                if self.results[oldest]["status"] == "queued":
+                    break
+                del self.results[oldest]
+
+    def _record(self, batch, outcomes):
+        """Add the batch's outcomes to ClockEventResult and prune expired ones; the caller commits."""
+        now = datetime.now()
+        table = ClockEventResult.__table__
+        db.session.execute(delete(table).where(table.c.recorded_at < now - timedelta(seconds=self.result_ttl)))
+        db.session.execute(insert(table), [
+            {
+                "sequence": sequence,
+                "staff_id": staff_id,
+                "shift_id": shift_id,
+                "status": outcomes[sequence]["status"],
+                "error": (outcomes[sequence].get("error") or "")[:ERROR_LENGTH] or None,
+                "shift": outcomes[sequence].get("shift"),
+                "recorded_at": now,
+            }
+            for sequence, staff_id, shift_id, *_ in batch
+        ])
+
+
+def _clock_queue():
+    app = current_app._get_current_object()
+    queue = app.extensions.get("clock_event_queue")
+    if queue is None:
+        queue = app.extensions["clock_event_queue"] = _ClockEventQueue(
+            app,
+            flush_interval=app.config.get("CLOCK_QUEUE_FLUSH_MS", 50) / 1000,
+            max_batch=app.config.get("CLOCK_QUEUE_MAX_BATCH", 200),
+            keep_results=app.config.get("CLOCK_QUEUE_RESULTS", 10000),
+            result_ttl=app.config.get("CLOCK_QUEUE_RESULT_TTL", 3600),
+        )
+        at_shutdown(queue.close)
+    return queue
+
+
+def queue_clock_event(staff_id, shift_id, event, role=None):
+    """Accept a clock event for a grouped write and return its sequence number.
+
+    The role check happens now, so callers without the staff role get a
+    PermissionError straight away; ownership and state are checked at flush.
+    """
+    if event not in Shift.CLOCK_EVENTS:
+        raise ValueError(f"Unknown clock event: {event}")
+    check_role(staff_id, role, "staff", f"Only staff can {event.replace('_', ' ')}")
+    if shift_id is None:
+        raise ValueError("shiftID is required")
+    return _clock_queue().submit(staff_id, shift_id, event)
+
+
+def get_clock_event(sequence, staff_id=None, wait=0):
+    """Result for ``sequence``, optionally waiting up to ``wait`` seconds for its flush.
+
+    Events this process accepted are answered from memory; flushed events
+    from any worker are read from ``ClockEventResult``. With ``staff_id``,
+    events queued by someone else are reported as missing.
+    """
+    queue = _clock_queue()
+    result = queue.wait(sequence, wait) if wait else queue.result(sequence)
+    if result is None:
+        stored = db.session.get(ClockEventResult, sequence)
+        result = stored.get_json() if stored else None
+    if result is None or (staff_id is not None and result["staff_id"] != int(staff_id)):
+        return None
+    return result
+
+
+def drain_clock_events():
+    """Flush everything queued so far; returns how many events were written or rejected."""
+    return _clock_queue().flush()
@@ -0,0 +1,96 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def gevent_patched():
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("threading")
+
+
+def make_executor(max_workers, thread_name_prefix=""):
+    # under gunicorn's gevent worker `threading` is monkey-patched, so a
+    # plain ThreadPoolExecutor would run work as greenlets and still block
+    # the hub; gevent's own pool runs it on native threads instead
+    if gevent_patched():
+        from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+        return NativeThreadPoolExecutor(max_workers=max_workers)
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+
+
+def make_process_pool(max_workers):
+    # workers are spawned, not forked: a fork taken inside a request copies
+    # gevent's patched hub and any held locks or open DB connections into
+    # the child, so tasks and their arguments must be importable/picklable
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def make_lock():
+    # state touched from native pool threads needs a real OS lock rather
+    # than the greenlet lock monkey-patching swaps in
+    if gevent_patched():
+        from gevent import monkey
+        return monkey.get_original("threading", "Lock")()
+    return threading.Lock()
+
+
+def native_sleep(seconds):
+    # for loops running on native pool threads, where the patched sleep
+    # would try to switch greenlets
+    if gevent_patched():
+        from gevent import monkey
+        return monkey.get_original("time", "sleep")(seconds)
+    return time.sleep(seconds)
+
+
+class _NativeEvent:
+    """Minimal ``threading.Event`` on a real OS lock, for native threads under gevent."""
+
+    def __init__(self):
+        self._flag = False
+        self._latch = make_lock()
+        self._latch.acquire()
+
+    def is_set(self):
+        return self._flag
+
+    def set(self):
+        if not self._flag:
+            self._flag = True
+            self._latch.release()
+
+    def wait(self, timeout=None):
+        if self._latch.acquire(timeout=-1 if timeout is None else timeout):
+            self._latch.release()
+        return self._flag
+
+
+def make_event():
+    # the patched Event is built on greenlet locks, which a native thread
+    # cannot wait on
+    if gevent_patched():
+        return _NativeEvent()
+    return threading.Event()
+
+
+def start_daemon_thread(target, name):
+    """Run ``target`` on a native daemon thread, which never holds up interpreter exit."""
+    if gevent_patched():
+        from gevent import monkey
+        monkey.get_original("_thread", "start_new_thread")(target, ())
+        return
+    threading.Thread(target=target, name=name, daemon=True).start()
+
+
+def at_shutdown(fn):
+    """Call ``fn`` when the interpreter starts shutting down.
+
+    Runs before non-daemon threads are joined (as ``concurrent.futures``
+    does), so draining work there cannot deadlock on a thread that is
+    itself waiting for exit.
+    """
+    threading._register_atexit(fn)
@@ -1,11 +1,11 @@
 #app/controllers/initialize.py
 from .user import create_user
-from App.database import db
+from App.database import db, create_db
 
 
 def initialize():
     db.drop_all()
-    db.create_all()
+    create_db()
     create_user('bob', 'bobpass', 'admin')
     create_user('jane', 'janepass', 'staff')
     create_user('alice', 'alicepass', 'staff')
@@ -0,0 +1,243 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from App.models import BackgroundJob
+from App.database import db
+from App.controllers.admin import auto_schedule
+from App.controllers.user import check_role
+from App.controllers.user_import import import_users
+from App.controllers.concurrency import make_executor, make_lock
+
+
+class _BackgroundJobs:
+    """Runs one kind of job on a bounded pool, with its state in ``BackgroundJob``.
+
+    Any worker can report a job, since its row is written when it is
+    submitted, started and finished. A submission whose key matches a
+    queued or running job, on this worker or another, returns that job
+    instead of starting a new one. Progress is written at the job's own
+    commit points, so a job mid-transaction is only reported live by the
+    worker running it. Jobs still active ``timeout`` seconds after they were
+    submitted, e.g. because their worker died, are marked failed. Only the
+    most recent ``keep_finished`` finished jobs are kept.
+    """
+
+    def __init__(self, app, kind, max_workers, max_pending, keep_finished, timeout):
+        self.app = app
+        self.kind = kind
+        self.max_pending = max_pending
+        self.keep_finished = keep_finished
+        self.timeout = timeout
+        self.executor = make_executor(max_workers, thread_name_prefix=kind.replace("_", "-"))
+        self.lock = make_lock()
+        self.live = {}
+
+    def submit(self, key, params, run):
+        """Queue ``run(progress)`` and return ``(job, duplicate)``."""
+        active_key = f"{self.kind}:{key}"
+        self._expire_abandoned()
+        for _ in range(2):
+            existing = _load(BackgroundJob.active_key == active_key)
+            if existing is not None:
+                return existing.get_json(), True
+            active = db.session.execute(
+                select(func.count()).select_from(BackgroundJob)
+                .where(BackgroundJob.kind == self.kind, BackgroundJob.active_key.is_not(None))
+            ).scalar()
+            if active >= self.max_pending:
+                raise OverflowError(f"Too many {self.kind.replace('_', '-')} jobs in progress, try again later")
+
+            job = BackgroundJob(
+                id=uuid.uuid4().hex,
+                kind=self.kind,
+                active_key=active_key,
+                params=params,
+                status="queued",
+                progress={"done": 0, "total": None},
+                submitted_at=datetime.utcnow(),
+            )
+            db.session.add(job)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # another worker queued the same run between our check and insert
+                db.session.rollback()
+                continue
+            self.executor.submit(self._run, job.id, run, time.perf_counter())
+            return job.get_json(), False
+        raise OverflowError(f"Could not queue the {self.kind.replace('_', '-')} job, try again")
+
+    def live_progress(self, job_id):
+        with self.lock:
+            return self.live.get(job_id)
+
+    def _expire_abandoned(self):
+        cutoff = datetime.utcnow() - timedelta(seconds=self.timeout)
+        db.session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.kind == self.kind, BackgroundJob.active_key.is_not(None),
+                   BackgroundJob.submitted_at < cutoff)
+            .values(status="failed", active_key=None, finished_at=datetime.utcnow(),
+                    error="Job was abandoned by its worker"),
+            execution_options={"synchronize_session": False},
+        )
+        db.session.commit()
+
+    def _update(self, job_id, **fields):
+        db.session.execute(
+            update(BackgroundJob).where(BackgroundJob.id == job_id).values(**fields),
+            execution_options={"synchronize_session": False},
+        )
+        db.session.commit()
+
+    def _run(self, job_id, run, submitted):
+        with self.app.app_context():
+            started = time.perf_counter()
+            try:
+                self._update(job_id, status="running", started_at=datetime.utcnow(),
+                             queue_seconds=round(started - submitted, 4))
+            except SQLAlchemyError:
+                db.session.rollback()
+                self.app.logger.exception("Could not mark job %s running", job_id)
+
+            def progress(**fields):
+                with self.lock:
+                    self.live[job_id] = fields
+                # only write between the job's own transactions
+                if not db.session().in_transaction():
+                    try:
+                        self._update(job_id, progress=fields)
+                    except SQLAlchemyError:
+                        db.session.rollback()
+
+            status, result, error = "failed", None, None
+            try:
+                result = run(progress)
+                if result.get("status") == "success":
+                    status = "succeeded"
+                else:
+                    error = result.get("message")
+            except Exception as e:
+                db.session.rollback()
+                error = f"{self.kind.replace('_', ' ').capitalize()} failed: {e}"
+
+            with self.lock:
+                fields = self.live.pop(job_id, None)
+            try:
+                self._update(
+                    job_id,
+                    status=status,
+                    result=result,
+                    error=error,
+                    active_key=None,
+                    finished_at=datetime.utcnow(),
+                    run_seconds=round(time.perf_counter() - started, 4),
+                    **({"progress": fields} if fields is not None else {}),
+                )
+                self._prune()
+            except SQLAlchemyError:
+                db.session.rollback()
+                self.app.logger.exception("Could not record the outcome of job %s", job_id)
+
+    def _prune(self):
+        kept = (
+            select(BackgroundJob.id)
+            .where(BackgroundJob.kind == self.kind, BackgroundJob.finished_at.is_not(None))
+            .order_by(BackgroundJob.finished_at.desc())
+            .limit(self.keep_finished)
+        )
+        db.session.execute(
+            delete(BackgroundJob)
+            .where(BackgroundJob.kind == self.kind, BackgroundJob.finished_at.is_not(None),
+                   BackgroundJob.id.not_in(kept.scalar_subquery())),
+            execution_options={"synchronize_session": False},
+        )
+        db.session.commit()
+
+
+def _load(criterion):
+    # populate_existing so a session that read the row before sees its latest state
+    return db.session.execute(
+        select(BackgroundJob).where(criterion).execution_options(populate_existing=True)
+    ).scalar()
+
+
+def _job_registry(kind, prefix):
+    app = current_app._get_current_object()
+    registries = app.extensions.setdefault("background_jobs", {})
+    registry = registries.get(kind)
+    if registry is None:
+        registry = registries[kind] = _BackgroundJobs(
+            app,
+            kind,
+            max_workers=app.config.get(f"{prefix}_JOB_WORKERS", 2),
+            max_pending=app.config.get(f"{prefix}_JOB_MAX_PENDING", 32),
+            keep_finished=app.config.get(f"{prefix}_JOB_HISTORY", 100),
+            timeout=app.config.get(f"{prefix}_JOB_TIMEOUT", 3600),
+        )
+    return registry
+
+
+def submit_auto_schedule_job(schedule_id: int, method_type: str, avoid_overlaps: bool = False, max_hours: float = None):
+    """Queue an auto-schedule run and return ``(job, duplicate)`` at once.
+
+    ``duplicate`` is true when an identical run was already queued or
+    running, on any worker, in which case that job is returned.
+    """
+    method = method_type.lower().strip() if isinstance(method_type, str) else str(method_type)
+    kwargs = {
+        "schedule_id": int(schedule_id),
+        "method_type": method,
+        "avoid_overlaps": bool(avoid_overlaps),
+        "max_hours": max_hours,
+    }
+    key = f"{kwargs['schedule_id']}:{method}:{kwargs['avoid_overlaps']}:{max_hours}"
+    params = {"schedule_id": kwargs["schedule_id"], "method": method}
+
+    def run(progress):
+        return auto_schedule(progress=lambda done, total: progress(done=done, total=total), **kwargs)
+
+    return _job_registry("auto_schedule", "AUTO_SCHEDULE").submit(key, params, run)
+
+
+def submit_user_import_job(admin_id: int, records: list, chunk_size: int = None, role: str = None):
+    """Queue a bulk user import and return ``(job, duplicate)`` at once.
+
+    ``records`` must already be in memory, since the request body is gone
+    by the time the job runs. Progress counts users created so far. Every
+    import is its own job; ``duplicate`` is always false.
+    """
+    check_role(admin_id, role, "admin", "Only admins can import users")
+    total = len(records)
+
+    def run(progress):
+        return import_users(admin_id, records, chunk_size=chunk_size, role=role,
+                            progress=lambda created, elapsed: progress(done=created, total=total))
+
+    return _job_registry("user_import", "USER_IMPORT").submit(uuid.uuid4().hex, {"rows": total}, run)
+
+
+def get_job(job_id: str):
+    """The job's state from the database, with live progress if this worker is running it."""
+    job = _load(BackgroundJob.id == job_id)
+    if job is None:
+        return None
+    result = job.get_json()
+    registry = current_app.extensions.get("background_jobs", {}).get(job.kind)
+    live = registry.live_progress(job_id) if registry else None
+    if live is not None:
+        result["progress"] = live
+    return result
+
+
+def get_auto_schedule_job(job_id: str):
+    job = get_job(job_id)
+    return job if job and job["kind"] == "auto_schedule" else None
+
+
+def get_user_import_job(job_id: str):
+    job = get_job(job_id)
+    return job if job and job["kind"] == "user_import" else None
@@ -0,0 +1,53 @@
+import base64
+import json
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import tuple_
+from App.models import Shift
+
+
+def encode_cursor(start_time: datetime, shift_id: int) -> str:
+    raw = json.dumps([start_time.isoformat(), shift_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        start, shift_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(start), int(shift_id)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid pagination cursor")
+
+
+def page_limit(limit=None) -> int:
+    default = current_app.config.get("SHIFT_PAGE_SIZE", 100)
+    maximum = current_app.config.get("SHIFT_PAGE_MAX", 1000)
+    if limit is None:
+        return default
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be a whole number")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return min(limit, maximum)
+
+
+def shift_page(query, limit=None, cursor=None) -> dict:
+    """One page of ``query`` in ``(start_time, id)`` order.
+
+    The cursor holds the last row's sort key, so each page is a range seek
+    on that key rather than an OFFSET scan over everything before it.
+    """
+    limit = page_limit(limit)
+    if cursor:
+        after = decode_cursor(cursor)
+        query = query.filter(tuple_(Shift.start_time, Shift.id) > after)
+    shifts = query.order_by(Shift.start_time, Shift.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(shifts) > limit:
+        shifts = shifts[:limit]
+        next_cursor = encode_cursor(shifts[-1].start_time, shifts[-1].id)
+    return {"data": [s.get_json() for s in shifts], "next": next_cursor}
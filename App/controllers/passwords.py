@@ -0,0 +1,70 @@
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+from App.database import db
+from App.models.user import password_hash_method
+from App.controllers.concurrency import make_executor, make_lock
+
+
+class _PasswordPool:
+    """Runs password hashing and checks on native pool threads.
+
+    The KDF is slow on purpose and runs in C with the GIL released, so on
+    native threads several logins hash in parallel while other requests
+    (greenlets under gevent) keep being served. At most ``max_pending``
+    calls may be queued or running; past that an OverflowError is raised so
+    the caller can answer 429 instead of letting a login storm queue up.
+    """
+
+    def __init__(self, workers, max_pending):
+        self.executor = make_executor(workers, thread_name_prefix="password-kdf")
+        self.max_pending = max_pending
+        self.lock = make_lock()
+        self.pending = 0
+
+    def run(self, fn, *args):
+        with self.lock:
+            if self.pending >= self.max_pending:
+                raise OverflowError("Too many logins in progress, try again shortly")
+            self.pending += 1
+        try:
+            return self.executor.submit(fn, *args).result()
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+
+def _password_pool():
+    app = current_app._get_current_object()
+    if "password_pool" not in app.extensions:
+        workers = app.config.get("PASSWORD_VERIFY_WORKERS", 2)
+        # 0 workers runs the KDF inline, on the calling thread
+        app.extensions["password_pool"] = _PasswordPool(
+            workers, app.config.get("PASSWORD_VERIFY_MAX_PENDING", 64)
+        ) if workers else None
+    return app.extensions["password_pool"]
+
+
+def run_password_kdf(fn, *args):
+    """Call ``fn(*args)`` (a password hash or check) on the KDF pool and wait for it."""
+    pool = _password_pool()
+    return pool.run(fn, *args) if pool else fn(*args)
+
+
+def verify_user_password(user, password) -> bool:
+    """Check ``password`` for ``user`` without blocking other requests on the KDF.
+
+    The session's transaction is committed first so no pooled connection
+    is held while the KDF runs. When the password matches but the stored
+    hash was made with other settings than ``PASSWORD_HASH_METHOD``, it is
+    rehashed with the current settings and committed, so changing the KDF
+    cost takes effect as users log in.
+    """
+    stored = user.password
+    db.session.commit()
+    if not run_password_kdf(check_password_hash, stored, password):
+        return False
+    method = password_hash_method()
+    if user.password_needs_rehash(method):
+        user.password = run_password_kdf(generate_password_hash, password, method)
+        db.session.commit()
+    return True
@@ -0,0 +1,170 @@
+import csv
+import json
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from App.models import Shift, Schedule, StaffRoster
+from App.database import db
+from App.controllers.user import check_role
+from App.controllers.cache import invalidate_listings
+from App.controllers.versions import bump_roster_version
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+
+def read_shift_rows(stream, fmt):
+    """Records from a text stream: CSV with a header row, or one JSON object per line.
+
+    JSON lines are yielded unparsed so a bad line is reported against its
+    row instead of stopping the import.
+    """
+    if fmt == "csv":
+        return csv.DictReader(stream)
+    if fmt == "jsonl":
+        return (line for line in stream if line.strip())
+    raise ValueError(f"Unknown import format: {fmt}")
+
+
+def _field(record, *names):
+    for name in names:
+        value = record.get(name)
+        if value not in (None, ""):
+            return value
+    raise ValueError(f"{names[0]} is required")
+
+
+def _id_field(record, *names):
+    value = _field(record, *names)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{names[0]} must be an integer, got {value!r}")
+
+
+def _time_field(record, *names):
+    value = _field(record, *names)
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{names[0]} is not an ISO date/time: {value!r}")
+    # shift times are stored naive; comparing one with an offset to one
+    # without would raise TypeError partway through the import
+    if value.tzinfo is not None:
+        raise ValueError(f"{names[0]} must not include a UTC offset: {value.isoformat()!r}")
+    return value
+
+
+def _numbered(records):
+    """``(row number, record)`` pairs; a CSV line the reader rejects is yielded as its ``csv.Error``."""
+    rows = iter(records)
+    number = 0
+    while True:
+        number += 1
+        try:
+            yield number, next(rows)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            # the reader has consumed the bad line and can carry on
+            yield number, e
+
+
+def _shift_values(record, staff_ids, schedule_ids):
+    if isinstance(record, csv.Error):
+        raise ValueError(f"Unreadable CSV row: {record}")
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+    if not isinstance(record, dict):
+        raise ValueError("Expected an object with staffID, scheduleID, start_time and end_time")
+
+    staff_id = _id_field(record, "staffID", "staff_id")
+    schedule_id = _id_field(record, "scheduleID", "schedule_id")
+    start_time = _time_field(record, "start_time", "startTime")
+    end_time = _time_field(record, "end_time", "endTime")
+    if staff_id not in staff_ids:
+        raise ValueError(f"Unknown staff id {staff_id}")
+    if schedule_id not in schedule_ids:
+        raise ValueError(f"Unknown schedule id {schedule_id}")
+    if end_time <= start_time:
+        raise ValueError("end_time must be after start_time")
+    return {"staff_id": staff_id, "schedule_id": schedule_id, "start_time": start_time, "end_time": end_time}
+
+
+class _ShiftImport:
+    """Validated rows waiting to be written, plus what has been written so far."""
+
+    def __init__(self):
+        self.pending = []
+        self.errors = []
+        self.inserted = 0
+
+    def write_pending(self):
+        """Insert the pending rows with one executemany and commit them.
+
+        The roster version is bumped in the same transaction and the chunk's
+        listings are dropped once it commits, so chunks already written are
+        visible even if a later one, or the input stream, fails.
+        """
+        if not self.pending:
+            return
+        rows = [values for _, values in self.pending]
+        try:
+            db.session.execute(insert(Shift.__table__), rows)
+            bump_roster_version(*{row["schedule_id"] for row in rows})
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            reason = f"Insert failed: {e.__class__.__name__}"
+            self.errors.extend({"row": number, "error": reason} for number, _ in self.pending)
+        else:
+            self.inserted += len(rows)
+            starts = [row["start_time"] for row in rows]
+            invalidate_listings(min(starts), max(starts), {row["staff_id"] for row in rows})
+        self.pending = []
+
+
+def import_shifts(admin_id: int, records, chunk_size: int = None, role: str = None):
+    """Schedule many shifts at once from an iterable of records.
+
+    Records are dicts (or JSON text) with the same fields as a single
+    ``schedule_shift`` call. Staff and schedule ids are checked against sets
+    loaded once up front, and valid rows are inserted ``chunk_size`` at a
+    time, one transaction per chunk. Rows that fail, including CSV lines
+    the reader cannot parse, are reported by their 1-based position and do
+    not stop the rest.
+    """
+    check_role(admin_id, role, "admin", "Only admins can import shifts")
+    started = time.perf_counter()
+    chunk_size = chunk_size or current_app.config.get('SHIFT_IMPORT_CHUNK_SIZE', 5000)
+
+    staff_ids = set(StaffRoster.load().id_list())
+    schedule_ids = set(db.session.execute(db.select(Schedule.id)).scalars())
+
+    result = _ShiftImport()
+    total = 0
+    for number, record in _numbered(records):
+        total = number
+        try:
+            result.pending.append((number, _shift_values(record, staff_ids, schedule_ids)))
+        except ValueError as e:
+            result.errors.append({"row": number, "error": str(e)})
+            continue
+        if len(result.pending) >= chunk_size:
+            result.write_pending()
+    result.write_pending()
+
+    result.errors.sort(key=lambda error: error["row"])
+    return {
+        "status": "success",
+        "rows": total,
+        "inserted": result.inserted,
+        "failed": len(result.errors),
+        "errors": result.errors,
+        "elapsed_seconds": round(time.perf_counter() - started, 4),
+    }
@@ -1,42 +1,131 @@
 from App.models import Shift
 from App.database import db
-from datetime import datetime
-from App.controllers.user import get_user
+from datetime import datetime, time, timedelta
+from flask import current_app
+from App.controllers.user import check_role
+from App.controllers.pagination import shift_page
+from App.controllers.streaming import iter_shift_json
+from App.controllers.cache import cached_listing, invalidate_listings
+from App.controllers.versions import bump_roster_version
 
-def get_combined_roster(staff_id):
-    staff = get_user(staff_id)
-    if not staff or staff.role != "staff":
-        raise PermissionError("Only staff can view roster")
-    return [shift.get_json() for shift in Shift.query.all()]
+ROSTER_SCOPES = ("all", "mine")
 
 
-def clock_in(staff_id, shift_id):
-    staff = get_user(staff_id)
-    if not staff or staff.role != "staff":
-        raise PermissionError("Only staff can clock in")
+def _parse_time(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid date/time: {value}")
 
-    shift = db.session.get(Shift, shift_id)
 
-    if not shift or shift.staff_id != staff_id:
-        raise ValueError("Invalid shift for staff")
+def roster_window(start=None, end=None, days=None):
+    """Resolve a ``[start, end)`` roster window, filling in missing bounds.
 
-    shift.clock_in = datetime.now()
-    db.session.commit()
-    return shift
+    With neither bound the window starts today; a single bound is extended
+    by ``days`` (ROSTER_WINDOW_DAYS, default 7) in the other direction.
+    Accepts datetimes or ISO strings.
+    """
+    days = timedelta(days=days or current_app.config.get("ROSTER_WINDOW_DAYS", 7))
+    start, end = _parse_time(start), _parse_time(end)
+    if start is None and end is None:
+        start = datetime.combine(datetime.now().date(), time.min)
+    if start is None:
+        start = end - days
+    if end is None:
+        end = start + days
+    if start >= end:
+        raise ValueError("Roster window must end after it starts")
+    return start, end
 
 
-def clock_out(staff_id, shift_id):
-    staff = get_user(staff_id)
-    if not staff or staff.role != "staff":
-        raise PermissionError("Only staff can clock out")
+def _roster_query(staff_id, start=None, end=None, scope="all", role=None):
+    """Return ``(query, owner_id)``; owner_id is set only for the "mine" scope."""
+    check_role(staff_id, role, "staff", "Only staff can view roster")
+    if scope not in ROSTER_SCOPES:
+        raise ValueError(f"Unknown roster scope: {scope}")
 
-    shift = db.session.get(Shift, shift_id)
-    if not shift or shift.staff_id != staff_id:
-        raise ValueError("Invalid shift for staff")
+    owner_id = int(staff_id) if scope == "mine" else None
+    query = Shift.query.options(*Shift.json_load_options())
+    if owner_id is not None:
+        query = query.filter(Shift.staff_id == owner_id)
+    if start is not None:
+        query = query.filter(Shift.start_time >= start)
+    if end is not None:
+        query = query.filter(Shift.start_time < end)
+    return query, owner_id
+
+
+def get_combined_roster(staff_id, start=None, end=None, scope="all", role=None):
+    """Shifts starting in ``[start, end)``; unbounded on a side left as None."""
+    query, owner_id = _roster_query(staff_id, start, end, scope, role)
+    return cached_listing(
+        ("roster", owner_id, start, end),
+        lambda: [shift.get_json() for shift in query.order_by(Shift.start_time, Shift.id).all()],
+        window=(start, end),
+        staff_id=owner_id,
+    )
+
+
+def get_combined_roster_page(staff_id, limit=None, cursor=None, start=None, end=None, scope="all", role=None):
+    query, owner_id = _roster_query(staff_id, start, end, scope, role)
+    return cached_listing(
+        ("roster_page", owner_id, start, end, limit, cursor),
+        lambda: shift_page(query, limit, cursor),
+        window=(start, end),
+        staff_id=owner_id,
+    )
+
+
+def stream_combined_roster(staff_id, ndjson=False, batch_size=None, start=None, end=None, scope="all", role=None):
+    query, _ = _roster_query(staff_id, start, end, scope, role)
+    return iter_shift_json(query, batch_size, ndjson)
+
+
+CLOCK_FAILURES = {
+    "missing": "Invalid shift for staff",
+    "not_assigned": "Invalid shift for staff",
+    "already": "Already {done} for this shift",
+    "not_clocked_in": "Cannot clock out before clocking in",
+}
 
-    shift.clock_out = datetime.now()
+
+def clock_error(event, reason):
+    """Message for a clock event that Shift.record_clock did not apply."""
+    return CLOCK_FAILURES[reason].format(done=event.replace("clock_", "clocked "))
+
+
+def record_clock_event(staff_id, shift_id, event, role=None):
+    """Clock in or out with one conditional UPDATE ... RETURNING.
+
+    ``role`` comes from the caller's JWT; only when it is missing (tokens
+    issued before the claim existed) is the user loaded to find it. Returns
+    the shift in get_json form.
+    """
+    check_role(staff_id, role, "staff", f"Only staff can {event.replace('_', ' ')}")
+
+    staff_id = int(staff_id)
+    row = Shift.record_clock(event, staff_id, shift_id, datetime.now())
+    if row is None:
+        reason = Shift.clock_failure(event, staff_id, shift_id)
+        db.session.rollback()
+        raise ValueError(clock_error(event, reason))
+
+    bump_roster_version(row["schedule_id"])
     db.session.commit()
-    return shift
+    invalidate_listings(row["start_time"], row["start_time"], {staff_id})
+    return Shift.row_json(row)
+
+
+def clock_in(staff_id, shift_id):
+    shift = record_clock_event(staff_id, shift_id, "clock_in")
+    return db.session.get(Shift, shift["id"])
+
+
+def clock_out(staff_id, shift_id):
+    shift = record_clock_event(staff_id, shift_id, "clock_out")
+    return db.session.get(Shift, shift["id"])
 
 def get_shift(shift_id):
     shift = db.session.get(Shift, shift_id)
@@ -0,0 +1,44 @@
+import json
+from flask import current_app
+from App.models import Shift
+
+STREAM_FLUSH_BYTES = 64 * 1024
+
+
+def stream_batch_size(batch_size=None) -> int:
+    return batch_size or current_app.config.get("SHIFT_STREAM_BATCH_SIZE", 1000)
+
+
+def iter_json_rows(rows, ndjson: bool = False):
+    """Encode ``rows`` (dicts) as one JSON array, or one object per line.
+
+    Output is yielded in chunks of roughly STREAM_FLUSH_BYTES, so only the
+    current chunk is ever held in memory.
+    """
+    buffer, size = [], 0
+    separator = "\n" if ndjson else ","
+    if not ndjson:
+        buffer.append("[")
+    first = True
+    for row in rows:
+        piece = json.dumps(row, separators=(",", ":"))
+        if ndjson:
+            piece += separator
+        elif not first:
+            piece = separator + piece
+        first = False
+        buffer.append(piece)
+        size += len(piece)
+        if size >= STREAM_FLUSH_BYTES:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if not ndjson:
+        buffer.append("]")
+    if buffer:
+        yield "".join(buffer)
+
+
+def iter_shift_json(query, batch_size=None, ndjson: bool = False):
+    """Stream ``query``'s shifts as JSON, fetching ``batch_size`` rows at a time."""
+    shifts = query.order_by(Shift.start_time, Shift.id).yield_per(stream_batch_size(batch_size))
+    return iter_json_rows((s.get_json() for s in shifts), ndjson)
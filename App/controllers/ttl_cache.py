@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+from App.controllers.concurrency import make_lock
+
+MISSING = object()
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire ``ttl`` seconds after being stored.
+
+    Each entry can carry a ``tag`` that ``get`` and ``invalidate`` callers
+    inspect, e.g. the window and staff member a listing covers. A cache
+    with ``max_entries`` of 0 stores nothing. Methods whose names start with
+    an underscore expect ``lock`` to be held, so subclasses can combine them
+    with their own checks in one critical section.
+    """
+
+    def __init__(self, max_entries, ttl, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = make_lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key, valid=None):
+        """The value for ``key``, or ``MISSING`` if absent, expired or ``valid(tag)`` is false."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and (entry[0] <= self.clock() or (valid is not None and not valid(entry[2]))):
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, tag=None):
+        with self.lock:
+            self._store(key, value, tag)
+
+    def pop(self, key):
+        """Drop ``key``; True if it was cached."""
+        with self.lock:
+            if self.entries.pop(key, None) is None:
+                return False
+            self.invalidations += 1
+            return True
+
+    def invalidate(self, predicate=None):
+        """Drop the entries for which ``predicate(key, tag)`` is true, or all of them; returns how many."""
+        with self.lock:
+            return self._drop(predicate or (lambda key, tag: True))
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _store(self, key, value, tag):
+        if self.max_entries <= 0:
+            return
+        self.entries[key] = (self.clock() + self.ttl, value, tag)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def _drop(self, predicate):
+        stale = [key for key, entry in self.entries.items() if predicate(key, entry[2])]
+        for key in stale:
+            del self.entries[key]
+        self.invalidations += len(stale)
+        return len(stale)
@@ -1,5 +1,6 @@
 from App.models import User, Admin, Staff, Shift
 from App.database import db
+from App.controllers.auth import invalidate_identity
 from datetime import datetime
 
 VALID_ROLES = {"user", "staff", "admin"}
@@ -25,6 +26,18 @@ def get_user_by_username(username):
 def get_user(id):
     return db.session.get(User, id)
 
+def check_role(user_id, role, required, message):
+    """Raise PermissionError unless the user has the ``required`` role.
+
+    Pass ``role`` from the caller's token claims to skip loading the user;
+    only when it is None (CLI callers, older tokens) is the user read.
+    """
+    if role is None:
+        user = get_user(user_id)
+        role = user.role if user else None
+    if role != required:
+        raise PermissionError(message)
+
 def get_all_users():
     return User.query.all()
 
@@ -39,5 +52,6 @@ def update_user(id, username):
     if user:
         user.username = username
         db.session.commit()
+        invalidate_identity(id)
         return user
     return None
\ No newline at end of file
@@ -0,0 +1,155 @@
+import csv
+import os
+import time
+from collections import deque
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from App.models import User, Admin, Staff
+from App.models.user import hash_passwords, password_hash_method
+from App.database import db
+from App.controllers.user import VALID_ROLES, check_role
+from App.controllers.concurrency import make_process_pool
+
+USERNAME_MAX_LENGTH = User.__table__.c.username.type.length
+SUBTYPE_TABLES = {"staff": Staff.__table__, "admin": Admin.__table__}
+
+
+def read_user_rows(stream):
+    """Records from a CSV text stream with a ``username,password,role`` header."""
+    return csv.DictReader(stream)
+
+
+def _text_field(record, name, default=""):
+    value = record.get(name)
+    if value is None:
+        return default
+    if not isinstance(value, str):
+        raise ValueError(f"{name} must be a string, got {type(value).__name__}")
+    return value or default
+
+
+def _user_values(record, taken):
+    if not isinstance(record, dict):
+        raise ValueError("Expected an object with username, password and role")
+    username = _text_field(record, "username").strip()
+    password = _text_field(record, "password")
+    role = _text_field(record, "role", "staff").lower().strip()
+    if not username:
+        raise ValueError("username is required")
+    if len(username) > USERNAME_MAX_LENGTH:
+        raise ValueError(f"username is longer than {USERNAME_MAX_LENGTH} characters")
+    if not password:
+        raise ValueError("password is required")
+    if role not in VALID_ROLES:
+        raise ValueError(f"Invalid role '{role}'. Must be one of {sorted(VALID_ROLES)}")
+    if username in taken:
+        raise ValueError(f"Username {username!r} is already taken")
+    taken.add(username)
+    return {"username": username, "password": password, "role": role}
+
+
+class _UserImport:
+    """Chunks of validated users whose passwords are being hashed in worker processes.
+
+    Each chunk's passwords are split across the workers as soon as the chunk
+    is full, and chunks are written in order, so the next chunk hashes while
+    the previous one is inserted.
+    """
+
+    def __init__(self, pool, workers, progress, started):
+        self.pool = pool
+        self.workers = workers
+        self.progress = progress
+        self.started = started
+        self.method = password_hash_method()
+        self.in_flight = deque()
+        self.errors = []
+        self.created = 0
+
+    def hash_chunk(self, chunk):
+        passwords = [values["password"] for _, values in chunk]
+        size = -(-len(passwords) // self.workers)
+        futures = [self.pool.submit(hash_passwords, passwords[i:i + size], self.method) for i in range(0, len(passwords), size)]
+        self.in_flight.append((chunk, futures))
+
+    def write_oldest(self):
+        """Insert the oldest chunk's users and their subtype rows in one transaction."""
+        chunk, futures = self.in_flight.popleft()
+        try:
+            hashes = [h for future in futures for h in future.result()]
+        except Exception as e:
+            self._fail(chunk, f"Password hashing failed: {e.__class__.__name__}")
+            return
+        rows = [dict(values, password=h) for (_, values), h in zip(chunk, hashes)]
+        try:
+            db.session.execute(insert(User.__table__), rows)
+            ids = dict(db.session.execute(
+                db.select(User.username, User.id).where(User.username.in_([row["username"] for row in rows]))
+            ).all())
+            for role, table in SUBTYPE_TABLES.items():
+                subtype_rows = [{"id": ids[row["username"]]} for row in rows if row["role"] == role]
+                if subtype_rows:
+                    db.session.execute(insert(table), subtype_rows)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            self._fail(chunk, f"Insert failed: {e.__class__.__name__}")
+            return
+        self.created += len(rows)
+        if self.progress:
+            self.progress(self.created, time.perf_counter() - self.started)
+
+    def _fail(self, chunk, reason):
+        self.errors.extend({"row": number, "error": reason} for number, _ in chunk)
+
+
+def import_users(admin_id: int, records, chunk_size: int = None, max_workers: int = None, progress=None, role: str = None):
+    """Create many users at once from an iterable of ``username``/``password``/``role`` dicts.
+
+    Usernames are checked against one set of existing names loaded up front.
+    Passwords are hashed across a process pool (one worker per core by
+    default) and users are inserted ``chunk_size`` at a time together with
+    their ``staff``/``admin`` rows, one transaction per chunk. Rows that fail
+    are reported by their 1-based position. ``progress(created, elapsed)``
+    is called after each chunk is written.
+    """
+    check_role(admin_id, role, "admin", "Only admins can import users")
+    started = time.perf_counter()
+    chunk_size = chunk_size or current_app.config.get('USER_IMPORT_CHUNK_SIZE', 500)
+    workers = max_workers or current_app.config.get('USER_IMPORT_WORKERS') or os.cpu_count() or 1
+
+    taken = set(db.session.execute(db.select(User.username)).scalars())
+    total = 0
+    invalid = []
+    with make_process_pool(workers) as pool:
+        importer = _UserImport(pool, workers, progress, started)
+        chunk = []
+        for number, record in enumerate(records, 1):
+            total = number
+            try:
+                chunk.append((number, _user_values(record, taken)))
+            except ValueError as e:
+                invalid.append({"row": number, "error": str(e)})
+                continue
+            if len(chunk) >= chunk_size:
+                importer.hash_chunk(chunk)
+                chunk = []
+                while len(importer.in_flight) > 1:
+                    importer.write_oldest()
+        if chunk:
+            importer.hash_chunk(chunk)
+        while importer.in_flight:
+            importer.write_oldest()
+
+    errors = sorted(invalid + importer.errors, key=lambda error: error["row"])
+    elapsed = time.perf_counter() - started
+    return {
+        "status": "success",
+        "rows": total,
+        "created": importer.created,
+        "failed": len(errors),
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 4),
+        "users_per_second": round(importer.created / elapsed, 1) if elapsed else None,
+    }
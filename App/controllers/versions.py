@@ -0,0 +1,17 @@
+import hashlib
+from App.models import RosterVersion
+
+
+def bump_roster_version(*schedule_ids):
+    """Record a shift change in the given schedules; the caller commits."""
+    RosterVersion.bump(*schedule_ids)
+
+
+def roster_version() -> int:
+    return RosterVersion.current()
+
+
+def listing_etag(kind, *parts) -> str:
+    """Strong ETag for a shift listing: the global roster version plus the request's parameters."""
+    raw = "|".join(str(part) for part in (roster_version(), kind, *parts))
+    return hashlib.sha1(raw.encode()).hexdigest()
@@ -9,7 +9,10 @@ def get_migrate(app):
     return Migrate(app, db)
 
 def create_db():
+    from App.models import RosterVersion
     db.create_all()
+    RosterVersion.seed()
+    db.session.commit()
     
 def init_db(app):
     db.init_app(app)
\ No newline at end of file
@@ -3,10 +3,17 @@ from App.models.admin import Admin
 from App.models.staff import Staff
 from App.models.schedule import Schedule
 from App.models.shift import Shift
+from App.models.roster_version import RosterVersion
+from App.models.clock_event_result import ClockEventResult
+from App.models.background_job import BackgroundJob
 from App.models.auto_scheduler import AutoScheduler 
+from App.models.assignment import AssignmentEngine
+from App.models.staff_roster import StaffRoster
+from App.models.shift_template import ShiftTemplate
 from App.models.strategy import (
     ScheduleStrategy,
     EvenDistribution,
     MinimalDays,
-    BalancedShift
+    BalancedShift,
+    OptimalAssignment
 )
\ No newline at end of file
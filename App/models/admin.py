@@ -37,31 +37,23 @@ class Admin(User):
         return shift
 
     def auto_schedule(self, schedule_id: int, method_type: str):
-        from App.models.auto_scheduler import AutoScheduler
-        from App.models.strategy import (
-            EvenDistributionStrategy,
-            MinimalDaysStrategy,
-            BalancedShiftStrategy,
-        )
+        from App.models.strategy import EvenDistribution, MinimalDays, BalancedShift
         from App.models.shift import Shift
-        from App.models.staff import Staff
+        from App.models.staff_roster import StaffRoster
 
-        staff_list = Staff.query.all()
+        roster = StaffRoster.load()
         
         shift_templates = Shift.query.filter_by(schedule_id=schedule_id, staff_id=None).all()
 
-        scheduler = AutoScheduler(staff_list, shift_templates)
-
         method = method_type.lower() if isinstance(method_type, str) else str(method_type)
         if method in ("even", "even_distribution", "even distribution"):
-            strategy = EvenDistributionStrategy()
+            strategy = EvenDistribution()
         elif method in ("minimal", "minimal_days", "minimal days"):
-            strategy = MinimalDaysStrategy()
+            strategy = MinimalDays()
         else:
-            strategy = BalancedShiftStrategy()
+            strategy = BalancedShift()
 
-        scheduler.set_strategy(strategy)
-        assigned = scheduler.generate_schedule(schedule_id)
+        assigned = strategy.generate(roster, shift_templates, schedule_id)
 
         for s in assigned:
             db.session.add(s)
@@ -0,0 +1,60 @@
+import heapq
+
+
+class AssignmentEngine:
+    """Hands each template to the least-loaded staff member.
+
+    Loads are kept in a min-heap of ``(load, staff_id)`` pairs, so picking
+    and updating the next assignee costs O(log staff) instead of a full scan.
+    Ties on load go to the lowest staff id.
+    """
+
+    def __init__(self, staff_ids, initial_load=0):
+        seen = set()
+        self._heap = []
+        for staff_id in staff_ids:
+            if staff_id in seen:
+                continue
+            seen.add(staff_id)
+            self._heap.append((initial_load, staff_id))
+        heapq.heapify(self._heap)
+
+    @classmethod
+    def from_loads(cls, loads: dict):
+        """Start from existing per-staff loads instead of a uniform one."""
+        engine = cls(())
+        engine._heap = [(load, staff_id) for staff_id, load in loads.items()]
+        heapq.heapify(engine._heap)
+        return engine
+
+    def __len__(self):
+        return len(self._heap)
+
+    def assign(self, weight=1, accept=None):
+        """Return the staff id with the lowest load and add ``weight`` to it.
+
+        With ``accept``, staff it rejects are skipped and keep their place;
+        returns None if nobody is accepted.
+        """
+        if not self._heap:
+            raise ValueError("No staff available for assignment")
+        if accept is None:
+            load, staff_id = self._heap[0]
+            heapq.heapreplace(self._heap, (load + weight, staff_id))
+            return staff_id
+
+        skipped = []
+        chosen = None
+        while self._heap:
+            load, staff_id = heapq.heappop(self._heap)
+            if accept(staff_id):
+                heapq.heappush(self._heap, (load + weight, staff_id))
+                chosen = staff_id
+                break
+            skipped.append((load, staff_id))
+        for item in skipped:
+            heapq.heappush(self._heap, item)
+        return chosen
+
+    def loads(self):
+        return {staff_id: load for load, staff_id in self._heap}
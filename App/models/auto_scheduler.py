@@ -1,29 +1,168 @@
 import abc
+import time
 from datetime import datetime
+from itertools import islice
+from typing import Iterator
+from sqlalchemy import insert
 from App.database import db
+from App.models.user import User
 from App.models.staff import Staff
+from App.models.staff_roster import StaffRoster
 from App.models.shift import Shift
-from App.models.strategy import ScheduleStrategy, EvenDistribution, MinimalDays, BalancedShift
+from App.models.strategy import ScheduleStrategy, ScheduleStrategyFactory, EvenDistribution, MinimalDays, BalancedShift
+
+DEFAULT_CHUNK_SIZE = 1000
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _shift_row(shift):
+    get = shift.get if isinstance(shift, dict) else lambda key: getattr(shift, key, None)
+    return {
+        "staff_id": get("staff_id"),
+        "schedule_id": get("schedule_id"),
+        "start_time": get("start_time"),
+        "end_time": get("end_time"),
+    }
+
+def compute_assignments(method_type: str, staff_ids: list[int], schedule_templates: list, schedule_id: int, options: dict = None) -> dict:
+    """Run a strategy on plain data only, so it can execute in a worker process.
+
+    Takes staff ids and ``ShiftTemplate`` tuples instead of ORM objects and
+    returns picklable assignment rows plus timing; nothing touches the
+    database. Persist the rows with ``AutoScheduler.stream_schedule``.
+    """
+    started = time.perf_counter()
+    strategy = ScheduleStrategyFactory.create_strategy(method_type, **(options or {}))
+    rows = list(strategy.iter_assignments(StaffRoster(staff_ids), schedule_templates, schedule_id))
+    return {
+        "schedule_id": schedule_id,
+        "rows": rows,
+        "unfilled": len(strategy.unfilled),
+        "compute_seconds": time.perf_counter() - started,
+    }
 
 class AutoScheduler:
-    def __init__(self, strategy: ScheduleStrategy, staff_list: list[Staff], schedule_templates: list[dict], schedule_id: int):
+    def __init__(self, strategy: ScheduleStrategy, staff_list: list[Staff], schedule_templates: list[dict], schedule_id: int,
+                 bulk: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE, progress=None):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
         self._strategy = strategy
         self._staff_list = staff_list
         self._schedule_templates = schedule_templates
         self._schedule_id = schedule_id
+        self._bulk = bulk
+        self._chunk_size = chunk_size
+        self._progress = progress
 
     def generate_schedule(self) -> list[dict]:
+        if self._bulk:
+            return self.bulk_save_schedule(self._iter_rows())
+
         new_shifts = self._strategy.generate(
-            self._staff_list, 
-            self._schedule_templates, 
+            self._staff_list,
+            self._schedule_templates,
             self._schedule_id
         )
-        
+
         self.save_schedule(new_shifts)
-        
+        if self._progress:
+            self._progress(len(new_shifts))
+
         return [s.get_json() for s in new_shifts]
 
     def save_schedule(self, shifts_to_save: list[Shift]):
         if shifts_to_save:
             db.session.add_all(shifts_to_save)
-            db.session.commit()
\ No newline at end of file
+            db.session.commit()
+
+    def bulk_save_schedule(self, shifts_to_save) -> list[dict]:
+        """Insert assignments as plain rows, bypassing the ORM unit of work.
+
+        Accepts ``Shift`` objects or row mappings. Returns the same JSON as
+        ``Shift.get_json`` without loading any ``Shift`` instances.
+        """
+        result = []
+        for batch in self.iter_schedule_batches(map(_shift_row, shifts_to_save)):
+            result.extend(batch)
+        return result
+
+    def stream_schedule(self, rows=None) -> dict:
+        """Run the strategy and persist its output in constant memory.
+
+        ``rows`` overrides the strategy, e.g. with precomputed assignments.
+        Nothing is kept once a batch is written, so the return value is only
+        a summary: ``{"count": shifts written, "batches": batches flushed}``.
+        """
+        count = batches = 0
+        for batch in self.iter_schedule_batches(rows, with_json=False):
+            count += len(batch)
+            batches += 1
+        return {"count": count, "batches": batches}
+
+    def iter_schedule_batches(self, rows=None, with_json: bool = True) -> Iterator[list]:
+        """Write assignments to the database ``chunk_size`` at a time.
+
+        ``rows`` defaults to the strategy's own assignment stream, so the
+        strategy only runs ahead of the database by one batch. Each batch
+        goes through a Core ``insert()`` executemany, with ids returned via
+        RETURNING when the backend supports it. Yields each batch's shift
+        JSON (or just its ids when ``with_json`` is false). All batches share
+        one transaction, committed after the last one and rolled back if
+        anything fails or the consumer stops early. The ``progress``
+        callback, if any, gets the running count of rows written.
+        """
+        rows = iter(self._iter_rows() if rows is None else rows)
+        written = 0
+        try:
+            while True:
+                chunk = list(islice(rows, self._chunk_size))
+                if not chunk:
+                    break
+                ids = self._insert_rows(chunk)
+                written += len(chunk)
+                if self._progress:
+                    self._progress(written)
+                yield self._rows_json(ids, chunk) if with_json else ids
+            db.session.commit()
+        except BaseException:
+            db.session.rollback()
+            raise
+
+    def _iter_rows(self) -> Iterator[dict]:
+        args = (self._staff_list, self._schedule_templates, self._schedule_id)
+        if hasattr(self._strategy, "iter_assignments"):
+            return self._strategy.iter_assignments(*args)
+        return map(_shift_row, self._strategy.generate(*args))
+
+    def _insert_rows(self, rows: list[dict]) -> list[int]:
+        table = Shift.__table__
+        if db.session.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+            stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+            return list(db.session.execute(stmt, rows).scalars())
+        return [db.session.execute(insert(table), row).inserted_primary_key[0] for row in rows]
+
+    def _rows_json(self, ids, rows) -> list[dict]:
+        names = self._staff_names({row["staff_id"] for row in rows})
+        return [
+            {
+                "id": shift_id,
+                "staff_id": row["staff_id"],
+                "staff_name": names.get(row["staff_id"]),
+                "schedule_id": row["schedule_id"],
+                "start_time": row["start_time"].isoformat(),
+                "end_time": row["end_time"].isoformat(),
+                "clock_in": None,
+                "clock_out": None
+            }
+            for shift_id, row in zip(ids, rows)
+        ]
+
+    def _staff_names(self, staff_ids) -> dict:
+        staff_ids = [sid for sid in staff_ids if sid is not None]
+        names = {}
+        for chunk in _chunks(staff_ids, self._chunk_size):
+            result = db.session.execute(db.select(User.id, User.username).where(User.id.in_(chunk)))
+            names.update(result.tuples().all())
+        return names
@@ -0,0 +1,91 @@
+from bisect import bisect_left
+from datetime import datetime
+from App.database import db
+
+
+class StaffAvailability:
+    """Per-staff busy intervals and hour totals for availability-aware runs.
+
+    Each staff member's busy time is a sorted list of disjoint intervals, so
+    an overlap check is one ``bisect`` (O(log n)). Overlapping rows loaded
+    from the database are merged on the way in; assignments made during a
+    run never overlap, so the lists stay disjoint.
+    """
+
+    def __init__(self, max_hours: float = None):
+        self.max_hours = max_hours
+        self._starts = {}
+        self._ends = {}
+        self._hours = {}
+
+    @classmethod
+    def load(cls, staff_ids, window_start: datetime, window_end: datetime, max_hours: float = None) -> "StaffAvailability":
+        """Build the index from existing shifts that overlap the window."""
+        from App.models.shift import Shift
+
+        availability = cls(max_hours)
+        staff_ids = list(staff_ids)
+        if not staff_ids:
+            return availability
+        query = (
+            db.select(Shift.staff_id, Shift.start_time, Shift.end_time)
+            .where(Shift.staff_id.isnot(None))
+            .where(Shift.start_time < window_end, Shift.end_time > window_start)
+            .order_by(Shift.staff_id, Shift.start_time)
+        )
+        wanted = set(staff_ids)
+        for staff_id, start, end in db.session.execute(query):
+            if staff_id in wanted:
+                availability._append(staff_id, start, end)
+        return availability
+
+    def _append(self, staff_id, start, end):
+        # rows arrive ordered by start, so only the last interval can overlap
+        starts = self._starts.setdefault(staff_id, [])
+        ends = self._ends.setdefault(staff_id, [])
+        if ends and start < ends[-1]:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+        self._hours[staff_id] = self._hours.get(staff_id, 0.0) + (end - start).total_seconds() / 3600
+
+    def hours(self, staff_id) -> float:
+        return self._hours.get(staff_id, 0.0)
+
+    def is_free(self, staff_id, start: datetime, end: datetime) -> bool:
+        starts = self._starts.get(staff_id)
+        if not starts:
+            return True
+        i = bisect_left(starts, end) - 1
+        return i < 0 or self._ends[staff_id][i] <= start
+
+    def can_take(self, staff_id, template) -> bool:
+        if self.max_hours is not None and self.hours(staff_id) + template.duration > self.max_hours:
+            return False
+        return self.is_free(staff_id, template.start_time, template.end_time)
+
+    def add(self, staff_id, template):
+        """Record an assignment already checked with ``can_take``."""
+        starts = self._starts.setdefault(staff_id, [])
+        i = bisect_left(starts, template.start_time)
+        starts.insert(i, template.start_time)
+        self._ends.setdefault(staff_id, []).insert(i, template.end_time)
+        self._hours[staff_id] = self.hours(staff_id) + template.duration
+
+    def remove(self, staff_id, template):
+        """Undo an ``add`` for the same template."""
+        starts = self._starts[staff_id]
+        i = bisect_left(starts, template.start_time)
+        if i == len(starts) or starts[i] != template.start_time or self._ends[staff_id][i] != template.end_time:
+            raise ValueError("Template is not assigned to this staff member")
+        del starts[i]
+        del self._ends[staff_id][i]
+        self._hours[staff_id] -= template.duration
+
+    def copy(self) -> "StaffAvailability":
+        clone = StaffAvailability(self.max_hours)
+        clone._starts = {sid: list(v) for sid, v in self._starts.items()}
+        clone._ends = {sid: list(v) for sid, v in self._ends.items()}
+        clone._hours = dict(self._hours)
+        return clone
@@ -0,0 +1,42 @@
+from App.database import db
+
+
+class BackgroundJob(db.Model):
+    """State of a job run on a worker's executor, readable from any worker.
+
+    ``active_key`` identifies what the job does (kind, schedule, options)
+    while it is queued or running and is cleared when it finishes. It is
+    unique, so two workers submitting the same run cannot both insert a
+    row; the loser returns the winner's job instead.
+    """
+    __tablename__ = "background_job"
+
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(32), nullable=False)
+    active_key = db.Column(db.String(255), nullable=True, unique=True)
+    params = db.Column(db.JSON, nullable=True)
+    status = db.Column(db.String(16), nullable=False)
+    progress = db.Column(db.JSON, nullable=True)
+    submitted_at = db.Column(db.DateTime, nullable=False, index=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    queue_seconds = db.Column(db.Float, nullable=True)
+    run_seconds = db.Column(db.Float, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    def get_json(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            **(self.params or {}),
+            "status": self.status,
+            "progress": self.progress,
+            "submitted_at": self.submitted_at.isoformat() if self.submitted_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "queue_seconds": self.queue_seconds,
+            "run_seconds": self.run_seconds,
+            "result": self.result,
+            "error": self.error,
+        }
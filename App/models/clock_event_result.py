@@ -0,0 +1,30 @@
+from App.database import db
+
+
+class ClockEventResult(db.Model):
+    """Outcome of a queued clock event, readable from any worker.
+
+    The queue that accepted an event answers for it while it waits in
+    memory; the outcome is written here in the flush transaction, so a
+    status lookup served by another worker still finds it. Rows older than
+    ``CLOCK_QUEUE_RESULT_TTL`` seconds are pruned by later flushes. An
+    applied event keeps the shift row as its UPDATE left it, so a later
+    clock-out does not show up in the clock-in's result.
+    """
+    __tablename__ = "clock_event_result"
+
+    sequence = db.Column(db.String(40), primary_key=True)
+    staff_id = db.Column(db.Integer, nullable=False)
+    shift_id = db.Column(db.Integer, nullable=True)
+    status = db.Column(db.String(16), nullable=False)
+    error = db.Column(db.String(255), nullable=True)
+    shift = db.Column(db.JSON, nullable=True)
+    recorded_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def get_json(self):
+        result = {"sequence": self.sequence, "staff_id": self.staff_id, "status": self.status}
+        if self.status == "applied":
+            result["shift"] = self.shift
+        else:
+            result["error"] = self.error
+        return result
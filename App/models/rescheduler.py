@@ -0,0 +1,205 @@
+import heapq
+from sqlalchemy import bindparam, func, update
+from App.database import db
+from App.models.staff import Staff
+from App.models.shift import Shift
+from App.models.assignment import AssignmentEngine
+from App.models.availability import StaffAvailability
+from App.models.shift_template import ShiftTemplate
+
+
+def _hours_expr(dialect_name):
+    if dialect_name == "sqlite":
+        return (func.julianday(Shift.end_time) - func.julianday(Shift.start_time)) * 24
+    if dialect_name == "postgresql":
+        return func.extract("epoch", Shift.end_time - Shift.start_time) / 3600
+    return None
+
+
+EPSILON = 1e-6
+
+
+class IncrementalRescheduler:
+    """Repairs one schedule after staff join or leave, without a full rerun.
+
+    Only shifts that have not been clocked into are moved, and only between
+    staff already on the schedule and the new hires. Departed staff's
+    shifts go to the least-loaded remaining staff (longest first), then
+    shifts are moved from the heaviest staff onto new hires while each move
+    still narrows the gap. Hour totals come from one aggregate query and
+    shift rows are only read for departed staff and chosen donors, so the
+    Python-side work and the writes grow with the delta, not the schedule.
+    """
+    DONORS_PER_STEP = 8
+
+    def __init__(self, schedule_id: int, added_ids=(), removed_ids=(), avoid_overlaps: bool = False, max_hours: float = None):
+        self.schedule_id = schedule_id
+        self.added_ids = list(dict.fromkeys(added_ids))
+        self.removed_ids = list(dict.fromkeys(removed_ids))
+        if set(self.added_ids) & set(self.removed_ids):
+            raise ValueError("A staff member cannot be both added and removed")
+        self.avoid_overlaps = avoid_overlaps
+        self.max_hours = max_hours
+
+    def apply(self) -> list[dict]:
+        """Plan the change set and write it in a single transaction."""
+        changes = self.plan()
+        if changes:
+            table = Shift.__table__
+            stmt = (
+                update(table)
+                .where(table.c.id == bindparam("shift_id"))
+                .values(staff_id=bindparam("to_staff_id"))
+            )
+            try:
+                db.session.connection().execute(stmt, [
+                    {"shift_id": c["shift_id"], "to_staff_id": c["to_staff_id"]} for c in changes
+                ])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        return changes
+
+    def plan(self) -> list[dict]:
+        """Work out which shifts move where, without writing anything."""
+        added = set(self.added_ids)
+        if added:
+            known = set(db.session.execute(db.select(Staff.id).where(Staff.id.in_(added))).scalars())
+            missing = added - known
+            if missing:
+                raise ValueError(f"Unknown staff ids: {sorted(missing)}")
+
+        # the pool is the schedule's current assignees plus the new hires;
+        # staff who work other schedules are never read
+        removed = set(self.removed_ids)
+        totals = dict(self._hour_totals())
+        staff_ids = sorted((totals.keys() | added) - removed)
+        if not staff_ids:
+            raise ValueError("No staff available for scheduling")
+
+        loads = {sid: totals.get(sid, 0.0) for sid in staff_ids}
+        availability = self._availability(staff_ids) if self.avoid_overlaps or self.max_hours is not None else None
+
+        changes = self._reassign_departed(loads, availability)
+        changes.extend(self._rebalance(loads, availability))
+        return changes
+
+    def _hour_totals(self):
+        hours = _hours_expr(db.session.get_bind().dialect.name)
+        if hours is not None:
+            query = (
+                db.select(Shift.staff_id, func.sum(hours))
+                .where(Shift.schedule_id == self.schedule_id, Shift.staff_id.isnot(None))
+                .group_by(Shift.staff_id)
+            )
+            # julianday arithmetic is not exact, so round away the float noise
+            return [(sid, round(float(total or 0.0), 6)) for sid, total in db.session.execute(query)]
+
+        totals = {}
+        query = db.select(Shift.staff_id, Shift.start_time, Shift.end_time).where(
+            Shift.schedule_id == self.schedule_id, Shift.staff_id.isnot(None)
+        )
+        for sid, start, end in db.session.execute(query):
+            totals[sid] = totals.get(sid, 0.0) + (end - start).total_seconds() / 3600
+        return list(totals.items())
+
+    def _availability(self, staff_ids):
+        window_start, window_end = db.session.execute(
+            db.select(func.min(Shift.start_time), func.max(Shift.end_time)).where(Shift.schedule_id == self.schedule_id)
+        ).one()
+        if window_start is None:
+            return StaffAvailability(self.max_hours)
+        return StaffAvailability.load(staff_ids, window_start, window_end, max_hours=self.max_hours)
+
+    def _open_shifts(self, staff_ids):
+        query = (
+            db.select(Shift.id, Shift.staff_id, Shift.start_time, Shift.end_time)
+            .where(Shift.schedule_id == self.schedule_id, Shift.staff_id.in_(staff_ids), Shift.clock_in.is_(None))
+            .order_by(Shift.start_time, Shift.id)
+        )
+        return [(sid, staff_id, ShiftTemplate.from_times(start, end)) for sid, staff_id, start, end in db.session.execute(query)]
+
+    def _reassign_departed(self, loads, availability):
+        if not self.removed_ids:
+            return []
+        departed = self._open_shifts(self.removed_ids)
+        departed.sort(key=lambda row: -row[2].duration)
+
+        engine = AssignmentEngine.from_loads(loads)
+        changes = []
+        for shift_id, from_id, template in departed:
+            accept = None
+            if availability is not None:
+                accept = lambda sid, t=template: availability.can_take(sid, t)
+            to_id = engine.assign(template.duration, accept)
+            if to_id is None:
+                raise ValueError(f"No available staff to take shift {shift_id}")
+            if availability is not None:
+                availability.add(to_id, template)
+            loads[to_id] += template.duration
+            changes.append({"shift_id": shift_id, "from_staff_id": from_id, "to_staff_id": to_id, "reason": "departed"})
+        return changes
+
+    def _rebalance(self, loads, availability):
+        added = [sid for sid in self.added_ids if sid in loads]
+        if not added:
+            return []
+        added_set = set(added)
+        receivers = [(loads[sid], sid) for sid in added]
+        donors = [(-load, sid) for sid, load in loads.items() if sid not in added_set]
+        heapq.heapify(receivers)
+        heapq.heapify(donors)
+        donor_shifts = {}
+        changes = []
+
+        while receivers and donors:
+            load, receiver = heapq.heappop(receivers)
+            if load != loads[receiver]:
+                continue  # stale entry
+            moved = None
+            tried = []
+            while donors and len(tried) < self.DONORS_PER_STEP:
+                neg_load, donor = heapq.heappop(donors)
+                if -neg_load != loads[donor]:
+                    continue
+                tried.append(donor)
+                gap = loads[donor] - loads[receiver]
+                if gap <= 0:
+                    break
+                moved = self._pick_move(donor, receiver, gap, donor_shifts, availability)
+                if moved is not None:
+                    break
+            for donor in tried:
+                heapq.heappush(donors, (-loads[donor], donor))
+            if moved is None:
+                break  # nobody can give this receiver a shift that narrows the gap
+
+            donor, shift_id, template = moved
+            loads[donor] -= template.duration
+            loads[receiver] += template.duration
+            if availability is not None:
+                availability.add(receiver, template)
+            heapq.heappush(donors, (-loads[donor], donor))
+            heapq.heappush(receivers, (loads[receiver], receiver))
+            changes.append({"shift_id": shift_id, "from_staff_id": donor, "to_staff_id": receiver, "reason": "rebalance"})
+        return changes
+
+    def _pick_move(self, donor, receiver, gap, donor_shifts, availability):
+        # a move of d hours narrows the donor/receiver gap only if d < gap;
+        # the best move is the one closest to gap / 2
+        if donor not in donor_shifts:
+            donor_shifts[donor] = [(sid, t) for sid, _, t in self._open_shifts([donor])]
+        best = None
+        for i, (shift_id, template) in enumerate(donor_shifts[donor]):
+            if not 0 < template.duration < gap - EPSILON:
+                continue
+            if availability is not None and not availability.can_take(receiver, template):
+                continue
+            score = abs(template.duration - gap / 2)
+            if best is None or score < best[0]:
+                best = (score, i)
+        if best is None:
+            return None
+        shift_id, template = donor_shifts[donor].pop(best[1])
+        return donor, shift_id, template
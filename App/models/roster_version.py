@@ -0,0 +1,48 @@
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from App.database import db
+from App.models.schedule import Schedule
+
+
+class RosterVersion(db.Model):
+    """Single-row counter bumped with every shift change, in any schedule.
+
+    Schedule.version is the per-schedule counterpart. Both are bumped in the
+    transaction that changes the shifts where the caller allows it, so a
+    listing's version can be checked with one primary-key read.
+    """
+    GLOBAL_ID = 1
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def current(cls) -> int:
+        return db.session.execute(db.select(cls.version).where(cls.id == cls.GLOBAL_ID)).scalar() or 0
+
+    @classmethod
+    def seed(cls):
+        """Create the global row if it is missing; ``create_db`` and the migration do this up front."""
+        if db.session.get(cls, cls.GLOBAL_ID) is not None:
+            return
+        try:
+            # another worker may insert it first; the savepoint keeps the
+            # caller's transaction usable when it does
+            with db.session.begin_nested():
+                db.session.add(cls(id=cls.GLOBAL_ID, version=0))
+        except IntegrityError:
+            pass
+
+    @classmethod
+    def bump(cls, *schedule_ids):
+        """Increment the global and the given schedules' versions; the caller commits."""
+        ids = sorted({sid for sid in schedule_ids if sid is not None})
+        if ids:
+            db.session.execute(
+                update(Schedule).where(Schedule.id.in_(ids)).values(version=Schedule.version + 1),
+                execution_options={"synchronize_session": False},
+            )
+        increment = update(cls).where(cls.id == cls.GLOBAL_ID).values(version=cls.version + 1)
+        if not db.session.execute(increment, execution_options={"synchronize_session": False}).rowcount:
+            cls.seed()
+            db.session.execute(increment, execution_options={"synchronize_session": False})
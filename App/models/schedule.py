@@ -1,4 +1,5 @@
 from datetime import datetime
+from sqlalchemy.orm import selectinload, undefer
 from App.database import db
 
 class Schedule(db.Model):
@@ -8,13 +9,30 @@ class Schedule(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     admin_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
     staff_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     shifts = db.relationship("Shift", backref="schedule", lazy=True)
 
+    @classmethod
+    def json_load_options(cls):
+        """Loader options covering everything get_json reads, shifts included."""
+        from App.models.shift import Shift
+        return [selectinload(cls.shifts).options(*Shift.json_load_options())]
+
+    @classmethod
+    def list_load_options(cls):
+        """Loader options for get_json(include_shifts=False): the count comes from the same query."""
+        return [undefer(cls.shift_total)]
+
     def shift_count(self):
-        return len(self.shifts)
+        # use the shifts if they are already loaded, otherwise count in SQL
+        if "shifts" in self.__dict__:
+            return len(self.shifts)
+        return self.shift_total
 
-    def get_json(self):
-        return {
+    def get_json(self, include_shifts=True):
+        # serialise the shifts first so shift_count can reuse them
+        shifts = [shift.get_json() for shift in self.shifts] if include_shifts else None
+        data = {
             "id": self.id,
             "name": self.name,
             "created_at": self.created_at.isoformat(),
@@ -22,6 +40,9 @@ class Schedule(db.Model):
             "admin_id": self.admin_id,
             "staff_id": self.staff_id,
             "shift_count": self.shift_count(),
-            "shifts": [shift.get_json() for shift in self.shifts]
+            "version": self.version,
         }
+        if include_shifts:
+            data["shifts"] = shifts
+        return data
 
@@ -1,6 +1,10 @@
 from datetime import datetime
+from sqlalchemy import func, update
+from sqlalchemy.orm import column_property, joinedload
 from App.database import db
+from App.models.user import User
 from App.models.staff import Staff
+from App.models.schedule import Schedule
 
 class Shift(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -12,6 +16,94 @@ class Shift(db.Model):
     clock_out = db.Column(db.DateTime, nullable=True)
     staff = db.relationship("Staff", backref="scheduled_shifts", foreign_keys=[staff_id])
 
+    # one index per access path: a staff member's roster in time order, a
+    # schedule's shifts per staff member, the (start_time, id) report/keyset
+    # order, and the unassigned templates Admin.auto_schedule looks up
+    __table_args__ = (
+        db.Index("ix_shift_staff_id_start_time", "staff_id", "start_time"),
+        db.Index("ix_shift_schedule_id_staff_id", "schedule_id", "staff_id"),
+        db.Index("ix_shift_start_time_id", "start_time", "id"),
+        db.Index(
+            "ix_shift_unassigned",
+            "schedule_id",
+            "start_time",
+            postgresql_where=db.text("staff_id IS NULL"),
+            sqlite_where=db.text("staff_id IS NULL"),
+        ),
+    )
+
+    # relationships read by get_json; queries whose rows get serialised
+    # should apply json_load_options() so these load with the shifts
+    json_relationships = ("staff",)
+
+    @classmethod
+    def json_load_options(cls):
+        return [joinedload(getattr(cls, name)) for name in cls.json_relationships]
+
+    CLOCK_EVENTS = ("clock_in", "clock_out")
+
+    @classmethod
+    def record_clock(cls, event: str, staff_id: int, shift_id: int, at: datetime):
+        """Set ``event`` on the staff member's shift with one conditional UPDATE.
+
+        The WHERE clause does the ownership and state checks (not already
+        clocked in/out, clocked in before clocking out). Returns the updated
+        row as a dict of column values plus ``staff_name`` (``row_json`` turns
+        it into get_json form), or None if nothing matched; ``clock_failure``
+        says why. The caller commits.
+        """
+        if event not in cls.CLOCK_EVENTS:
+            raise ValueError(f"Unknown clock event: {event}")
+        table = cls.__table__
+        conditions = [table.c.id == shift_id, table.c.staff_id == staff_id, table.c[event].is_(None)]
+        if event == "clock_out":
+            conditions.append(table.c.clock_in.isnot(None))
+        stmt = update(table).where(*conditions).values({event: at})
+
+        if not db.session.get_bind().dialect.update_returning:
+            if not db.session.execute(stmt).rowcount:
+                return None
+            return dict(db.session.execute(cls._row_select().where(table.c.id == shift_id)).mappings().one())
+
+        users = User.__table__
+        staff_name = db.select(users.c.username).where(users.c.id == table.c.staff_id).scalar_subquery()
+        row = db.session.execute(stmt.returning(*table.c, staff_name.label("staff_name"))).mappings().first()
+        return dict(row) if row is not None else None
+
+    @classmethod
+    def clock_failure(cls, event: str, staff_id: int, shift_id: int) -> str:
+        """Why ``record_clock`` matched nothing: missing, not_assigned, already or not_clocked_in."""
+        table = cls.__table__
+        row = db.session.execute(
+            db.select(table.c.staff_id, table.c.clock_in, table.c.clock_out).where(table.c.id == shift_id)
+        ).first()
+        if row is None:
+            return "missing"
+        if row.staff_id != staff_id:
+            return "not_assigned"
+        if event == "clock_out" and row.clock_in is None:
+            return "not_clocked_in"
+        return "already"
+
+    @classmethod
+    def _row_select(cls):
+        table, users = cls.__table__, User.__table__
+        return db.select(*table.c, users.c.username.label("staff_name")).outerjoin(users, users.c.id == table.c.staff_id)
+
+    @staticmethod
+    def row_json(row):
+        iso = lambda value: value.isoformat() if value else None
+        return {
+            "id": row["id"],
+            "staff_id": row["staff_id"],
+            "staff_name": row["staff_name"],
+            "schedule_id": row["schedule_id"],
+            "start_time": row["start_time"].isoformat(),
+            "end_time": row["end_time"].isoformat(),
+            "clock_in": iso(row["clock_in"]),
+            "clock_out": iso(row["clock_out"]),
+        }
+
     def get_json(self):
         return {
             "id": self.id,
@@ -22,4 +114,12 @@ class Shift(db.Model):
             "end_time": self.end_time.isoformat(),
             "clock_in": self.clock_in.isoformat() if self.clock_in else None,
             "clock_out": self.clock_out.isoformat() if self.clock_out else None
-        }
\ No newline at end of file
+        }
+
+
+# Schedule is mapped before Shift, so its count column is attached here; it is
+# deferred and only loaded by queries that undefer it (see list_load_options)
+Schedule.shift_total = column_property(
+    db.select(func.count(Shift.id)).where(Shift.schedule_id == Schedule.id).correlate_except(Shift).scalar_subquery(),
+    deferred=True,
+)
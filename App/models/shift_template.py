@@ -0,0 +1,89 @@
+from datetime import datetime
+from itertools import islice
+from typing import Iterator, NamedTuple
+import numpy as np
+
+TEMPLATE_BATCH_SIZE = 10000
+
+
+class ShiftTemplate(NamedTuple):
+    """Unassigned shift slot handed to the scheduling strategies.
+
+    A plain immutable tuple (``__slots__ = ()``, no ``__dict__``) so large
+    template batches stay compact and carry no SQLAlchemy instrumentation.
+    ``duration`` is the shift length in hours, computed once up front.
+    """
+    start_time: datetime
+    end_time: datetime
+    duration: float
+
+    @classmethod
+    def from_times(cls, start_time: datetime, end_time: datetime) -> "ShiftTemplate":
+        return cls(start_time, end_time, (end_time - start_time).total_seconds() / 3600)
+
+
+def calculate_duration_hours(start_time, end_time):
+    return float(template_durations([{"start_time": start_time, "end_time": end_time}])[0])
+
+def _template_times(template):
+    start = getattr(template, 'start_time', None) or template['start_time']
+    end = getattr(template, 'end_time', None) or template['end_time']
+    return start, end
+
+def _coerce_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+        except (TypeError, ValueError):
+            return None
+
+def _to_datetime64(values):
+    try:
+        return np.array(values, dtype='datetime64[us]')
+    except (TypeError, ValueError):
+        # mixed or unparseable input: coerce one by one, bad values become NaT
+        return np.array([_coerce_datetime(v) for v in values], dtype='datetime64[us]')
+
+def template_durations(schedule_templates) -> np.ndarray:
+    """Shift length in hours for every template, as one float64 array.
+
+    Accepts datetimes, ISO strings or ``%Y-%m-%d %H:%M:%S`` strings.
+    Templates whose times cannot be parsed get a duration of 0.0.
+    """
+    if not schedule_templates:
+        return np.zeros(0, dtype=np.float64)
+    starts, ends = zip(*(_template_times(t) for t in schedule_templates))
+    hours = (_to_datetime64(ends) - _to_datetime64(starts)) / np.timedelta64(1, 'h')
+    return np.nan_to_num(hours, nan=0.0)
+
+def iter_shift_templates(schedule_templates, batch_size=TEMPLATE_BATCH_SIZE) -> Iterator[ShiftTemplate]:
+    """Lazily normalise strategy input to ``ShiftTemplate``.
+
+    ``ShiftTemplate`` items pass through untouched. Dicts, ORM ``Shift`` rows
+    and other objects with ``start_time``/``end_time`` are converted
+    ``batch_size`` at a time, with durations from ``template_durations``, so
+    a generator of templates is never materialised in full.
+    """
+    iterator = iter(schedule_templates)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        if all(isinstance(t, ShiftTemplate) for t in batch):
+            yield from batch
+            continue
+        durations = template_durations(batch).tolist()
+        for template, duration in zip(batch, durations):
+            if isinstance(template, ShiftTemplate):
+                yield template
+                continue
+            start, end = _template_times(template)
+            yield ShiftTemplate(_coerce_datetime(start), _coerce_datetime(end), duration)
+
+def as_shift_templates(schedule_templates) -> list[ShiftTemplate]:
+    """List form of ``iter_shift_templates``."""
+    return list(iter_shift_templates(schedule_templates))
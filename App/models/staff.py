@@ -11,35 +11,28 @@ class Staff(User):
     def __init__(self, username, password):
         super().__init__(username, password, "staff")
 
-    def view_roster(self):
+    def view_roster(self, start=None, end=None):
         from App.models.shift import Shift
 
-        shifts = Shift.query.filter_by(staff_id=self.id).all()
-        return [s.get_json() for s in shifts]
+        query = Shift.query.options(*Shift.json_load_options()).filter_by(staff_id=self.id)
+        if start is not None:
+            query = query.filter(Shift.start_time >= start)
+        if end is not None:
+            query = query.filter(Shift.start_time < end)
+        return [s.get_json() for s in query.order_by(Shift.start_time, Shift.id).all()]
 
     def clock_in(self, shift_id: int):
-        from datetime import datetime
-        from App.models.shift import Shift
-        shift = db.session.get(Shift, shift_id)
-        if not shift:
-            raise ValueError("Shift not found")
-        if shift.staff_id != self.id:
-            raise PermissionError("Cannot clock in to a shift not assigned to this staff member")
-        shift.clock_in = datetime.utcnow()
-        db.session.commit()
-        return shift
+        return self._clock("clock_in", shift_id)
 
     def clock_out(self, shift_id: int):
-        from datetime import datetime
+        return self._clock("clock_out", shift_id)
+
+    def _clock(self, event, shift_id):
+        # the controller bumps the roster version and drops cached listings
+        from App.controllers.staff import record_clock_event
         from App.models.shift import Shift
-        shift = db.session.get(Shift, shift_id)
-        if not shift:
-            raise ValueError("Shift not found")
-        if shift.staff_id != self.id:
-            raise PermissionError("Cannot clock out of a shift not assigned to this staff member")
-        shift.clock_out = datetime.utcnow()
-        db.session.commit()
-        return shift
+        record_clock_event(self.id, shift_id, event, role=self.role)
+        return db.session.get(Shift, shift_id)
 
     # Provide `shifts` property mapping to shifts for this staff member
     @property
@@ -0,0 +1,49 @@
+import numpy as np
+from App.database import db
+from App.models.staff import Staff
+
+
+class StaffRoster:
+    """Scheduling input: staff ids, plus optional per-staff columns, as arrays.
+
+    Strategies only need ids, so loading a roster reads one narrow column
+    instead of hydrating full ``Staff`` objects (password hashes, tokens).
+    Extra attributes such as an hours cap ride along as parallel arrays in
+    ``columns`` and are looked up by position.
+    """
+
+    def __init__(self, ids, **columns):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.columns = {name: np.asarray(values) for name, values in columns.items()}
+        for name, values in self.columns.items():
+            if len(values) != len(self.ids):
+                raise ValueError(f"Column {name!r} has {len(values)} values for {len(self.ids)} staff")
+
+    @classmethod
+    def load(cls, *column_names) -> "StaffRoster":
+        """Read all staff ids (and any named ``Staff`` columns) in id order."""
+        staff_id = Staff.__table__.c.id
+        # Core rows, not ORM entities: nothing is added to the identity map
+        connection = db.session.connection()
+        if not column_names:
+            result = connection.execute(db.select(staff_id).order_by(staff_id))
+            return cls(np.fromiter(result.scalars(), dtype=np.int64))
+
+        # extra columns may live on the user table, so select through the mapper
+        columns = [getattr(Staff, name) for name in column_names]
+        rows = db.session.execute(db.select(Staff.id, *columns).order_by(Staff.id)).all()
+        values = list(zip(*rows)) or [[] for _ in range(len(columns) + 1)]
+        return cls(values[0], **dict(zip(column_names, values[1:])))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def id_list(self) -> list[int]:
+        return self.ids.tolist()
+
+
+def staff_ids_of(staff) -> list[int]:
+    """Ids from a ``StaffRoster`` or any iterable of objects with ``.id``."""
+    if isinstance(staff, StaffRoster):
+        return staff.id_list()
+    return [member.id for member in staff]
@@ -1,115 +1,285 @@
 import abc
+import time
 from datetime import datetime
+from typing import Iterable, Iterator
+import numpy as np
 from App.database import db
 from App.models.staff import Staff
 from App.models.shift import Shift 
+from App.models.assignment import AssignmentEngine
+from App.models.availability import StaffAvailability
+from App.models.staff_roster import staff_ids_of
+from App.models.shift_template import (
+    ShiftTemplate,
+    as_shift_templates,
+    iter_shift_templates,
+    calculate_duration_hours,
+    template_durations,
+)
 
-def calculate_duration_hours(start_time_str, end_time_str):
-    try:
-        start = datetime.strptime(start_time_str, '%Y-%m-%d %H:%M:%S')
-        end = datetime.strptime(end_time_str, '%Y-%m-%d %H:%M:%S')
-        duration = end - start
-        return duration.total_seconds() / 3600
-    except Exception:
-        return 0.0
+def _assignment(staff_id, schedule_id, template):
+    return {
+        "staff_id": staff_id,
+        "schedule_id": schedule_id,
+        "start_time": template.start_time,
+        "end_time": template.end_time,
+    }
 
 class ScheduleStrategy(abc.ABC):
+    """Assigns staff to unassigned shift templates.
+
+    ``schedule_templates`` should be an iterable of ``ShiftTemplate``;
+    anything else with ``start_time``/``end_time`` (dicts, ORM ``Shift``
+    rows) is converted in batches via ``iter_shift_templates``.
+
+    Subclasses implement ``iter_assignments``, which yields one plain row
+    mapping per assignment so callers can stream large schedules.
+    ``generate`` is the list API on top of it. ``staff_list`` may be a
+    ``StaffRoster`` or any sequence of objects with an ``id``.
+
+    When built with a ``StaffAvailability`` index, staff who already have an
+    overlapping shift or would go over its hours cap are skipped. Templates
+    nobody can take are collected in ``unfilled`` instead of being assigned.
+    """
+    def __init__(self, availability: StaffAvailability = None):
+        self.availability = availability
+        self.unfilled = []
+
     @abc.abstractmethod
-    def generate(self, staff_list: list[Staff], schedule_templates: list[dict], schedule_id: int) -> list[Shift]:
+    def iter_assignments(self, staff_list: list[Staff], schedule_templates: Iterable[ShiftTemplate], schedule_id: int) -> Iterator[dict]:
         pass
 
-class EvenDistribution(ScheduleStrategy):
-    def generate(self, staff_list, schedule_templates, schedule_id):
-        new_shifts = []
-        if not staff_list or not schedule_templates:
-            return new_shifts
+    def generate(self, staff_list: list[Staff], schedule_templates: list[ShiftTemplate], schedule_id: int) -> list[Shift]:
+        return [Shift(**row) for row in self.iter_assignments(staff_list, schedule_templates, schedule_id)]
+
+    def _accepts(self, template):
+        if self.availability is None:
+            return None
+        return lambda staff_id: self.availability.can_take(staff_id, template)
 
-        num_staff = len(staff_list)
+    def _claim(self, staff_id, schedule_id, template):
+        if staff_id is None:
+            self.unfilled.append(template)
+            return None
+        if self.availability is not None:
+            self.availability.add(staff_id, template)
+        return _assignment(staff_id, schedule_id, template)
 
-        for i, template in enumerate(schedule_templates):
-            staff_index = i % num_staff
-            staff_id = staff_list[staff_index].id
+class EvenDistribution(ScheduleStrategy):
+    def iter_assignments(self, staff_list, schedule_templates, schedule_id):
+        if not staff_list or not schedule_templates:
+            return
 
-            start = getattr(template, 'start_time', None) or template['start_time']
-            end = getattr(template, 'end_time', None) or template['end_time']
+        staff_ids = staff_ids_of(staff_list)
+        num_staff = len(staff_ids)
 
-            new_shifts.append(Shift(
-                staff_id=staff_id,
-                schedule_id=schedule_id,
-                start_time=start,
-                end_time=end,
-            ))
-        return new_shifts
+        for i, template in enumerate(iter_shift_templates(schedule_templates)):
+            accept = self._accepts(template)
+            staff_id = staff_ids[i % num_staff]
+            if accept is not None:
+                candidates = (staff_ids[(i + k) % num_staff] for k in range(num_staff))
+                staff_id = next((sid for sid in candidates if accept(sid)), None)
+            row = self._claim(staff_id, schedule_id, template)
+            if row is not None:
+                yield row
 
 class MinimalDays(ScheduleStrategy):
-    def generate(self, staff_list: list[Staff], schedule_templates: list[dict], schedule_id: int) -> list[Shift]:
-        new_shifts = []
+    def iter_assignments(self, staff_list: list[Staff], schedule_templates: Iterable[ShiftTemplate], schedule_id: int) -> Iterator[dict]:
         if not staff_list or not schedule_templates:
-            return new_shifts
-
-        staff_shift_counts = {staff.id: 0 for staff in staff_list}
-
-        for template in schedule_templates:
-            staff_id_to_assign = min(staff_shift_counts, key=staff_shift_counts.get)
-            
-            start = getattr(template, 'start_time', None) or template['start_time']
-            end = getattr(template, 'end_time', None) or template['end_time']
-            
-            new_shifts.append(Shift(
-                staff_id=staff_id_to_assign,
-                schedule_id=schedule_id,
-                start_time=start,
-                end_time=end
-            ))
-            
-            staff_shift_counts[staff_id_to_assign] += 1
-            
-        return new_shifts
+            return
+
+        engine = AssignmentEngine(staff_ids_of(staff_list))
+
+        for template in iter_shift_templates(schedule_templates):
+            row = self._claim(engine.assign(1, self._accepts(template)), schedule_id, template)
+            if row is not None:
+                yield row
 
 class BalancedShift(ScheduleStrategy):
-    def generate(self, staff_list: list[Staff], schedule_templates: list[dict], schedule_id: int) -> list[Shift]:
-        new_shifts = []
+    def iter_assignments(self, staff_list: list[Staff], schedule_templates: Iterable[ShiftTemplate], schedule_id: int) -> Iterator[dict]:
         if not staff_list or not schedule_templates:
             if not staff_list:
                 print("no staff")
             if not schedule_templates:
                 print("no templates")
                 
-            return new_shifts
-
-        staff_hour_totals = {staff.id: 0.0 for staff in staff_list}
-
-        for template in schedule_templates:
-            start = getattr(template, 'start_time', None) or template['start_time']
-            end = getattr(template, 'end_time', None) or template['end_time']
-            
-            duration = calculate_duration_hours(start, end) 
-            
-            staff_id_to_assign = min(staff_hour_totals, key=staff_hour_totals.get)
-            
-            new_shifts.append(Shift(
-                staff_id=staff_id_to_assign,
-                schedule_id=schedule_id,
-                start_time=start,
-                end_time=end
-            ))
-            
-            staff_hour_totals[staff_id_to_assign] += duration
-            
-        return new_shifts
+            return
+
+        engine = AssignmentEngine(staff_ids_of(staff_list), 0.0)
+
+        for template in iter_shift_templates(schedule_templates):
+            row = self._claim(engine.assign(template.duration, self._accepts(template)), schedule_id, template)
+            if row is not None:
+                yield row
+
+class OptimalAssignment(ScheduleStrategy):
+    """Balances hours across staff by local search from a greedy seed.
+
+    The cost of a roster is the sum of squared staff hours, which is lowest
+    when hours are spread evenly. The seed is a longest-processing-time
+    (LPT) greedy: templates are taken longest first and each goes to the
+    least-loaded available staff member. The seed is then improved with
+    cost-reducing moves and swaps between the heaviest and lightest staff
+    until no move helps or ``time_budget`` seconds pass. This is a
+    heuristic: the result is never worse than the seed but is not
+    guaranteed to be the minimum-cost roster.
+
+    The better of the LPT and BalancedShift greedy rosters is used as the
+    seed, so running out of budget never returns anything worse than either.
+    ``stats`` records which seed won, how many improvements were applied and
+    whether the budget ran out.
+    """
+    NEIGHBOURS = 8
+    CANDIDATES = 16
+
+    def __init__(self, availability: StaffAvailability = None, time_budget: float = 2.0):
+        super().__init__(availability)
+        self.time_budget = time_budget
+        self.stats = {}
+
+    def iter_assignments(self, staff_list: list[Staff], schedule_templates: Iterable[ShiftTemplate], schedule_id: int) -> Iterator[dict]:
+        if not staff_list or not schedule_templates:
+            return
+
+        deadline = time.perf_counter() + self.time_budget
+        templates = as_shift_templates(schedule_templates)
+        staff_ids = list(dict.fromkeys(staff_ids_of(staff_list)))
+        durations = np.fromiter((t.duration for t in templates), dtype=np.float64, count=len(templates))
+
+        seeds = (("longest_first", np.argsort(-durations, kind="stable")), ("balanced", range(len(templates))))
+        best = None
+        for name, order in seeds:
+            if best is not None and time.perf_counter() >= deadline:
+                break
+            seed = self._greedy(staff_ids, templates, order)
+            if best is None or seed[0] < best[0]:
+                best = seed + (name,)
+
+        _, staff_of, availability, seed_name = best
+        improvements, timed_out = self._improve(staff_ids, templates, durations, staff_of, availability, deadline)
+        if self.availability is not None:
+            self.availability = availability
+
+        loads = np.bincount(staff_of[staff_of >= 0], weights=durations[staff_of >= 0], minlength=len(staff_ids))
+        self.stats = {
+            "seed": seed_name,
+            "improvements": improvements,
+            "timed_out": timed_out,
+            "cost": float(np.dot(loads, loads)),
+            "spread": float(loads.max() - loads.min()),
+        }
+
+        for template, staff_index in zip(templates, staff_of.tolist()):
+            if staff_index < 0:
+                self.unfilled.append(template)
+            else:
+                yield _assignment(staff_ids[staff_index], schedule_id, template)
+
+    def _greedy(self, staff_ids, templates, order):
+        availability = self.availability.copy() if self.availability is not None else None
+        index_of = {sid: i for i, sid in enumerate(staff_ids)}
+        staff_of = np.full(len(templates), -1, dtype=np.int64)
+        loads = np.zeros(len(staff_ids))
+        engine = AssignmentEngine(staff_ids, 0.0)
+        for j in order:
+            template = templates[j]
+            accept = None
+            if availability is not None:
+                accept = lambda sid, t=template: availability.can_take(sid, t)
+            staff_id = engine.assign(template.duration, accept)
+            if staff_id is None:
+                continue
+            if availability is not None:
+                availability.add(staff_id, template)
+            staff_of[j] = index_of[staff_id]
+            loads[staff_of[j]] += template.duration
+        return float(np.dot(loads, loads)), staff_of, availability
+
+    def _improve(self, staff_ids, templates, durations, staff_of, availability, deadline):
+        loads = np.zeros(len(staff_ids))
+        buckets = [{} for _ in staff_ids]
+        for j, i in enumerate(staff_of.tolist()):
+            if i >= 0:
+                loads[i] += durations[j]
+                buckets[i].setdefault(durations[j], []).append(j)
+
+        improvements = 0
+        while True:
+            if time.perf_counter() >= deadline:
+                return improvements, True
+            order = np.argsort(loads, kind="stable")
+            light = order[:self.NEIGHBOURS].tolist()
+            heavy = order[::-1][:self.NEIGHBOURS].tolist()
+            if not any(
+                self._try_pair(p, q, staff_ids, templates, durations, staff_of, loads, buckets, availability)
+                for p in heavy for q in light if loads[p] > loads[q]
+            ):
+                return improvements, False
+            improvements += 1
+
+    def _try_pair(self, p, q, staff_ids, templates, durations, staff_of, loads, buckets, availability):
+        # moving d hours from p to q changes the cost by 2d(d - gap), a swap
+        # of d1 for d2 by 2δ(δ - gap) with δ = d1 - d2; both improve for
+        # 0 < d < gap and most when d is close to gap / 2
+        gap = loads[p] - loads[q]
+        options = []
+        for d1, js in buckets[p].items():
+            if js and 0 < d1 < gap:
+                options.append((2 * d1 * (d1 - gap), d1, None))
+            for d2, ks in buckets[q].items():
+                delta = d1 - d2
+                if js and ks and 0 < delta < gap:
+                    options.append((2 * delta * (delta - gap), d1, d2))
+        for _, d1, d2 in sorted(options, key=lambda o: o[0]):
+            if self._apply(p, q, d1, d2, staff_ids, templates, staff_of, loads, buckets, availability):
+                return True
+        return False
+
+    def _apply(self, p, q, d1, d2, staff_ids, templates, staff_of, loads, buckets, availability):
+        sp, sq = staff_ids[p], staff_ids[q]
+        for a in buckets[p][d1][-self.CANDIDATES:]:
+            for b in ([None] if d2 is None else buckets[q][d2][-self.CANDIDATES:]):
+                if availability is not None:
+                    availability.remove(sp, templates[a])
+                    if b is not None:
+                        availability.remove(sq, templates[b])
+                    ok = availability.can_take(sq, templates[a]) and (b is None or availability.can_take(sp, templates[b]))
+                    if not ok:
+                        availability.add(sp, templates[a])
+                        if b is not None:
+                            availability.add(sq, templates[b])
+                        continue
+                    availability.add(sq, templates[a])
+                    if b is not None:
+                        availability.add(sp, templates[b])
+                buckets[p][d1].remove(a)
+                buckets[q].setdefault(d1, []).append(a)
+                staff_of[a] = q
+                loads[p] -= d1
+                loads[q] += d1
+                if b is not None:
+                    buckets[q][d2].remove(b)
+                    buckets[p].setdefault(d2, []).append(b)
+                    staff_of[b] = p
+                    loads[q] -= d2
+                    loads[p] += d2
+                return True
+        return False
+
 class ScheduleStrategyFactory:
     STRATEGY_MAP = {
         'even': EvenDistribution,
         'minimal': MinimalDays,
-        'balanced': BalancedShift
+        'balanced': BalancedShift,
+        'optimal': OptimalAssignment
     }
 
     @staticmethod
-    def create_strategy(method_type: str) -> ScheduleStrategy:
+    def create_strategy(method_type: str, **options) -> ScheduleStrategy:
         method_type = method_type.lower().strip()
         strategy_class = ScheduleStrategyFactory.STRATEGY_MAP.get(method_type)
         
         if not strategy_class:
             raise ValueError(f"Invalid scheduling method type: {method_type}. Must be one of {list(ScheduleStrategyFactory.STRATEGY_MAP.keys())}")
         
-        return strategy_class()
\ No newline at end of file
+        return strategy_class(**options)
\ No newline at end of file
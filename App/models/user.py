@@ -1,13 +1,18 @@
-from werkzeug.security import check_password_hash, generate_password_hash
+from flask import current_app, has_app_context
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
 from App.database import db
 from datetime import datetime
 
+DEFAULT_PASSWORD_HASH_METHOD = "scrypt:32768:8:1"
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(20), nullable=False, unique=True)
     password = db.Column(db.String(256), nullable=False)
     role = db.Column(db.String(10), nullable=False)
     active_token = db.Column(db.String, nullable=True)
+    # bumped on logout; tokens carry it as the "ver" claim and older ones stop working
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     __mapper_args__ = {
         "polymorphic_identity": "user",
@@ -26,9 +31,40 @@ class User(db.Model):
             'role': self.role
         }
 
-    def set_password(self, password):
-        self.password = generate_password_hash(password)
+    def set_password(self, password, method=None):
+        self.password = generate_password_hash(password, method=method or password_hash_method())
     
     def check_password(self, password):
         return check_password_hash(self.password, password)
-    
\ No newline at end of file
+
+    def password_needs_rehash(self, method=None):
+        """True when the stored hash was made with other KDF settings than ``method``."""
+        return self.password.split("$", 1)[0] != hash_spec(method or password_hash_method())
+
+
+def password_hash_method():
+    """The configured ``PASSWORD_HASH_METHOD``, in werkzeug's ``name:param:...`` form."""
+    if has_app_context():
+        return current_app.config.get("PASSWORD_HASH_METHOD", DEFAULT_PASSWORD_HASH_METHOD)
+    return DEFAULT_PASSWORD_HASH_METHOD
+
+
+def hash_spec(method):
+    """``method`` with werkzeug's defaults filled in, as it appears before the first ``$`` of a hash."""
+    name, *params = method.split(":")
+    if name == "scrypt":
+        defaults = ["32768", "8", "1"]
+    elif name == "pbkdf2":
+        defaults = ["sha256", str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        return method
+    return ":".join([name, *params, *defaults[len(params):]])
+
+
+def hash_passwords(passwords, method=DEFAULT_PASSWORD_HASH_METHOD):
+    """Hash a batch of passwords the way ``User.set_password`` does.
+
+    Module-level so it can run in a worker process, which has no app
+    config; pass the method from ``password_hash_method()``.
+    """
+    return [generate_password_hash(password, method=method) for password in passwords]
@@ -1,18 +1,29 @@
+import io
+import os
+import re
 import pytest
 from datetime import datetime, timedelta
 import time
 
 from App.main import create_app
 from App.database import create_db, db
-from App.controllers.user import create_user, get_user, update_user, get_all_users_json
+from App.controllers.user import create_user, get_user, get_user_by_username, update_user, get_all_users_json
 from App.controllers.admin import schedule_shift, get_shift_report
 from App.controllers.staff import get_combined_roster, clock_in, clock_out, get_shift
 from App.controllers.auth import loginCLI
-from App.controllers.admin import auto_schedule # Import for integration tests
+from App.controllers.admin import auto_schedule, auto_schedule_batch, reschedule_staff_delta # Import for integration tests
 
 from App.models import User, Admin, Staff, Schedule, Shift, strategy
 from App.models.auto_scheduler import AutoScheduler as ModelAutoScheduler
 from App.models.strategy import EvenDistribution as EvenDistributionStrategy, MinimalDays as MinimalDaysStrategy, BalancedShift as BalancedShiftStrategy
+from App.models.assignment import AssignmentEngine
+from App.models.availability import StaffAvailability
+from App.models.shift_template import ShiftTemplate, as_shift_templates
+from App.controllers.admin import generate_random_templates
+from App.controllers.admin import get_shift_report_page, stream_shift_report
+from App.controllers.staff import get_combined_roster_page, stream_combined_roster, roster_window, record_clock_event
+from App.controllers.cache import invalidate_listings
+from App.controllers.auth import invalidate_identity
 
 # --- FIXTURES ---
 
@@ -38,6 +49,10 @@ def db_cleaner_for_function(app_context_setup):
     db.drop_all()
     create_db()
     db.session.commit()
+    # the tables were rebuilt under the caches and ids start over, so
+    # nothing cached is current
+    invalidate_listings()
+    invalidate_identity()
     yield
     # No further teardown needed as the next function run will clean it up
 
@@ -190,6 +205,81 @@ def test_scheduling_strategies_and_factory():
     assert len(assigned3) == 2
 
 
+def test_assignment_engine_matches_linear_scan():
+    # heap-backed engine must pick the same staff as the old min() scan
+    staff_ids = [3, 1, 4, 2, 5]
+    weights = [8, 4, 4, 6, 8, 2, 4, 8, 6, 6, 4, 8]
+
+    totals = {sid: 0 for sid in sorted(staff_ids)}
+    expected = []
+    for w in weights:
+        sid = min(totals, key=totals.get)
+        expected.append(sid)
+        totals[sid] += w
+
+    engine = AssignmentEngine(staff_ids)
+    assert [engine.assign(w) for w in weights] == expected
+    assert engine.loads() == totals
+
+
+def test_assignment_engine_ties_and_empty():
+    engine = AssignmentEngine([2, 1, 2])
+    assert len(engine) == 2
+    assert [engine.assign() for _ in range(4)] == [1, 2, 1, 2]
+
+    with pytest.raises(ValueError):
+        AssignmentEngine([]).assign()
+
+
+def test_template_durations_accepts_mixed_inputs():
+    base = datetime(2025, 1, 6, 9, 0)
+    templates = [
+        {"start_time": base, "end_time": base + timedelta(hours=8)},
+        {"start_time": "2025-01-06T09:00:00", "end_time": "2025-01-06T13:30:00"},
+        {"start_time": "2025-01-06 22:00:00", "end_time": "2025-01-07 04:00:00"},
+        {"start_time": "not a time", "end_time": "2025-01-06 04:00:00"},
+    ]
+    hours = strategy.template_durations(templates)
+    assert hours.tolist() == [8.0, 4.5, 6.0, 0.0]
+    assert strategy.calculate_duration_hours(base, base + timedelta(hours=2)) == 2.0
+    assert len(strategy.template_durations([])) == 0
+
+
+def test_shift_template_is_compact_and_immutable():
+    base = datetime(2025, 1, 6, 9, 0)
+    t = ShiftTemplate.from_times(base, base + timedelta(hours=7, minutes=30))
+    assert t.duration == 7.5
+    assert not hasattr(t, "__dict__")
+    with pytest.raises(AttributeError):
+        t.start_time = base
+
+    orm = Shift(staff_id=None, schedule_id=1, start_time=base, end_time=base + timedelta(hours=4))
+    converted = as_shift_templates([{"start_time": "2025-01-06 09:00:00", "end_time": "2025-01-06T17:00:00"}, orm, t])
+    assert converted == [
+        ShiftTemplate(base, base + timedelta(hours=8), 8.0),
+        ShiftTemplate(base, base + timedelta(hours=4), 4.0),
+        t,
+    ]
+
+    randoms = generate_random_templates(1, 5)
+    assert len(randoms) == 5
+    assert all(isinstance(r, ShiftTemplate) and 4 <= r.duration <= 8 for r in randoms)
+
+
+def test_balanced_strategy_balances_hours_for_datetime_templates():
+    base = datetime(2025, 1, 6, 6, 0)
+    lengths = [8, 4, 4, 6, 6]
+    templates = [{"start_time": base, "end_time": base + timedelta(hours=h)} for h in lengths]
+    staff_list = [Staff("h1", "p"), Staff("h2", "p")]
+    staff_list[0].id, staff_list[1].id = 1, 2
+
+    assigned = BalancedShiftStrategy().generate(staff_list, templates, 1)
+    totals = {1: 0, 2: 0}
+    for shift, h in zip(assigned, lengths):
+        totals[shift.staff_id] += h
+    assert totals == {1: 14, 2: 14}
+
+
 def test_models_autoscheduler_calls_strategy():
     # ensure ModelAutoScheduler delegates to provided strategy
     class DummyStrategy:
@@ -207,6 +297,253 @@ def test_models_autoscheduler_calls_strategy():
     assert result == []
 
 
+def test_autoscheduler_bulk_mode_matches_orm_json():
+    admin = create_user("bulk_admin", "p", "admin")
+    staff_list = [create_user(f"bulk{i}", "p", "staff") for i in range(3)]
+    schedule = Schedule(name="Bulk", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+
+    base = datetime(2025, 1, 6, 9, 0)
+    templates = [{"start_time": base + timedelta(days=i), "end_time": base + timedelta(days=i, hours=8)} for i in range(5)]
+
+    scheduler = ModelAutoScheduler(EvenDistributionStrategy(), staff_list, templates, schedule.id, bulk=True, chunk_size=2)
+    result = scheduler.generate_schedule()
+
+    assert len(result) == 5
+    saved = Shift.query.filter_by(schedule_id=schedule.id).order_by(Shift.id).all()
+    assert result == [s.get_json() for s in saved]
+    assert [r["staff_name"] for r in result[:3]] == ["bulk0", "bulk1", "bulk2"]
+
+    with pytest.raises(ValueError):
+        ModelAutoScheduler(EvenDistributionStrategy(), staff_list, templates, schedule.id, bulk=True, chunk_size=0)
+
+
+def test_strategies_stream_assignments_lazily():
+    base = datetime(2025, 1, 6, 9, 0)
+    produced = []
+
+    def templates():
+        for i in range(4):
+            produced.append(i)
+            yield ShiftTemplate.from_times(base + timedelta(days=i), base + timedelta(days=i, hours=8))
+
+    staff_list = [Staff("s1", "p"), Staff("s2", "p")]
+    staff_list[0].id, staff_list[1].id = 1, 2
+
+    stream = MinimalDaysStrategy().iter_assignments(staff_list, templates(), 7)
+    first = next(stream)
+    assert first == {"staff_id": 1, "schedule_id": 7, "start_time": base, "end_time": base + timedelta(hours=8)}
+    assert len(produced) == 4  # one conversion batch pulled, nothing assigned ahead
+    assert [row["staff_id"] for row in stream] == [2, 1, 2]
+
+    # list API is a thin wrapper over the stream
+    shifts = EvenDistributionStrategy().generate(staff_list, list(templates()), 7)
+    assert [type(s) for s in shifts] == [Shift] * 4
+
+
+def test_autoscheduler_stream_schedule_flushes_batches():
+    admin = create_user("stream_admin", "p", "admin")
+    staff_list = [create_user(f"stream{i}", "p", "staff") for i in range(3)]
+    schedule = Schedule(name="Stream", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+
+    base = datetime(2025, 1, 6, 9, 0)
+    templates = (ShiftTemplate.from_times(base + timedelta(hours=i), base + timedelta(hours=i + 4)) for i in range(10))
+
+    scheduler = ModelAutoScheduler(BalancedShiftStrategy(), staff_list, templates, schedule.id, chunk_size=4)
+    assert scheduler.stream_schedule() == {"count": 10, "batches": 3}
+    assert Shift.query.filter_by(schedule_id=schedule.id).count() == 10
+
+    # abandoning the stream part way rolls back every batch written so far
+    templates = [ShiftTemplate.from_times(base, base + timedelta(hours=4))] * 10
+    batches = ModelAutoScheduler(EvenDistributionStrategy(), staff_list, templates, schedule.id, chunk_size=4).iter_schedule_batches()
+    assert len(next(batches)) == 4
+    batches.close()
+    assert Shift.query.filter_by(schedule_id=schedule.id).count() == 10
+
+
+def test_staff_availability_overlaps_and_hours_cap():
+    base = datetime(2025, 1, 6, 0, 0)
+    t = lambda h, length: ShiftTemplate.from_times(base + timedelta(hours=h), base + timedelta(hours=h + length))
+
+    avail = StaffAvailability(max_hours=12)
+    avail.add(1, t(9, 4))
+    avail.add(1, t(0, 2))
+    assert avail.is_free(1, base + timedelta(hours=13), base + timedelta(hours=14))  # touching is fine
+    assert avail.is_free(1, base + timedelta(hours=2), base + timedelta(hours=9))
+    assert not avail.is_free(1, base + timedelta(hours=12), base + timedelta(hours=15))
+    assert not avail.is_free(1, base + timedelta(hours=1), base + timedelta(hours=10))
+    assert avail.can_take(1, t(14, 6))
+    assert not avail.can_take(1, t(14, 7))  # 6h booked + 7h > 12h cap
+    assert avail.can_take(2, t(9, 4))
+
+
+def test_strategies_skip_busy_staff_with_availability():
+    admin = create_user("av_admin", "p", "admin")
+    busy = create_user("av_busy", "p", "staff")
+    free = create_user("av_free", "p", "staff")
+    schedule = Schedule(name="Avail", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+
+    base = datetime(2025, 1, 6, 9, 0)
+    # two overlapping legacy rows for the busy staff member get merged on load
+    db.session.add_all([
+        Shift(staff_id=busy.id, schedule_id=schedule.id, start_time=base, end_time=base + timedelta(hours=6)),
+        Shift(staff_id=busy.id, schedule_id=schedule.id, start_time=base + timedelta(hours=2), end_time=base + timedelta(hours=8)),
+    ])
+    db.session.commit()
+
+    templates = [ShiftTemplate.from_times(base + timedelta(hours=h), base + timedelta(hours=h + 4)) for h in (0, 1, 8)]
+    for cls in (EvenDistributionStrategy, MinimalDaysStrategy, BalancedShiftStrategy):
+        avail = StaffAvailability.load([busy.id, free.id], base, base + timedelta(hours=12))
+        strat = cls(availability=avail)
+        rows = list(strat.iter_assignments([busy, free], templates, schedule.id))
+        assert [r["staff_id"] for r in rows] == [free.id, busy.id]
+        assert strat.unfilled == [templates[1]]
+
+
+def test_optimal_strategy_beats_greedy_and_respects_budget():
+    import random
+    rng = random.Random(3)
+    base = datetime(2025, 1, 6, 6, 0)
+    templates = [
+        ShiftTemplate.from_times(base, base + timedelta(hours=rng.choice([3.5, 4, 5, 6, 8])))
+        for _ in range(60)
+    ]
+    staff_list = [Staff(f"o{i}", "p") for i in range(7)]
+    for i, s in enumerate(staff_list):
+        s.id = i + 1
+
+    def spread(rows):
+        loads = {s.id: 0.0 for s in staff_list}
+        for r in rows:
+            loads[r["staff_id"]] += (r["end_time"] - r["start_time"]).total_seconds() / 3600
+        return max(loads.values()) - min(loads.values())
+
+    greedy = list(BalancedShiftStrategy().iter_assignments(staff_list, templates, 1))
+    optimal = strategy.ScheduleStrategyFactory.create_strategy("optimal", time_budget=5)
+    rows = list(optimal.iter_assignments(staff_list, templates, 1))
+    assert len(rows) == len(templates)
+    assert spread(rows) <= spread(greedy)
+    assert optimal.stats["timed_out"] is False
+
+    # with no budget left the best greedy seed comes back unchanged
+    rushed = strategy.OptimalAssignment(time_budget=0)
+    fallback = list(rushed.iter_assignments(staff_list, templates, 1))
+    assert rushed.stats["timed_out"] is True and rushed.stats["improvements"] == 0
+    assert len(fallback) == len(templates)
+
+
+def count_queries(fn):
+    """Run ``fn`` against a cold session and return how many statements it issued."""
+    from sqlalchemy import event
+
+    db.session.expunge_all()
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    return len(statements)
+
+
+def test_shift_serialization_query_count_is_constant():
+    admin = create_user("nplus_admin", "adminpass", "admin")
+    schedule = Schedule(name="N+1", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    admin_id, schedule_id = admin.id, schedule.id
+    start = datetime(2025, 1, 6, 9)
+
+    def add_staff(count):
+        for i in range(count):
+            member = create_user(f"nplus_{Staff.query.count()}", "pass", "staff")
+            db.session.add(Shift(staff_id=member.id, schedule_id=schedule_id,
+                                 start_time=start + timedelta(days=i), end_time=start + timedelta(days=i, hours=8)))
+        db.session.commit()
+        invalidate_listings()  # rows added directly, so drop cached listings ourselves
+        return member.id
+
+    endpoints = {
+        "report": lambda: get_shift_report(admin_id),
+        "roster": lambda: get_combined_roster(staff_id),
+        "view_roster": lambda: db.session.get(Staff, staff_id).view_roster(),
+        "schedule": lambda: db.session.get(Schedule, schedule_id, options=Schedule.json_load_options()).get_json(),
+    }
+    staff_id = add_staff(2)
+    small = {name: count_queries(fn) for name, fn in endpoints.items()}
+    add_staff(20)
+    large = {name: count_queries(fn) for name, fn in endpoints.items()}
+
+    assert large == small
+    assert all(n <= 3 for n in large.values()), large
+
+
+def test_shift_access_paths_use_indexes():
+    from sqlalchemy import text
+
+    def plan(sql):
+        return " ".join(row[-1] for row in db.session.execute(text("EXPLAIN QUERY PLAN " + sql)))
+
+    assert "ix_shift_staff_id_start_time" in plan("SELECT * FROM shift WHERE staff_id = 1 ORDER BY start_time")
+    assert "ix_shift_start_time_id" in plan("SELECT * FROM shift ORDER BY start_time, id LIMIT 10")
+    assert "SCAN shift" not in plan("SELECT * FROM shift WHERE schedule_id = 1 AND staff_id IS NULL")
+
+
+def test_schedule_list_mode_counts_shifts_in_one_query():
+    admin = create_user("count_admin", "adminpass", "admin")
+    staff = create_user("count_staff", "pass", "staff")
+    schedules = [Schedule(name=f"Week {i}", created_by=admin.id) for i in range(3)]
+    db.session.add_all(schedules)
+    db.session.commit()
+    start = datetime(2025, 1, 6, 9)
+    for i, schedule in enumerate(schedules):
+        for _ in range(i * 2):
+            db.session.add(Shift(staff_id=staff.id, schedule_id=schedule.id, start_time=start, end_time=start + timedelta(hours=8)))
+    db.session.commit()
+    last_id = schedules[-1].id
+
+    listed = []
+    queries = count_queries(lambda: listed.extend(
+        s.get_json(include_shifts=False) for s in Schedule.query.options(*Schedule.list_load_options()).all()
+    ))
+    assert queries == 1
+    assert [s["shift_count"] for s in listed] == [0, 2, 4]
+    assert all("shifts" not in s for s in listed)
+
+    full = db.session.get(Schedule, last_id).get_json()
+    assert full["shift_count"] == len(full["shifts"]) == 4
+
+
+def test_staff_roster_loads_ids_and_feeds_strategies():
+    from App.models import StaffRoster
+
+    create_user("roster_admin", "adminpass", "admin")
+    ids = [create_user(f"roster_staff{i}", "pass", "staff").id for i in range(3)]
+
+    db.session.expunge_all()
+    roster = StaffRoster.load()
+    assert roster.id_list() == ids and len(roster) == 3
+    assert roster.ids.dtype.kind == "i"
+    assert len(db.session.identity_map) == 0  # nothing hydrated
+
+    named = StaffRoster.load("username")
+    assert named.columns["username"].tolist() == ["roster_staff0", "roster_staff1", "roster_staff2"]
+    with pytest.raises(ValueError):
+        StaffRoster([1, 2], max_hours=[8.0])
+
+    templates = [ShiftTemplate.from_times(datetime(2025, 1, 6, 9 + i), datetime(2025, 1, 6, 10 + i)) for i in range(6)]
+    for strategy_cls in (EvenDistributionStrategy, MinimalDaysStrategy, BalancedShiftStrategy, strategy.OptimalAssignment):
+        rows = list(strategy_cls().iter_assignments(roster, templates, 1))
+        assert sorted(r["staff_id"] for r in rows) == sorted(ids * 2)
+    assert list(EvenDistributionStrategy().iter_assignments(StaffRoster([]), templates, 1)) == []
+
+
 # --- INTEGRATION TESTS (Focus on controller interactions and persistence) ---
 
 def test_user_authentication():
@@ -353,4 +690,854 @@ def test_admin_generate_auto_schedule_integration():
     # Test failure case (non-existent schedule)
     res = auto_schedule(99999, 'even')
     if isinstance(res, dict):
-        assert res.get('status') == 'error'
\ No newline at end of file
+        assert res.get('status') == 'error'
+
+def test_auto_schedule_with_availability_integration():
+    admin = create_user("avail_admin", "adminpass", "admin")
+    staff = [create_user(f"avail_staff{i}", "pass", "staff") for i in range(3)]
+
+    schedule = Schedule(name="AvailSchedule", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+
+    res = auto_schedule(schedule.id, 'minimal', avoid_overlaps=True, max_hours=8)
+    assert res["status"] == "success"
+    assert len(res["data"]) + len(res["unfilled"]) == 3
+
+    # no staff member ends up with overlapping shifts or more than 8 hours
+    by_staff = {}
+    for s in res["data"]:
+        by_staff.setdefault(s["staff_id"], []).append((s["start_time"], s["end_time"]))
+    for intervals in by_staff.values():
+        intervals.sort()
+        assert all(a[1] <= b[0] for a, b in zip(intervals, intervals[1:]))
+        hours = sum((datetime.fromisoformat(e) - datetime.fromisoformat(b)).total_seconds() / 3600 for b, e in intervals)
+        assert hours <= 8
+
+    # the flag must be a JSON boolean; "false" is not quietly read as true
+    from flask import current_app
+    from flask_jwt_extended import create_access_token
+    client = current_app.test_client()
+    headers = {"Authorization": f"Bearer {create_access_token(identity=str(admin.id))}"}
+    for path in ("/api/admin/autoSchedule", "/api/admin/autoScheduleBatch", "/api/admin/reschedule"):
+        body = {"scheduleID": schedule.id, "scheduleIDs": [schedule.id], "methodType": "minimal", "avoidOverlaps": "false"}
+        response = client.post(path, json=body, headers=headers)
+        assert response.status_code == 400 and response.get_json()["error"] == "avoidOverlaps must be true or false"
+
+
+
+def test_auto_schedule_batch_integration():
+    admin = create_user("batch_admin", "adminpass", "admin")
+    for i in range(3):
+        create_user(f"batch_staff{i}", "pass", "staff")
+
+    schedules = [Schedule(name=f"Batch{i}", created_by=admin.id) for i in range(2)]
+    db.session.add_all(schedules)
+    db.session.commit()
+
+    ids = [schedules[0].id, 99999, schedules[1].id]
+    res = auto_schedule_batch(admin.id, ids, "balanced", max_workers=2)
+
+    assert res["status"] == "success"
+    assert [r["schedule_id"] for r in res["results"]] == ids
+    assert res["failed"] == 1
+    assert res["results"][1]["message"] == "Schedule not found"
+    for r in (res["results"][0], res["results"][2]):
+        assert r["status"] == "success" and r["count"] == 3
+        assert r["compute_seconds"] >= 0 and r["save_seconds"] >= 0
+        assert Shift.query.filter_by(schedule_id=r["schedule_id"]).count() == 3
+
+    assert auto_schedule_batch(admin.id, ids, "bogus")["status"] == "error"
+
+    # with availability options each schedule sees the shifts handed out before it
+    more = [Schedule(name=f"BatchAvail{i}", created_by=admin.id) for i in range(4)]
+    db.session.add_all(more)
+    db.session.commit()
+    Shift.query.delete()
+    db.session.commit()
+    res = auto_schedule_batch(admin.id, [s.id for s in more], "balanced", avoid_overlaps=True, max_hours=8, role="admin")
+    assert res["failed"] == 0
+    by_staff = {}
+    for s in Shift.query.filter(Shift.schedule_id.in_([s.id for s in more])).all():
+        by_staff.setdefault(s.staff_id, []).append((s.start_time, s.end_time))
+    for intervals in by_staff.values():
+        intervals.sort()
+        assert all(a[1] <= b[0] for a, b in zip(intervals, intervals[1:]))
+        assert sum((e - b).total_seconds() / 3600 for b, e in intervals) <= 8
+    assert sum(r["unfilled"] for r in res["results"]) > 0  # 12 shifts of 4h+ cannot fit in 3 x 8h
+
+    with pytest.raises(PermissionError):
+        auto_schedule_batch(get_user_by_username("batch_staff0").id, ids, "balanced")
+
+    # maxWorkers must be a positive integer and is capped at the core count
+    from flask import current_app
+    from flask_jwt_extended import create_access_token
+    from App.views.params import worker_count
+    client = current_app.test_client()
+    headers = {"Authorization": f"Bearer {create_access_token(identity=str(admin.id))}"}
+    for bad in ("many", 0, -2, 1.5, True):
+        response = client.post("/api/admin/autoScheduleBatch", json={"scheduleIDs": ids, "methodType": "balanced", "maxWorkers": bad}, headers=headers)
+        assert response.status_code == 400 and response.get_json()["error"] == "maxWorkers must be a positive integer"
+    assert worker_count({"maxWorkers": "1"}, "maxWorkers") == 1
+    assert worker_count({"maxWorkers": 10 ** 6}, "maxWorkers") == (os.cpu_count() or 1)
+    assert worker_count({}, "maxWorkers") is None
+    staff_token = create_access_token(identity=str(get_user_by_username("batch_staff0").id), additional_claims={"role": "staff"})
+    response = client.post("/api/admin/autoScheduleBatch", json={"scheduleIDs": ids, "methodType": "balanced"},
+                           headers={"Authorization": f"Bearer {staff_token}"})
+    assert response.status_code == 403
+
+
+
+def test_reschedule_staff_delta_integration():
+    admin = create_user("delta_admin", "adminpass", "admin")
+    leaver = create_user("delta_leaver", "pass", "staff")
+    stayer = create_user("delta_stayer", "pass", "staff")
+    schedule = Schedule(name="Delta", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+
+    base = datetime(2025, 1, 6, 9, 0)
+    shifts = []
+    for day in range(4):
+        for person in (leaver, stayer):
+            shifts.append(Shift(staff_id=person.id, schedule_id=schedule.id,
+                                start_time=base + timedelta(days=day), end_time=base + timedelta(days=day, hours=8)))
+    shifts[0].clock_in = base  # history stays with the leaver
+    db.session.add_all(shifts)
+    db.session.commit()
+
+    hire = create_user("delta_hire", "pass", "staff")
+    create_user("delta_bystander", "pass", "staff")  # not on this schedule, so never a candidate
+    res = reschedule_staff_delta(admin.id, schedule.id, added_ids=[hire.id], removed_ids=[leaver.id], avoid_overlaps=True)
+    assert res["status"] == "success"
+
+    departed = [c for c in res["data"] if c["reason"] == "departed"]
+    assert len(departed) == 3 and all(c["from_staff_id"] == leaver.id for c in departed)
+    hours = {}
+    for s in Shift.query.filter_by(schedule_id=schedule.id).all():
+        hours[s.staff_id] = hours.get(s.staff_id, 0) + 8
+    assert hours == {leaver.id: 8, stayer.id: 32, hire.id: 24}
+    assert [c["reason"] for c in res["data"]] == ["departed"] * 3  # an 8h move would not narrow an 8h gap
+    # nobody was double-booked
+    for sid in (stayer.id, hire.id):
+        starts = [s.start_time for s in Shift.query.filter_by(schedule_id=schedule.id, staff_id=sid)]
+        assert len(starts) == len(set(starts))
+
+    assert reschedule_staff_delta(admin.id, schedule.id, added_ids=[424242])["status"] == "error"
+    assert reschedule_staff_delta(admin.id, 99999, added_ids=[hire.id])["status"] == "error"
+    with pytest.raises(PermissionError):
+        reschedule_staff_delta(stayer.id, schedule.id, added_ids=[hire.id], role="staff")
+    from flask import current_app
+    from flask_jwt_extended import create_access_token
+    staff_headers = {"Authorization": f"Bearer {create_access_token(identity=str(stayer.id), additional_claims={'role': 'staff'})}"}
+    response = current_app.test_client().post("/api/admin/reschedule", json={"scheduleID": schedule.id, "removedStaffIDs": [hire.id]}, headers=staff_headers)
+    assert response.status_code == 403
+
+    # a pure hire moves shifts over until hours are even
+    second = Schedule(name="Delta2", created_by=admin.id)
+    db.session.add(second)
+    db.session.commit()
+    db.session.add_all([
+        Shift(staff_id=stayer.id, schedule_id=second.id,
+              start_time=base + timedelta(days=d), end_time=base + timedelta(days=d, hours=4))
+        for d in range(4)
+    ])
+    db.session.commit()
+    res = reschedule_staff_delta(admin.id, second.id, added_ids=[hire.id], role="admin")
+    assert [c["reason"] for c in res["data"]] == ["rebalance", "rebalance"]
+    assert Shift.query.filter_by(schedule_id=second.id, staff_id=hire.id).count() == 2
+
+
+def test_shift_keyset_pagination_integration():
+    admin = create_user("page_admin", "adminpass", "admin")
+    staff = create_user("page_staff", "pass", "staff")
+    schedule = Schedule(name="Pages", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+
+    # ties on start_time must page by id without skipping or repeating rows
+    base = datetime(2025, 1, 6, 9)
+    for i in range(7):
+        start = base + timedelta(days=i // 2)
+        db.session.add(Shift(staff_id=staff.id, schedule_id=schedule.id, start_time=start, end_time=start + timedelta(hours=8)))
+    db.session.commit()
+
+    for fetch_page, actor in ((get_shift_report_page, admin.id), (get_combined_roster_page, staff.id)):
+        seen, cursor = [], None
+        while True:
+            page = fetch_page(actor, 3, cursor)
+            assert len(page["data"]) <= 3
+            seen.extend(page["data"])
+            cursor = page["next"]
+            if cursor is None:
+                break
+        assert [s["id"] for s in seen] == [s["id"] for s in get_shift_report(admin.id)]
+        assert len(seen) == 7
+
+    assert get_shift_report_page(admin.id, 10)["next"] is None
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        get_shift_report_page(admin.id, 3, "not-a-cursor")
+    with pytest.raises(PermissionError):
+        get_combined_roster_page(admin.id, 3)
+
+
+def test_streamed_shift_report_matches_list_integration(monkeypatch):
+    import json
+    from App.controllers import streaming
+
+    admin = create_user("stream_admin", "adminpass", "admin")
+    staff = create_user("stream_staff", "pass", "staff")
+    schedule = Schedule(name="Stream", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    base = datetime(2025, 1, 6, 9)
+    for i in range(25):
+        db.session.add(Shift(staff_id=staff.id, schedule_id=schedule.id,
+                             start_time=base + timedelta(hours=i), end_time=base + timedelta(hours=i + 4)))
+    db.session.commit()
+    expected = get_shift_report(admin.id)
+
+    # a tiny flush size forces the output across many chunks
+    monkeypatch.setattr(streaming, "STREAM_FLUSH_BYTES", 256)
+    chunks = list(stream_shift_report(admin.id, batch_size=4))
+    assert len(chunks) > 1
+    assert json.loads("".join(chunks)) == expected
+
+    lines = "".join(stream_combined_roster(staff.id, ndjson=True, batch_size=4)).splitlines()
+    assert [json.loads(line) for line in lines] == expected
+
+    assert json.loads("".join(streaming.iter_json_rows([]))) == []
+    with pytest.raises(PermissionError):
+        stream_shift_report(staff.id)
+
+    # ?stream is parsed as a switch, so "0" and "false" get the buffered listing
+    from flask import current_app
+    from flask_jwt_extended import create_access_token
+    client = current_app.test_client()
+    headers = {"Authorization": f"Bearer {create_access_token(identity=str(admin.id), additional_claims={'role': 'admin'})}"}
+    from App.controllers import admin as admin_controller
+    streamed = []
+    real_stream = admin_controller.stream_shift_report
+    monkeypatch.setattr(admin_controller, "stream_shift_report", lambda *a, **kw: streamed.append(1) or real_stream(*a, **kw))
+    for flag, streams in (("1", True), ("true", True), ("0", False), ("false", False), ("", False)):
+        streamed.clear()
+        response = client.get(f"/api/admin/viewSchedule?stream={flag}", headers=headers)
+        assert response.status_code == 200 and response.get_json() == expected
+        assert bool(streamed) is streams
+    response = client.get("/api/admin/viewSchedule?stream=maybe", headers=headers)
+    assert response.status_code == 400 and "stream must be one of" in response.get_json()["error"]
+
+
+def test_roster_window_and_scope_integration():
+    admin = create_user("window_admin", "adminpass", "admin")
+    me = create_user("window_me", "pass", "staff")
+    other = create_user("window_other", "pass", "staff")
+    schedule = Schedule(name="Window", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    monday = datetime(2025, 1, 6)
+    for day, staff_id in [(0, me.id), (2, other.id), (6, me.id), (7, me.id), (14, other.id)]:
+        start = monday + timedelta(days=day, hours=9)
+        db.session.add(Shift(staff_id=staff_id, schedule_id=schedule.id, start_time=start, end_time=start + timedelta(hours=8)))
+    db.session.commit()
+
+    start, end = roster_window("2025-01-06")
+    assert end - start == timedelta(days=7)
+    week = get_combined_roster(me.id, start, end)
+    assert [s["start_time"][:10] for s in week] == ["2025-01-06", "2025-01-08", "2025-01-12"]
+    mine = get_combined_roster(me.id, start, end, scope="mine")
+    assert {s["staff_id"] for s in mine} == {me.id} and len(mine) == 2
+    assert len(get_combined_roster_page(me.id, 10, None, start, end, "mine")["data"]) == 2
+
+    # no bounds means a week from today; a lone end reaches back a week
+    today_start, today_end = roster_window()
+    assert today_start.date() == datetime.now().date() and today_end - today_start == timedelta(days=7)
+    assert roster_window(end=datetime(2025, 1, 13))[0] == monday
+    with pytest.raises(ValueError):
+        roster_window("2025-01-13", "2025-01-06")
+    with pytest.raises(ValueError):
+        get_combined_roster(me.id, start, end, scope="team")
+
+
+def test_listing_cache_lru_ttl_and_invalidation(monkeypatch):
+    from flask import current_app
+    from App.controllers import cache
+
+    now = [0.0]
+    listing_cache = cache._ListingCache(max_entries=3, ttl=30, clock=lambda: now[0])
+    monkeypatch.setitem(current_app.extensions, "listing_cache", listing_cache)
+
+    admin = create_user("cache_admin", "adminpass", "admin")
+    me = create_user("cache_me", "pass", "staff")
+    other = create_user("cache_other", "pass", "staff")
+    schedule = Schedule(name="Cache", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    week = roster_window("2025-01-06")
+    next_week = roster_window("2025-01-13")
+    schedule_shift(admin.id, me.id, schedule.id, datetime(2025, 1, 6, 9), datetime(2025, 1, 6, 17))
+
+    assert len(get_combined_roster(me.id, *week)) == 1
+    get_combined_roster(me.id, *week)
+    assert listing_cache.stats()["hits"] == 1 and listing_cache.stats()["misses"] == 1
+
+    get_combined_roster(me.id, *next_week)
+    get_combined_roster(me.id, *week, scope="mine")
+    # a shift next week for someone else leaves this week and "mine" cached
+    schedule_shift(admin.id, other.id, schedule.id, datetime(2025, 1, 14, 9), datetime(2025, 1, 14, 17))
+    assert ("roster", None, *week) in listing_cache.entries
+    assert ("roster", me.id, *week) in listing_cache.entries
+    assert ("roster", None, *next_week) not in listing_cache.entries
+
+    # clocking in drops this week's listings, so the change shows up at once
+    shift_id = get_combined_roster(me.id, *week, scope="mine")[0]["id"]
+    clock_in(me.id, shift_id)
+    assert get_combined_roster(me.id, *week)[0]["clock_in"] is not None
+
+    # LRU bound and TTL
+    for i in range(4):
+        get_combined_roster(me.id, *roster_window(datetime(2024, 1, 1) + timedelta(days=7 * i)))
+    assert len(listing_cache.entries) == 3 and listing_cache.stats()["evictions"] >= 1
+    now[0] = 31
+    misses = listing_cache.stats()["misses"]
+    get_combined_roster(me.id, *week)
+    assert listing_cache.stats()["misses"] == misses + 1
+
+    # a write that lands while a listing is loading keeps the load out of the cache
+    def racing_load():
+        cache.invalidate_listings()
+        return ["loaded before the write"]
+    assert cache.cached_listing(("race",), racing_load) == ["loaded before the write"]
+    assert ("race",) not in listing_cache.entries and listing_cache.stats()["stale_puts"] == 1
+
+
+def test_roster_etag_and_conditional_get_integration():
+    from flask import current_app
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event
+    from App.models import RosterVersion
+
+    admin = create_user("etag_admin", "adminpass", "admin")
+    staff = create_user("etag_staff", "pass", "staff")
+    schedule = Schedule(name="ETag", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    # create_db seeds the counter row, so bumps are plain updates
+    assert db.session.get(RosterVersion, RosterVersion.GLOBAL_ID).version == 0
+    schedule_shift(admin.id, staff.id, schedule.id, datetime(2025, 1, 6, 9), datetime(2025, 1, 6, 17))
+    assert RosterVersion.current() == 1
+    assert db.session.get(Schedule, schedule.id).version == 1
+
+    client = current_app.test_client()
+    headers = {"Authorization": f"Bearer {create_access_token(identity=str(staff.id))}"}
+    url = "/api/staff/roster?from=2025-01-06&to=2025-01-13"
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200 and len(first.get_json()) == 1
+    etag = first.headers["ETag"]
+    assert not etag.startswith("W/")
+
+    # unchanged: 304 after a single version read, no shift query
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        cached = client.get(url, headers={**headers, "If-None-Match": etag})
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert cached.status_code == 304 and cached.headers["ETag"] == etag
+    assert not any("FROM shift" in sql for sql in statements)
+
+    # any shift mutation moves the version, so the old tag stops matching
+    clock_in(staff.id, first.get_json()[0]["id"])
+    changed = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    assert changed.get_json()[0]["clock_in"] is not None
+    assert RosterVersion.current() == 2
+
+    # a write from another worker bumps the version without reaching this
+    # process's cache, and the cached body must not outlive its tag
+    db.session.add(Shift(staff_id=staff.id, schedule_id=schedule.id,
+                         start_time=datetime(2025, 1, 7, 9), end_time=datetime(2025, 1, 7, 17)))
+    RosterVersion.bump(schedule.id)
+    db.session.commit()
+    elsewhere = client.get(url, headers=headers)
+    assert elsewhere.headers["ETag"] != changed.headers["ETag"] and len(elsewhere.get_json()) == 2
+
+
+def test_clock_events_use_one_conditional_update_integration():
+    from sqlalchemy import event
+
+    admin = create_user("fast_admin", "adminpass", "admin")
+    me = create_user("fast_me", "pass", "staff")
+    other = create_user("fast_other", "pass", "staff")
+    schedule = Schedule(name="Fast", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    shift_id = schedule_shift(admin.id, me.id, schedule.id, datetime(2025, 1, 6, 9), datetime(2025, 1, 6, 17))["id"]
+    me_id, other_id = me.id, other.id
+
+    with pytest.raises(ValueError, match="Cannot clock out before clocking in"):
+        record_clock_event(me_id, shift_id, "clock_out", role="staff")
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        shift = record_clock_event(me_id, shift_id, "clock_in", role="staff")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    shift_statements = [sql for sql in statements if sql.startswith("UPDATE shift ")]
+    assert len(shift_statements) == 1 and "RETURNING" in shift_statements[0]
+    assert not any(sql.lstrip().upper().startswith("SELECT") for sql in statements)
+    assert shift["clock_in"] is not None and shift["staff_name"] == "fast_me"
+
+    with pytest.raises(ValueError, match="Already clocked in"):
+        record_clock_event(me_id, shift_id, "clock_in", role="staff")
+    with pytest.raises(ValueError, match="Invalid shift for staff"):
+        record_clock_event(other_id, shift_id, "clock_out", role="staff")
+    with pytest.raises(PermissionError):
+        record_clock_event(me_id, shift_id, "clock_out", role="admin")
+
+    done = record_clock_event(me_id, shift_id, "clock_out")  # no role claim: falls back to a lookup
+    assert done["clock_out"] >= done["clock_in"]
+    assert get_shift(shift_id).get_json() == done
+
+    # the Staff model methods take the same path, so listings see the change
+    from App.models import RosterVersion
+    second_id = schedule_shift(admin.id, me_id, schedule.id, datetime(2025, 1, 7, 9), datetime(2025, 1, 7, 17))["id"]
+    assert get_combined_roster(me_id, *roster_window("2025-01-06"), scope="mine")[1]["clock_in"] is None
+    version = RosterVersion.current()
+    assert db.session.get(Staff, me_id).clock_in(second_id).clock_in is not None
+    assert RosterVersion.current() == version + 1
+    assert get_combined_roster(me_id, *roster_window("2025-01-06"), scope="mine")[1]["clock_in"] is not None
+    with pytest.raises(ValueError, match="Already clocked in"):
+        db.session.get(Staff, me_id).clock_in(second_id)
+
+
+def test_clock_event_queue_batches_and_reports_per_event_integration(monkeypatch):
+    from flask import current_app
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event
+    from App.controllers import clock_queue
+    from App.models import ClockEventResult
+
+    # no background loop: batches flush when full or when drained
+    queue = clock_queue._ClockEventQueue(current_app._get_current_object(), flush_interval=0, max_batch=4, keep_results=100)
+    monkeypatch.setitem(current_app.extensions, "clock_event_queue", queue)
+
+    admin = create_user("queue_admin", "adminpass", "admin")
+    me = create_user("queue_me", "pass", "staff")
+    other = create_user("queue_other", "pass", "staff")
+    schedule = Schedule(name="Queue", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    shift_id = schedule_shift(admin.id, me.id, schedule.id, datetime(2025, 1, 6, 9), datetime(2025, 1, 6, 17))["id"]
+    me_id, other_id = me.id, other.id
+
+    with pytest.raises(PermissionError):
+        clock_queue.queue_clock_event(admin.id, shift_id, "clock_in")
+
+    commits = []
+    listener = lambda conn: commits.append(conn)
+    event.listen(db.engine, "commit", listener)
+    try:
+        sequences = [
+            clock_queue.queue_clock_event(me_id, shift_id, "clock_in", role="staff"),
+            clock_queue.queue_clock_event(me_id, shift_id, "clock_in", role="staff"),
+            clock_queue.queue_clock_event(other_id, shift_id, "clock_in", role="staff"),
+        ]
+        assert clock_queue.get_clock_event(sequences[0])["status"] == "queued"
+        sequences.append(clock_queue.queue_clock_event(me_id, shift_id, "clock_out", role="staff"))  # fills the batch
+    finally:
+        event.remove(db.engine, "commit", listener)
+    assert len(commits) == 1 and queue.flushes == 1
+
+    results = [clock_queue.get_clock_event(seq) for seq in sequences]
+    assert [r["status"] for r in results] == ["applied", "rejected", "rejected", "applied"]
+    assert results[1]["error"] == "Already clocked in for this shift"
+    assert results[2]["error"] == "Invalid shift for staff"
+    assert results[3]["shift"]["clock_out"] >= results[0]["shift"]["clock_in"]
+    assert clock_queue.get_clock_event(sequences[0], staff_id=other_id) is None
+
+    # sequences are unique across workers, and a worker that did not accept
+    # an event reads its outcome from the shared table
+    assert len(set(sequences)) == 4 and all(seq.startswith(f"{os.getpid()}-") for seq in sequences)
+    queue.results.clear()
+    elsewhere = [clock_queue.get_clock_event(seq) for seq in sequences]
+    assert [r["status"] for r in elsewhere] == ["applied", "rejected", "rejected", "applied"]
+    assert elsewhere[1]["error"] == "Already clocked in for this shift"
+    assert elsewhere[3]["shift"]["clock_out"] is not None
+    # the clock-in reports the row it wrote, not the shift as it is now
+    assert elsewhere[0]["shift"]["clock_out"] is None and elsewhere[0]["shift"] == results[0]["shift"]
+    assert clock_queue.get_clock_event(sequences[0], staff_id=other_id) is None
+    assert clock_queue.get_clock_event("no-such-event") is None
+
+    # over HTTP: accepted with a sequence, visible once drained
+    client = current_app.test_client()
+    headers = {"Authorization": f"Bearer {create_access_token(identity=str(me_id), additional_claims={'role': 'staff'})}"}
+    accepted = client.post("/api/staff/clock_out?mode=async", json={"shiftID": shift_id}, headers=headers)
+    assert accepted.status_code == 202
+    status_url = accepted.get_json()["statusURL"]
+    assert client.get(status_url, headers=headers).get_json()["status"] == "queued"
+    assert clock_queue.drain_clock_events() == 1
+    assert client.get(status_url, headers=headers).get_json()["error"] == "Already clocked out for this shift"
+
+    # an event that raises fails alone; the rest of its batch is still written
+    second = schedule_shift(admin.id, me.id, schedule.id, datetime(2025, 1, 7, 9), datetime(2025, 1, 7, 17))["id"]
+    third = schedule_shift(admin.id, me.id, schedule.id, datetime(2025, 1, 8, 9), datetime(2025, 1, 8, 17))["id"]
+    real_record_clock = Shift.record_clock.__func__
+
+    def flaky_record_clock(cls, event, staff_id, shift_id, at):
+        if shift_id == second:
+            raise RuntimeError("disk full")
+        return real_record_clock(cls, event, staff_id, shift_id, at)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(Shift, "record_clock", classmethod(flaky_record_clock))
+        batch = [clock_queue.queue_clock_event(me_id, sid, "clock_in", role="staff") for sid in (second, third)]
+        assert clock_queue.drain_clock_events() == 2
+    outcomes = [clock_queue.get_clock_event(seq) for seq in batch]
+    assert [r["status"] for r in outcomes] == ["failed", "applied"]
+    assert outcomes[0]["error"] == "Clock event failed: disk full"
+    assert db.session.get(Shift, second).clock_in is None and db.session.get(Shift, third).clock_in is not None
+    assert db.session.get(ClockEventResult, batch[0]).status == "failed"
+
+    queue.close()
+    with pytest.raises(RuntimeError):
+        queue.submit(me_id, shift_id, "clock_in")
+
+
+CLOCK_QUEUE_EXIT_SCRIPT = """
+import sys
+from datetime import datetime
+from App.main import create_app
+from App.database import create_db
+from App.controllers import create_user, schedule_shift, queue_clock_event
+from App.models import Schedule
+from App.database import db
+
+# a flush interval far longer than the run: only the exit drain can write the event
+app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + sys.argv[1], "CLOCK_QUEUE_FLUSH_MS": 600000})
+with app.app_context():
+    create_db()
+    admin = create_user("exit_admin", "adminpass", "admin")
+    staff = create_user("exit_staff", "pass", "staff")
+    schedule = Schedule(name="Exit", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    shift_id = schedule_shift(admin.id, staff.id, schedule.id, datetime(2025, 1, 6, 9), datetime(2025, 1, 6, 17))["id"]
+    queue_clock_event(staff.id, shift_id, "clock_in", role="staff")
+"""
+
+
+def test_clock_event_queue_drains_on_interpreter_exit(tmp_path):
+    import sqlite3
+    import subprocess
+    import sys
+
+    path = tmp_path / "exit.db"
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    # the flush loop must not keep the process alive, and the queued event must still be written
+    subprocess.run([sys.executable, "-c", CLOCK_QUEUE_EXIT_SCRIPT, str(path)], cwd=root, check=True, timeout=30)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT clock_in FROM shift").fetchone()[0] is not None
+
+
+def test_import_shifts_reports_bad_rows_and_inserts_the_rest_integration():
+    from flask import current_app
+    from flask_jwt_extended import create_access_token
+    from App.controllers.shift_import import import_shifts, read_shift_rows
+    from App.controllers.versions import roster_version
+
+    admin = create_user("import_admin", "adminpass", "admin")
+    staff = create_user("import_staff", "pass", "staff")
+    schedule = Schedule(name="Import", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    admin_id, staff_id, schedule_id = admin.id, staff.id, schedule.id
+
+    # a single scheduled shift no longer leaves a stray schedule behind
+    schedule_shift(admin_id, staff_id, schedule_id, datetime(2025, 1, 5, 9), datetime(2025, 1, 5, 17))
+    assert db.session.scalar(db.select(db.func.count(Schedule.id))) == 1
+
+    body = (
+        "staffID,scheduleID,start_time,end_time\n"
+        f"{staff_id},{schedule_id},2025-01-06 09:00:00,2025-01-06 17:00:00\n"
+        f"9999,{schedule_id},2025-01-07T09:00,2025-01-07T17:00\n"
+        f"{staff_id},{schedule_id},tomorrow,2025-01-08T17:00\n"
+        f"{staff_id},{schedule_id},2025-01-09T17:00,2025-01-09T09:00\n"
+        f"{staff_id},{schedule_id},2025-01-10T09:00,2025-01-10T17:00\n"
+        f"{staff_id},{schedule_id},2025-01-11T09:00+02:00,2025-01-11T17:00\n"
+        f'{staff_id},{schedule_id},"{"x" * 200000}",2025-01-12T17:00\n'
+        f"{staff_id},{schedule_id},2025-01-13T09:00,2025-01-13T17:00\n"
+    )
+    client = current_app.test_client()
+    headers = {"Authorization": f"Bearer {create_access_token(identity=str(admin_id))}"}
+    version = roster_version()
+    response = client.post("/api/admin/schedule_shifts?chunkSize=1", data=body, content_type="text/csv", headers=headers)
+    assert response.status_code == 200
+    result = response.get_json()
+    assert (result["rows"], result["inserted"], result["failed"]) == (8, 3, 5)
+    assert [e["row"] for e in result["errors"]] == [2, 3, 4, 6, 7]
+    assert result["errors"][0]["error"] == "Unknown staff id 9999"
+    assert result["errors"][3]["error"].startswith("start_time must not include a UTC offset")
+    assert result["errors"][4]["error"].startswith("Unreadable CSV row")
+    # each committed chunk bumps the version on its own
+    assert roster_version() == version + 3
+    assert db.session.scalar(db.select(db.func.count(Shift.id))) == 4
+
+    # a stream that breaks partway keeps the chunks already written visible
+    def broken():
+        yield {"staffID": staff_id, "scheduleID": schedule_id, "start_time": "2025-03-03T09:00", "end_time": "2025-03-03T17:00"}
+        raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+    version = roster_version()
+    with pytest.raises(UnicodeDecodeError):
+        import_shifts(admin_id, broken(), chunk_size=1)
+    assert roster_version() == version + 1
+
+    jsonl = io.StringIO(
+        f'{{"staff_id": {staff_id}, "schedule_id": {schedule_id}, "start_time": "2025-02-03T09:00", "end_time": "2025-02-03T17:00"}}\n'
+        "\n"
+        "{not json\n"
+    )
+    result = import_shifts(admin_id, read_shift_rows(jsonl, "jsonl"))
+    assert (result["inserted"], [e["row"] for e in result["errors"]]) == (1, [2])
+    assert result["errors"][0]["error"].startswith("Invalid JSON")
+
+    with pytest.raises(PermissionError):
+        import_shifts(staff_id, [])
+
+
+def test_import_users_hashes_in_workers_and_creates_subtypes_integration():
+    from App.controllers.user_import import import_users, read_user_rows
+
+    admin_id = create_user("import_boss", "adminpass", "admin").id
+    create_user("taken", "pass", "staff")
+
+    body = io.StringIO(
+        "username,password,role\n"
+        "ann,annpass,staff\n"
+        "bob,bobpass,admin\n"
+        "cat,catpass,\n"
+        "ann,again,staff\n"
+        "taken,pass,staff\n"
+        "dan,danpass,manager\n"
+        "eve,,staff\n"
+        f"{'x' * 21},pass,user\n"
+        "fay,faypass,user\n"
+    )
+    progress = []
+    result = import_users(admin_id, read_user_rows(body), chunk_size=2, max_workers=2,
+                          progress=lambda created, elapsed: progress.append(created))
+    assert (result["rows"], result["created"], result["failed"]) == (9, 4, 5)
+    assert [e["row"] for e in result["errors"]] == [4, 5, 6, 7, 8]
+    assert result["errors"][0]["error"] == "Username 'ann' is already taken"
+    assert progress == [2, 4]
+
+    assert get_user_by_username("ann").role == "staff" and db.session.get(Staff, get_user_by_username("ann").id)
+    assert db.session.get(Admin, get_user_by_username("bob").id) is not None
+    assert get_user_by_username("cat").role == "staff"
+    assert get_user_by_username("fay").role == "user"
+    assert get_user_by_username("bob").check_password("bobpass")
+
+    with pytest.raises(PermissionError):
+        import_users(get_user_by_username("ann").id, [])
+
+
+def test_import_users_api_runs_as_a_job_integration(tmp_path):
+    from flask_jwt_extended import create_access_token
+
+    app = _file_app(tmp_path / "import.db", USER_IMPORT_WORKERS=2)
+    with app.app_context():
+        create_db()
+        admin_id = create_user("import_boss", "adminpass", "admin").id
+        staff_id = create_user("import_staff", "pass", "staff").id
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {create_access_token(identity=str(admin_id), additional_claims={'role': 'admin'})}"}
+
+        def finished(response):
+            assert response.status_code == 202
+            status_url = response.get_json()["statusURL"]
+            deadline = time.time() + 30
+            while (job := client.get(status_url, headers=headers).get_json())["status"] in ("queued", "running") and time.time() < deadline:
+                time.sleep(0.05)
+            return job
+
+        # the request only queues the import; the status URL reports it
+        job = finished(client.post("/api/admin/import_users?chunkSize=1", json={"users": [{"username": "gus", "password": "guspass"}, {"username": "hana", "password": "hanapass"}]}, headers=headers))
+        assert job["status"] == "succeeded", job["error"]
+        assert job["rows"] == 2 and job["progress"] == {"done": 2, "total": 2}
+        assert job["result"]["created"] == 2 and "guspass" not in str(job)
+        assert get_user_by_username("gus").check_password("guspass")
+
+        # JSON values of the wrong type are row errors, not a failed chunk
+        users = [{"username": 7, "password": "x"}, {"username": "hal", "password": 1234},
+                 {"username": "ida", "password": "idapass", "role": ["staff"]}, {"username": "jo", "password": "jopass"}]
+        result = finished(client.post("/api/admin/import_users", json={"users": users}, headers=headers))["result"]
+        assert (result["created"], [e["row"] for e in result["errors"]]) == (1, [1, 2, 3])
+        assert [e["error"] for e in result["errors"]] == ["username must be a string, got int", "password must be a string, got int", "role must be a string, got list"]
+
+        # a CSV body is read in full before the request ends
+        job = finished(client.post("/api/admin/import_users", data="username,password,role\nkai,kaipass,admin\n", content_type="text/csv", headers=headers))
+        assert job["result"]["created"] == 1 and db.session.get(Admin, get_user_by_username("kai").id) is not None
+
+        staff_headers = {"Authorization": f"Bearer {create_access_token(identity=str(staff_id), additional_claims={'role': 'staff'})}"}
+        assert client.post("/api/admin/import_users", json={"users": []}, headers=staff_headers).status_code == 403
+        assert client.get(f"/api/admin/import_users/jobs/{job['id']}", headers=staff_headers).status_code == 403
+        assert client.get("/api/admin/import_users/jobs/missing", headers=headers).status_code == 404
+
+def test_login_verifies_on_kdf_pool_and_rehashes_on_cost_change_integration(monkeypatch):
+    import threading
+    from flask import current_app
+    from App.controllers.auth import login
+    from App.controllers.passwords import _PasswordPool, run_password_kdf
+
+    assert run_password_kdf(threading.current_thread).name.startswith("password-kdf")
+
+    monkeypatch.setitem(current_app.config, "PASSWORD_HASH_METHOD", "pbkdf2:sha256:1000")
+    user_id = create_user("kdf_user", "kdfpass", "staff").id
+    assert get_user(user_id).password.startswith("pbkdf2:sha256:1000$")
+
+    monkeypatch.setitem(current_app.config, "PASSWORD_HASH_METHOD", "pbkdf2:sha256:2000")
+    assert login("kdf_user", "wrong") is None
+    assert get_user(user_id).password.startswith("pbkdf2:sha256:1000$")
+    assert login("kdf_user", "kdfpass") is not None
+    db.session.expire_all()
+    assert get_user(user_id).password.startswith("pbkdf2:sha256:2000$")
+    assert get_user(user_id).check_password("kdfpass")
+
+    # no room for another check: the login is turned away rather than queued
+    monkeypatch.setitem(current_app.extensions, "password_pool", _PasswordPool(1, max_pending=0))
+    response = current_app.test_client().post("/api/auth/login", json={"username": "kdf_user", "password": "kdfpass"})
+    assert response.status_code == 429
+
+
+def test_role_claims_and_cached_identity_skip_user_queries_integration(monkeypatch):
+    from flask import current_app
+    from flask_jwt_extended import create_access_token, decode_token
+    from sqlalchemy import event
+    from App.controllers.auth import logout
+    from App.controllers.ttl_cache import TTLCache
+
+    identities = TTLCache(max_entries=16, ttl=60)
+    monkeypatch.setitem(current_app.extensions, "identity_cache", identities)
+    admin_id = create_user("claims_admin", "adminpass", "admin").id
+    staff_id = create_user("claims_staff", "pass", "staff").id
+
+    token = loginCLI("claims_staff", "pass")["token"]
+    claims = decode_token(token)
+    assert (claims["role"], claims["ver"]) == ("staff", 0)
+
+    client = current_app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+    admin_headers = {"Authorization": f"Bearer {create_access_token(identity=str(admin_id), additional_claims={'role': 'admin', 'ver': 0})}"}
+    assert client.get("/api/staff/roster", headers=headers).status_code == 200
+    assert client.get("/api/admin/viewSchedule", headers=admin_headers).status_code == 200
+
+    # identities cached and roles in the tokens: no user row is read
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        assert client.get("/api/staff/roster", headers=headers).status_code == 200
+        assert client.get("/api/admin/viewSchedule", headers=admin_headers).status_code == 200
+        assert client.get("/api/admin/viewSchedule", headers=headers).status_code == 403
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert statements and not any(re.search(r"\bFROM user\b", sql) for sql in statements)
+    assert identities.stats()["hits"] == 3
+
+    update_user(staff_id, "claims_renamed")
+    assert "claims_renamed" in client.get("/api/auth/identify", headers=headers).get_json()["message"]
+
+    # logging out bumps the token version, so the old token stops loading
+    logout("claims_renamed")
+    assert client.get("/api/staff/roster", headers=headers).status_code == 401
+    assert decode_token(loginCLI("claims_renamed", "pass")["token"])["ver"] == 1
+
+
+def _file_app(path, **config):
+    """A second app on a SQLite file, standing in for another gunicorn worker."""
+    from flask.globals import _cv_app
+
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(path), **config})
+    # create_app leaves its context pushed over the session fixture's one
+    _cv_app.get().pop()
+    return app
+
+
+def test_auto_schedule_jobs_are_shared_between_workers_integration(tmp_path, monkeypatch):
+    import threading
+    from flask_jwt_extended import create_access_token
+    from App.controllers import jobs
+    from App.models import BackgroundJob
+
+    # separate connections, unlike the shared in-memory test database
+    path = tmp_path / "jobs.db"
+    worker_a, worker_b = _file_app(path), _file_app(path)
+    with worker_a.app_context():
+        create_db()
+        admin = create_user("job_admin", "adminpass", "admin")
+        staff = create_user("job_staff1", "pass", "staff")
+        create_user("job_staff2", "pass", "staff")
+        schedule = Schedule(name="Jobs", created_by=admin.id)
+        db.session.add(schedule)
+        db.session.commit()
+        admin_id, staff_id, schedule_id = admin.id, staff.id, schedule.id
+
+    release = threading.Event()
+    real_auto_schedule = jobs.auto_schedule
+
+    def gated_auto_schedule(**kwargs):
+        release.wait(5)
+        return real_auto_schedule(**kwargs)
+
+    monkeypatch.setattr(jobs, "auto_schedule", gated_auto_schedule)
+
+    def wait_for(job_id):
+        deadline = time.time() + 5
+        while jobs.get_auto_schedule_job(job_id)["status"] in ("queued", "running") and time.time() < deadline:
+            time.sleep(0.01)
+        return jobs.get_auto_schedule_job(job_id)
+
+    with worker_a.app_context():
+        job, duplicate = jobs.submit_auto_schedule_job(schedule_id, "Even")
+        assert duplicate is False and job["status"] == "queued"
+
+    # the other worker finds the job and collapses the same run onto it
+    with worker_b.app_context():
+        assert jobs.get_auto_schedule_job(job["id"])["status"] in ("queued", "running")
+        again, duplicate = jobs.submit_auto_schedule_job(schedule_id, "even")
+        assert duplicate is True and again["id"] == job["id"]
+
+        release.set()
+        done = wait_for(job["id"])
+        assert done["status"] == "succeeded", done["error"]
+        assert done["schedule_id"] == schedule_id and done["method"] == "even"
+        assert done["progress"] == {"done": 2, "total": 2}
+        assert len(done["result"]["data"]) == 2
+        assert done["run_seconds"] is not None and done["queue_seconds"] is not None
+        assert jobs.get_auto_schedule_job("missing") is None
+
+        # once finished, a new submission starts a fresh job
+        fresh, duplicate = jobs.submit_auto_schedule_job(schedule_id, "even")
+        assert duplicate is False and fresh["id"] != job["id"]
+        assert wait_for(fresh["id"])["status"] == "succeeded"
+
+        # a job whose worker died stops blocking new submissions after the timeout
+        db.session.add(BackgroundJob(id="abandoned", kind="auto_schedule", active_key=f"auto_schedule:{schedule_id}:even:True:None",
+                                     status="running", submitted_at=datetime.utcnow() - timedelta(hours=2)))
+        db.session.commit()
+        retry, duplicate = jobs.submit_auto_schedule_job(schedule_id, "even", avoid_overlaps=True)
+        assert duplicate is False and retry["id"] != "abandoned"
+        assert jobs.get_auto_schedule_job("abandoned")["status"] == "failed"
+        assert wait_for(retry["id"])["status"] == "succeeded"
+
+        client = worker_b.test_client()
+        status_url = f"/api/admin/autoSchedule/jobs/{job['id']}"
+        admin_headers = {"Authorization": f"Bearer {create_access_token(identity=str(admin_id), additional_claims={'role': 'admin'})}"}
+        staff_headers = {"Authorization": f"Bearer {create_access_token(identity=str(staff_id), additional_claims={'role': 'staff'})}"}
+        assert client.get(status_url, headers=admin_headers).get_json()["status"] == "succeeded"
+        assert client.get(status_url, headers=staff_headers).status_code == 403
+        response = client.post("/api/admin/autoSchedule?mode=async", json={"scheduleID": schedule_id, "methodType": "even"}, headers=staff_headers)
+        assert response.status_code == 403
@@ -1,13 +1,17 @@
-from flask import Blueprint, jsonify, request
+import io
+from flask import Blueprint, Response, jsonify, request, stream_with_context, url_for
 from datetime import datetime
-from App.controllers import staff, auth, admin
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from App.controllers import staff, auth, admin, jobs, versions, shift_import, user_import
+from App.views.conditional import not_modified
+from App.views.params import InvalidParameter, json_bool, query_flag, worker_count
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from App.controllers.auth import role_required
 from sqlalchemy.exc import SQLAlchemyError
 
 admin_view = Blueprint('admin_view', __name__, url_prefix="/api/admin")
 
 @admin_view.route('/schedule_shift', methods=['POST'])
-@jwt_required()
+@role_required("admin")
 def createShift():
     try:
         admin_id = get_jwt_identity()
@@ -24,13 +28,83 @@ def createShift():
             start_time = datetime.strptime(startTime, "%Y-%m-%d %H:%M:%S")
             end_time = datetime.strptime(endTime, "%Y-%m-%d %H:%M:%S")
 
-        return admin.schedule_shift(admin_id, staffID, scheduleID, start_time, end_time), 200
+        return admin.schedule_shift(admin_id, staffID, scheduleID, start_time, end_time, role=get_jwt().get("role")), 200
     except (PermissionError, ValueError) as e:
         return jsonify({"error": str(e)}), 403
     
     
+IMPORT_MIMETYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+}
+
+@admin_view.route('/schedule_shifts', methods=['POST'])
+@role_required("admin")
+def importShifts():
+    try:
+        admin_id = get_jwt_identity()
+        if request.is_json:
+            data = request.get_json()
+            records = data.get("shifts") if isinstance(data, dict) else data
+            if not isinstance(records, list):
+                return jsonify({"error": "Missing required field: shifts"}), 400
+        else:
+            fmt = request.args.get("format") or IMPORT_MIMETYPES.get(request.mimetype)
+            if fmt not in shift_import.IMPORT_FORMATS:
+                return jsonify({"error": "Send JSON, or CSV/JSONL with ?format=csv|jsonl"}), 400
+            # read the body as it arrives rather than buffering it
+            stream = io.TextIOWrapper(request.stream, encoding="utf-8", newline="")
+            records = shift_import.read_shift_rows(stream, fmt)
+
+        chunkSize = request.args.get("chunkSize")
+        return shift_import.import_shifts(admin_id, records, chunk_size=int(chunkSize) if chunkSize else None, role=get_jwt().get("role")), 200
+    except UnicodeDecodeError:
+        return jsonify({"error": "Import body must be UTF-8"}), 400
+    except (PermissionError, ValueError) as e:
+        return jsonify({"error": str(e)}), 403
+
+@admin_view.route('/import_users', methods=['POST'])
+@role_required("admin")
+def importUsers():
+    try:
+        admin_id = get_jwt_identity()
+        if request.is_json:
+            data = request.get_json()
+            records = data.get("users") if isinstance(data, dict) else data
+            if not isinstance(records, list):
+                return jsonify({"error": "Missing required field: users"}), 400
+        elif request.mimetype == "text/csv" or request.args.get("format") == "csv":
+            records = list(user_import.read_user_rows(io.TextIOWrapper(request.stream, encoding="utf-8", newline="")))
+        else:
+            return jsonify({"error": "Send JSON, or CSV with Content-Type: text/csv"}), 400
+
+        # hashing takes about 0.1 s of CPU per user, so it runs as a job
+        chunkSize = request.args.get("chunkSize")
+        job, _ = jobs.submit_user_import_job(admin_id, records, chunk_size=int(chunkSize) if chunkSize else None, role=get_jwt().get("role"))
+        return jsonify({
+            "jobID": job["id"],
+            "status": job["status"],
+            "rows": job["rows"],
+            "statusURL": url_for("admin_view.importUsersJob", job_id=job["id"]),
+        }), 202
+    except UnicodeDecodeError:
+        return jsonify({"error": "Import body must be UTF-8"}), 400
+    except OverflowError as e:
+        return jsonify({"error": str(e)}), 429
+    except (PermissionError, ValueError) as e:
+        return jsonify({"error": str(e)}), 403
+
+@admin_view.route('/import_users/jobs/<job_id>', methods=['GET'])
+@role_required("admin")
+def importUsersJob(job_id):
+    job = jobs.get_user_import_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
 @admin_view.route('/autoSchedule', methods=['POST'])
-@jwt_required()
+@role_required("admin")
 def autoSchedule():
     try:
         data = request.get_json()
@@ -43,21 +117,129 @@ def autoSchedule():
         if not methodType:
             return jsonify({"error": "Missing required field: methodType"}), 400
     
-        return admin.auto_schedule(scheduleID, methodType)
+        maxHours = data.get("maxHours")
+        options = {
+            "avoid_overlaps": json_bool(data, "avoidOverlaps"),
+            "max_hours": float(maxHours) if maxHours is not None else None,
+        }
+
+        if data.get("async") or request.args.get("mode") == "async":
+            job, duplicate = jobs.submit_auto_schedule_job(scheduleID, methodType, **options)
+            return jsonify({
+                "jobID": job["id"],
+                "status": job["status"],
+                "duplicate": duplicate,
+                "statusURL": url_for("admin_view.autoScheduleJob", job_id=job["id"]),
+            }), 202
+
+        return admin.auto_schedule(scheduleID, methodType, **options)
     
+    except InvalidParameter as e:
+        return jsonify({"error": str(e)}), 400
+    except OverflowError as e:
+        return jsonify({"error": str(e)}), 429
+    except (PermissionError, ValueError) as e:
+        return jsonify({"error": str(e)}), 403
+
+@admin_view.route('/autoSchedule/jobs/<job_id>', methods=['GET'])
+@role_required("admin")
+def autoScheduleJob(job_id):
+    job = jobs.get_auto_schedule_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+@admin_view.route('/autoScheduleBatch', methods=['POST'])
+@role_required("admin")
+def autoScheduleBatch():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Missing JSON body"}), 400
+        scheduleIDs = data.get("scheduleIDs")
+        methodType = data.get("methodType")
+        if not scheduleIDs or not isinstance(scheduleIDs, list):
+            return jsonify({"error": "Missing required field: scheduleIDs"}), 400
+        if not methodType:
+            return jsonify({"error": "Missing required field: methodType"}), 400
+
+        maxHours = data.get("maxHours")
+        return admin.auto_schedule_batch(
+            get_jwt_identity(),
+            [int(sid) for sid in scheduleIDs],
+            methodType,
+            max_workers=worker_count(data, "maxWorkers"),
+            avoid_overlaps=json_bool(data, "avoidOverlaps"),
+            max_hours=float(maxHours) if maxHours is not None else None,
+            role=get_jwt().get("role"),
+        )
+
+    except InvalidParameter as e:
+        return jsonify({"error": str(e)}), 400
+    except (PermissionError, ValueError) as e:
+        return jsonify({"error": str(e)}), 403
+
+@admin_view.route('/reschedule', methods=['POST'])
+@role_required("admin")
+def reschedule():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Missing JSON body"}), 400
+        scheduleID = data.get("scheduleID")
+        if not scheduleID:
+            return jsonify({"error": "Missing required field: scheduleID"}), 400
+
+        maxHours = data.get("maxHours")
+        return admin.reschedule_staff_delta(
+            get_jwt_identity(),
+            scheduleID,
+            added_ids=[int(sid) for sid in data.get("addedStaffIDs", [])],
+            removed_ids=[int(sid) for sid in data.get("removedStaffIDs", [])],
+            avoid_overlaps=json_bool(data, "avoidOverlaps"),
+            max_hours=float(maxHours) if maxHours is not None else None,
+            role=get_jwt().get("role"),
+        )
+
+    except InvalidParameter as e:
+        return jsonify({"error": str(e)}), 400
     except (PermissionError, ValueError) as e:
         return jsonify({"error": str(e)}), 403
 
 @admin_view.route('/viewSchedule', methods=['GET'])
-@jwt_required()
+@role_required("admin")
 def viewSchedule():
     try:
         admin_id = get_jwt_identity()
-        report = admin.get_shift_report(admin_id)
-        return jsonify(report), 200
+        role = get_jwt().get("role")
+        ndjson = request.args.get("format") == "ndjson"
+        stream = query_flag(request.args, "stream")
+        etag = versions.listing_etag("report", admin_id, sorted(request.args.items()))
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+
+        if ndjson or stream:
+            chunks = admin.stream_shift_report(admin_id, ndjson=ndjson, role=role)
+            response = Response(stream_with_context(chunks), mimetype="application/x-ndjson" if ndjson else "application/json")
+        elif "limit" in request.args or "cursor" in request.args:
+            response = jsonify(admin.get_shift_report_page(admin_id, request.args.get("limit"), request.args.get("cursor"), role=role))
+        else:
+            response = jsonify(admin.get_shift_report(admin_id, role=role))
+        response.set_etag(etag)
+        return response, 200
+    except InvalidParameter as e:
+        return jsonify({"error": str(e)}), 400
     except (PermissionError, ValueError) as e:
         return jsonify({"error": str(e)}), 403
     
+@admin_view.route('/cacheStats', methods=['GET'])
+@role_required("admin")
+def cacheStats():
+    try:
+        return jsonify(admin.get_listing_cache_stats(get_jwt_identity(), role=get_jwt().get("role"))), 200
+    except (PermissionError, ValueError) as e:
+        return jsonify({"error": str(e)}), 403
+
 @admin_view.route('/viewShift', methods=['POST'])
 @jwt_required()
 def viewShift():
@@ -15,7 +15,10 @@ auth_views = Blueprint('auth_views', __name__, url_prefix="/api/auth")
 @auth_views.route('/login', methods=['POST'])
 def user_login_api():
   data = request.json
-  token = login(data['username'], data['password'])
+  try:
+    token = login(data['username'], data['password'])
+  except OverflowError as e:
+    return jsonify(message=str(e)), 429
   if not token:
     return jsonify(message='bad username or password given'), 401
   response = jsonify(access_token=token) 
@@ -0,0 +1,8 @@
+from flask import Response
+
+
+def not_modified(etag):
+    """Bodyless 304 for a request whose If-None-Match already holds ``etag``."""
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
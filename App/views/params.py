@@ -0,0 +1,43 @@
+import os
+
+
+class InvalidParameter(Exception):
+    """A request parameter of the wrong type or out of range; views answer 400."""
+
+
+def json_bool(data, key, default=False):
+    """``data[key]`` when it is a JSON boolean; strings such as "false" are rejected, not coerced."""
+    value = data.get(key, default)
+    if not isinstance(value, bool):
+        raise InvalidParameter(f"{key} must be true or false")
+    return value
+
+
+def worker_count(data, key):
+    """``data[key]`` as a positive worker count, capped at the number of cores; None when absent."""
+    value = data.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise InvalidParameter(f"{key} must be a positive integer")
+    try:
+        count = int(value)
+    except ValueError:
+        raise InvalidParameter(f"{key} must be a positive integer")
+    if count < 1:
+        raise InvalidParameter(f"{key} must be a positive integer")
+    return min(count, os.cpu_count() or 1)
+
+
+TRUE_FLAGS = ("1", "true", "yes", "on")
+FALSE_FLAGS = ("", "0", "false", "no", "off")
+
+
+def query_flag(args, key):
+    """A query-string switch such as ``?stream=1``; "0" and "false" mean off rather than present."""
+    value = args.get(key, "").strip().lower()
+    if value in TRUE_FLAGS:
+        return True
+    if value in FALSE_FLAGS:
+        return False
+    raise InvalidParameter(f"{key} must be one of {', '.join(TRUE_FLAGS + FALSE_FLAGS[1:])}")
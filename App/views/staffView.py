@@ -1,28 +1,54 @@
-from flask import Blueprint, jsonify, request
-from App.controllers import staff, auth
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context, url_for
+from App.controllers import staff, auth, versions, clock_queue
+from App.views.conditional import not_modified
+from App.views.params import InvalidParameter, query_flag
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from App.controllers.auth import role_required
 from sqlalchemy.exc import SQLAlchemyError
 
 staff_views = Blueprint('staff_views', __name__, url_prefix='/api/staff')
 
 @staff_views.route('/roster', methods=['GET'])
-@jwt_required()
+@role_required("staff")
 def view_roster():
     try:
         staff_id = get_jwt_identity()
-        return staff.get_combined_roster(staff_id)
+        start, end = staff.roster_window(request.args.get("from"), request.args.get("to"))
+        ndjson = request.args.get("format") == "ndjson"
+        stream = query_flag(request.args, "stream")
+        roster_args = {"start": start, "end": end, "scope": request.args.get("scope", "all"), "role": get_jwt().get("role")}
+        # the resolved window goes into the tag, so a default window rolls over daily
+        etag = versions.listing_etag("roster", staff_id, start, end, sorted(request.args.items()))
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+
+        if ndjson or stream:
+            chunks = staff.stream_combined_roster(staff_id, ndjson=ndjson, **roster_args)
+            response = Response(stream_with_context(chunks), mimetype="application/x-ndjson" if ndjson else "application/json")
+        elif "limit" in request.args or "cursor" in request.args:
+            response = jsonify(staff.get_combined_roster_page(staff_id, request.args.get("limit"), request.args.get("cursor"), **roster_args))
+        else:
+            response = jsonify(staff.get_combined_roster(staff_id, **roster_args))
+        response.set_etag(etag)
+        return response, 200
+    except InvalidParameter as e:
+        return jsonify({"error": str(e)}), 400
+    except (PermissionError, ValueError) as e:
+        return jsonify({"error": str(e)}), 403
     except SQLAlchemyError:
         return jsonify({"error": "Database error"}), 500
 
 @staff_views.route('/clock_in', methods=['POST'])
-@jwt_required()
+@role_required("staff")
 def clockIn():
     try:
         staff_id = int(get_jwt_identity())
         data = request.get_json()
         shift_id = data.get("shiftID")
-        shiftOBJ = staff.clock_in(staff_id, shift_id)
-        return jsonify(shiftOBJ.get_json()), 200
+        if data.get("async") or request.args.get("mode") == "async":
+            return queued_clock_response(staff_id, shift_id, "clock_in")
+        shift = staff.record_clock_event(staff_id, shift_id, "clock_in", role=get_jwt().get("role"))
+        return jsonify(shift), 200
     except (PermissionError, ValueError) as e:
         return jsonify({"error": str(e)}), 403
     except SQLAlchemyError:
@@ -30,15 +56,44 @@ def clockIn():
 
 
 @staff_views.route('/clock_out', methods=['POST'])
-@jwt_required()
+@role_required("staff")
 def clock_out():
     try:
         staff_id = int(get_jwt_identity())
         data = request.get_json()
         shift_id = data.get("shiftID")
-        shift = staff.clock_out(staff_id, shift_id)
-        return jsonify(shift.get_json()), 200
+        if data.get("async") or request.args.get("mode") == "async":
+            return queued_clock_response(staff_id, shift_id, "clock_out")
+        shift = staff.record_clock_event(staff_id, shift_id, "clock_out", role=get_jwt().get("role"))
+        return jsonify(shift), 200
     except (PermissionError, ValueError) as e:
         return jsonify({"error": str(e)}), 403
     except SQLAlchemyError:
-        return jsonify({"error": "Database error"}), 500
\ No newline at end of file
+        return jsonify({"error": "Database error"}), 500
+
+
+def queued_clock_response(staff_id, shift_id, event):
+    """Queue a clock event; with ?wait=1, answer with its outcome once flushed."""
+    sequence = clock_queue.queue_clock_event(staff_id, shift_id, event, role=get_jwt().get("role"))
+    if request.args.get("wait"):
+        result = clock_queue.get_clock_event(sequence, staff_id, wait=current_app.config.get("CLOCK_QUEUE_WAIT_SECONDS", 2.0))
+        if result["status"] == "applied":
+            return jsonify(result["shift"]), 200
+        if result["status"] == "rejected":
+            return jsonify({"error": result["error"], "sequence": sequence}), 403
+        if result["status"] == "failed":
+            return jsonify({"error": result["error"], "sequence": sequence}), 500
+    return jsonify({
+        "sequence": sequence,
+        "status": "queued",
+        "statusURL": url_for("staff_views.clockEvent", sequence=sequence),
+    }), 202
+
+
+@staff_views.route('/clock_events/<sequence>', methods=['GET'])
+@role_required("staff")
+def clockEvent(sequence):
+    result = clock_queue.get_clock_event(sequence, get_jwt_identity())
+    if not result:
+        return jsonify({"error": "Clock event not found"}), 404
+    return jsonify(result), 200
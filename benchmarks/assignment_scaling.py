@@ -0,0 +1,83 @@
+"""Scaling benchmark for the heap-backed assignment engine.
+
+Run from the repository root:
+
+    python -m benchmarks.assignment_scaling
+    python -m benchmarks.assignment_scaling --sizes 1000x20000 10000x200000
+
+For each ``staff x templates`` size it times the bare engine, the
+MinimalDays/BalancedShift strategies end to end, and (for sizes small enough
+to finish) the old per-template ``min()`` scan the engine replaced.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from App.models.assignment import AssignmentEngine
+from App.models.shift_template import ShiftTemplate
+from App.models.strategy import MinimalDays, BalancedShift
+
+DEFAULT_SIZES = ["100x2000", "1000x20000", "10000x200000"]
+LEGACY_LIMIT = 50_000_000  # staff * templates above which the O(n*m) scan is skipped
+
+
+def make_inputs(num_staff, num_templates, seed=0):
+    rng = random.Random(seed)
+    staff = [SimpleNamespace(id=i + 1) for i in range(num_staff)]
+    base = datetime(2025, 1, 6)
+    templates = []
+    for _ in range(num_templates):
+        start = base + timedelta(days=rng.randint(0, 27), hours=rng.randint(6, 18))
+        end = start + timedelta(hours=rng.randint(4, 8))
+        templates.append(ShiftTemplate.from_times(start, end))
+    return staff, templates
+
+
+def legacy_scan(staff_ids, weights):
+    totals = {sid: 0 for sid in staff_ids}
+    out = []
+    for w in weights:
+        sid = min(totals, key=totals.get)
+        out.append(sid)
+        totals[sid] += w
+    return out
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def run(sizes):
+    print(f"{'staff':>7} {'templates':>10} {'engine':>10} {'minimal':>10} {'balanced':>10} {'legacy min()':>13}")
+    for size in sizes:
+        num_staff, num_templates = (int(x) for x in size.lower().split("x"))
+        staff, templates = make_inputs(num_staff, num_templates)
+        staff_ids = [s.id for s in staff]
+        weights = [t.duration for t in templates]
+
+        def engine_run():
+            engine = AssignmentEngine(staff_ids)
+            return [engine.assign(w) for w in weights]
+
+        t_engine, engine_out = timed(engine_run)
+        t_minimal, _ = timed(MinimalDays().generate, staff, templates, 1)
+        t_balanced, _ = timed(BalancedShift().generate, staff, templates, 1)
+
+        if num_staff * num_templates <= LEGACY_LIMIT:
+            t_legacy, legacy_out = timed(legacy_scan, staff_ids, weights)
+            assert legacy_out == engine_out, "engine diverged from min() scan"
+            legacy = f"{t_legacy:12.3f}s"
+        else:
+            legacy = f"{'skipped':>13}"
+
+        print(f"{num_staff:>7} {num_templates:>10} {t_engine:9.3f}s {t_minimal:9.3f}s {t_balanced:9.3f}s {legacy}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="staff x templates pairs, e.g. 1000x20000")
+    run(parser.parse_args().sizes)
@@ -0,0 +1,112 @@
+"""Roster latency under gevent while a storm of logins runs, with the KDF inline vs on the pool.
+
+Run from the repository root (needs gevent):
+
+    python -m benchmarks.login_storm
+    python -m benchmarks.login_storm --logins 32 --duration 10 --workers 4
+
+Everything runs on one gevent hub, as in a gunicorn gevent worker: login
+greenlets post to /api/auth/login in a loop while a poller requests
+/api/staff/roster every --interval seconds, timing each request from when
+it was due. Each mode uses a fresh app on
+the same SQLite file, first with PASSWORD_VERIFY_WORKERS=0 (the KDF runs
+on the hub) and then with --workers native pool threads. Logins turned
+away with 429 are counted separately.
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import gevent
+from flask_jwt_extended import create_access_token
+
+from App.main import create_app
+from App.database import db
+from App.models import Schedule, Shift
+from App.controllers import create_user
+
+
+def seed(url, num_users, num_shifts):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": url})
+    with app.app_context():
+        db.create_all()
+        admin = create_user("bench_admin", "adminpass", "admin")
+        staff = [create_user(f"bench{i}", f"pass{i}", "staff") for i in range(num_users)]
+        schedule = Schedule(name="bench", created_by=admin.id)
+        db.session.add(schedule)
+        db.session.commit()
+        start = datetime.now().replace(minute=0, second=0, microsecond=0)
+        db.session.add_all([
+            Shift(staff_id=staff[i % num_users].id, schedule_id=schedule.id,
+                  start_time=start + timedelta(hours=i % 120), end_time=start + timedelta(hours=i % 120 + 8))
+            for i in range(num_shifts)
+        ])
+        db.session.commit()
+        return staff[0].id
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(url, staff_id, workers, logins, num_users, duration, interval):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": url, "PASSWORD_VERIFY_WORKERS": workers})
+    with app.app_context():
+        token = create_access_token(identity=str(staff_id), additional_claims={"role": "staff"})
+    client = app.test_client()
+    deadline = time.perf_counter() + duration
+    latencies = []
+    outcomes = {"ok": 0, "rejected": 0}
+
+    def login_loop(i):
+        n = i
+        while time.perf_counter() < deadline:
+            response = client.post("/api/auth/login", json={"username": f"bench{n % num_users}", "password": f"pass{n % num_users}"})
+            outcomes["ok" if response.status_code == 200 else "rejected"] += 1
+            n += logins
+            # the test client does no socket I/O; yield as a served request would
+            gevent.sleep(0)
+
+    def poll_roster():
+        headers = {"Authorization": f"Bearer {token}"}
+        due = time.perf_counter()
+        while due < deadline:
+            gevent.sleep(max(0, due - time.perf_counter()))
+            client.get("/api/staff/roster", headers=headers)
+            # measured from when the request was due, so time spent waiting
+            # for the hub counts against it
+            latencies.append((time.perf_counter() - due) * 1000)
+            due += interval
+
+    greenlets = [gevent.spawn(login_loop, i) for i in range(logins)] + [gevent.spawn(poll_roster)]
+    gevent.joinall(greenlets)
+
+    label = f"{workers} pool threads" if workers else "inline KDF"
+    print(f"{label:>16}: roster p50 {statistics.median(latencies):8.1f} ms  p99 {percentile(latencies, 0.99):8.1f} ms  "
+          f"max {max(latencies):8.1f} ms  ({len(latencies)} requests)  "
+          f"logins {outcomes['ok'] / duration:6.1f}/s, {outcomes['rejected']} rejected")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=16, help="Concurrent login greenlets")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--shifts", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per mode")
+    parser.add_argument("--interval", type=float, default=0.1, help="Seconds between roster requests")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = "sqlite:///" + os.path.join(tmp, "bench.db")
+        staff_id = seed(url, args.users, args.shifts)
+        for workers in (0, args.workers):
+            run(url, staff_id, workers, args.logins, args.users, args.duration, args.interval)
@@ -0,0 +1,64 @@
+"""Roster balance and runtime of the greedy strategies vs OptimalAssignment.
+
+Run from the repository root:
+
+    python -m benchmarks.optimal_balance
+    python -m benchmarks.optimal_balance --staff 2000 --templates 10000 --max-hours 30
+
+Reports the hours spread (max - min) and standard deviation per staff
+member for each strategy, optionally with an availability index so staff
+cannot take overlapping shifts or exceed --max-hours.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+from App.models.availability import StaffAvailability
+from App.models.shift_template import ShiftTemplate
+from App.models.strategy import EvenDistribution, MinimalDays, BalancedShift, OptimalAssignment
+
+
+def make_week(num_staff, num_templates, seed=0):
+    rng = random.Random(seed)
+    staff = [SimpleNamespace(id=i + 1) for i in range(num_staff)]
+    base = datetime(2025, 1, 6)
+    templates = []
+    for _ in range(num_templates):
+        start = base + timedelta(days=rng.randint(0, 6), hours=rng.randint(6, 16))
+        templates.append(ShiftTemplate.from_times(start, start + timedelta(hours=rng.choice([3.5, 4, 5, 6, 7, 8]))))
+    return staff, templates
+
+
+def run(num_staff, num_templates, budget, max_hours):
+    staff, templates = make_week(num_staff, num_templates)
+    print(f"{num_staff} staff, {num_templates} templates, budget {budget}s"
+          + (f", max {max_hours}h with overlap checks" if max_hours else ""))
+    print(f"{'strategy':>18} {'seconds':>8} {'spread':>7} {'stdev':>6} {'unfilled':>9}")
+    for cls in (EvenDistribution, MinimalDays, BalancedShift, OptimalAssignment):
+        options = {"availability": StaffAvailability(max_hours)} if max_hours else {}
+        if cls is OptimalAssignment:
+            options["time_budget"] = budget
+        strategy = cls(**options)
+        start = time.perf_counter()
+        rows = list(strategy.iter_assignments(staff, templates, 1))
+        elapsed = time.perf_counter() - start
+
+        loads = dict.fromkeys((s.id for s in staff), 0.0)
+        for row in rows:
+            loads[row["staff_id"]] += (row["end_time"] - row["start_time"]).total_seconds() / 3600
+        hours = np.fromiter(loads.values(), dtype=np.float64)
+        print(f"{cls.__name__:>18} {elapsed:>8.2f} {hours.max() - hours.min():>7.1f} {hours.std():>6.2f} {len(strategy.unfilled):>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--staff", type=int, default=2000)
+    parser.add_argument("--templates", type=int, default=10000)
+    parser.add_argument("--budget", type=float, default=2.0)
+    parser.add_argument("--max-hours", type=float, default=None)
+    args = parser.parse_args()
+    run(args.staff, args.templates, args.budget, args.max_hours)
@@ -0,0 +1,89 @@
+"""Throughput of bulk shift import from CSV, against one schedule_shift call per shift.
+
+Run from the repository root:
+
+    python -m benchmarks.shift_import
+    python -m benchmarks.shift_import --shifts 100000 --staff 500 --chunk-size 10000
+
+Each run uses a fresh SQLite file database. The CSV is generated in memory
+and parsed as part of the timed import, as `flask shift import` would. The
+per-call baseline only runs over the first --baseline shifts.
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from App.main import create_app
+from App.database import db
+from App.models import User, Staff, Schedule, Shift
+from App.controllers import create_user, schedule_shift, import_shifts, read_shift_rows
+
+
+def seed(num_staff):
+    admin = create_user("bench_admin", "x", "admin")
+    db.session.execute(insert(User.__table__), [
+        {"username": f"bench{i}", "password": "x", "role": "staff"} for i in range(num_staff)
+    ])
+    db.session.execute(insert(Staff.__table__).from_select(
+        ["id"], db.select(User.id).where(User.role == "staff")
+    ))
+    schedule = Schedule(name="bench", created_by=admin.id)
+    db.session.add(schedule)
+    db.session.commit()
+    return admin.id, schedule.id, db.session.execute(db.select(Staff.id)).scalars().all()
+
+
+def shift_csv(num_shifts, staff_ids, schedule_id, seed=0):
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 6, 6)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["staffID", "scheduleID", "start_time", "end_time"])
+    for i in range(num_shifts):
+        start = base + timedelta(days=i % 28, hours=rng.randint(0, 14))
+        writer.writerow([rng.choice(staff_ids), schedule_id, start.isoformat(), (start + timedelta(hours=8)).isoformat()])
+    out.seek(0)
+    return out
+
+
+def shift_count():
+    return db.session.scalar(db.select(db.func.count(Shift.id)))
+
+
+def run(num_shifts, num_staff, chunk_size, baseline):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(tmp, "bench.db")})
+        with app.app_context():
+            db.create_all()
+            admin_id, schedule_id, staff_ids = seed(num_staff)
+            body = shift_csv(num_shifts, staff_ids, schedule_id)
+
+            start = time.perf_counter()
+            result = import_shifts(admin_id, read_shift_rows(body, "csv"), chunk_size=chunk_size)
+            elapsed = time.perf_counter() - start
+            assert result["inserted"] == shift_count() == num_shifts, result["errors"][:5]
+            print(f"import: {num_shifts} shifts in {elapsed:.2f}s ({num_shifts / elapsed:,.0f} shifts/s, chunk {chunk_size})")
+
+            rows = list(csv.DictReader(shift_csv(baseline, staff_ids, schedule_id, seed=1)))
+            start = time.perf_counter()
+            for row in rows:
+                schedule_shift(admin_id, int(row["staffID"]), schedule_id, row["start_time"], row["end_time"])
+            elapsed = time.perf_counter() - start
+            print(f"schedule_shift per row: {baseline} shifts in {elapsed:.2f}s ({baseline / elapsed:,.0f} shifts/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shifts", type=int, default=50_000)
+    parser.add_argument("--staff", type=int, default=200)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--baseline", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.shifts, args.staff, args.chunk_size, args.baseline)
@@ -0,0 +1,65 @@
+"""Time and peak memory of loading scheduling staff as ORM objects vs StaffRoster.
+
+Run from the repository root:
+
+    python -m benchmarks.staff_roster
+    python -m benchmarks.staff_roster --staff 5000 20000 50000
+
+Each size uses a fresh SQLite file database. Peaks come from tracemalloc
+and cover Python allocations only.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import insert
+
+from App.main import create_app
+from App.database import db, create_db
+from App.models import User, Staff, StaffRoster
+
+
+def seed(num_staff):
+    db.session.execute(insert(User.__table__), [
+        # a realistic hash length, since full objects carry it around
+        {"username": f"bench{i}", "password": "x" * 102, "role": "staff"} for i in range(num_staff)
+    ])
+    db.session.execute(insert(Staff.__table__).from_select(
+        ["id"], db.select(User.id).where(User.role == "staff")
+    ))
+    db.session.commit()
+
+
+def measure(fn):
+    db.session.expunge_all()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(result), elapsed * 1000, peak / 2**10
+
+
+def run(sizes):
+    print(f"{'staff':>8} {'loader':>12} {'ms':>9} {'peak KiB':>10}")
+    for num_staff in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(tmp, "bench.db")})
+            with app.app_context():
+                create_db()
+                seed(num_staff)
+                for name, loader in (("Staff.query", lambda: Staff.query.all()), ("StaffRoster", StaffRoster.load)):
+                    count, ms, kib = measure(loader)
+                    print(f"{count:>8} {name:>12} {ms:>9.1f} {kib:>10.0f}")
+                db.session.remove()
+                db.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--staff", type=int, nargs="+", default=[20000])
+    args = parser.parse_args()
+    run(args.staff)
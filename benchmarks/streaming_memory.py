@@ -0,0 +1,88 @@
+"""Peak Python memory of list vs streaming auto-scheduling.
+
+Run from the repository root:
+
+    python -m benchmarks.streaming_memory
+    python -m benchmarks.streaming_memory --shifts 50000 500000 --staff 2000
+
+Each run uses a fresh SQLite file database. Templates are produced by a
+generator, so the streaming pipeline never holds more than one batch; the
+list path (generate_schedule) keeps every shift's JSON. Peaks come from
+tracemalloc and cover Python allocations only.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import insert
+
+from App.main import create_app
+from App.database import db, create_db
+from App.models import User, Staff, Schedule, AutoScheduler, ShiftTemplate
+from App.models.strategy import BalancedShift
+
+LIST_LIMIT = 100_000  # list path is skipped above this many shifts
+
+
+def seed(num_staff):
+    db.session.execute(insert(User.__table__), [
+        {"username": f"bench{i}", "password": "x", "role": "staff"} for i in range(num_staff)
+    ])
+    db.session.execute(insert(Staff.__table__).from_select(
+        ["id"], db.select(User.id).where(User.role == "staff")
+    ))
+    schedule = Schedule(name="bench", created_by=1)
+    db.session.add(schedule)
+    db.session.commit()
+    return db.session.execute(db.select(Staff.id)).scalars().all(), schedule.id
+
+
+def templates(count):
+    base = datetime(2025, 1, 6, 6, 0)
+    for i in range(count):
+        start = base + timedelta(hours=i % 2000)
+        yield ShiftTemplate.from_times(start, start + timedelta(hours=4 + i % 5))
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def run(sizes, num_staff, chunk_size):
+    print(f"{'shifts':>8} {'mode':>7} {'seconds':>9} {'peak MiB':>9}")
+    for size in sizes:
+        modes = ["stream"] + (["list"] if size <= LIST_LIMIT else [])
+        for mode in modes:
+            with tempfile.TemporaryDirectory() as tmp:
+                uri = "sqlite:///" + os.path.join(tmp, "bench.db")
+                app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": uri})
+                with app.app_context():
+                    create_db()
+                    staff_ids, schedule_id = seed(num_staff)
+                    staff = [SimpleNamespace(id=sid) for sid in staff_ids]
+                    scheduler = AutoScheduler(BalancedShift(), staff, templates(size), schedule_id,
+                                              bulk=True, chunk_size=chunk_size)
+                    fn = scheduler.stream_schedule if mode == "stream" else scheduler.generate_schedule
+                    elapsed, peak = measure(fn)
+                    db.session.remove()
+                    db.engine.dispose()
+            print(f"{size:>8} {mode:>7} {elapsed:>9.2f} {peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shifts", nargs="+", type=int, default=[50_000, 500_000])
+    parser.add_argument("--staff", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.shifts, args.staff, args.chunk_size)
@@ -0,0 +1,46 @@
+"""Add shift access path indexes
+
+Revision ID: 3f9c2a7d41e0
+Revises: a0e6d3c8f215
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d41e0'
+down_revision = 'a0e6d3c8f215'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_shift_staff_id_start_time', ['staff_id', 'start_time'], {}),
+    ('ix_shift_schedule_id_staff_id', ['schedule_id', 'staff_id'], {}),
+    ('ix_shift_start_time_id', ['start_time', 'id'], {}),
+    ('ix_shift_unassigned', ['schedule_id', 'start_time'], {
+        'postgresql_where': sa.text('staff_id IS NULL'),
+        'sqlite_where': sa.text('staff_id IS NULL'),
+    }),
+]
+
+
+def _existing_indexes():
+    # databases built with `flask init` (db.create_all) already have these
+    return {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('shift')}
+
+
+def upgrade():
+    existing = _existing_indexes()
+    for name, columns, kwargs in INDEXES:
+        if name not in existing:
+            op.create_index(name, 'shift', columns, unique=False, **kwargs)
+
+
+def downgrade():
+    existing = _existing_indexes()
+    for name, _, _ in reversed(INDEXES):
+        if name in existing:
+            op.drop_index(name, table_name='shift')
@@ -0,0 +1,43 @@
+"""Add roster version counters
+
+Revision ID: 8b1e4c0d92a7
+Revises: 3f9c2a7d41e0
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1e4c0d92a7'
+down_revision = '3f9c2a7d41e0'
+branch_labels = None
+depends_on = None
+
+
+GLOBAL_ID = 1
+
+
+def upgrade():
+    # databases built with `flask init` (db.create_all) already have these
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('roster_version'):
+        op.create_table(
+            'roster_version',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    roster_version = sa.table('roster_version', sa.column('id'), sa.column('version'))
+    if op.get_bind().execute(sa.select(roster_version.c.id).where(roster_version.c.id == GLOBAL_ID)).first() is None:
+        op.bulk_insert(roster_version, [{'id': GLOBAL_ID, 'version': 0}])
+    if 'version' not in {column['name'] for column in inspector.get_columns('schedule')}:
+        with op.batch_alter_table('schedule') as batch_op:
+            batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('schedule') as batch_op:
+        batch_op.drop_column('version')
+    op.drop_table('roster_version')
@@ -0,0 +1,76 @@
+"""Create baseline schema
+
+Revision ID: a0e6d3c8f215
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a0e6d3c8f215'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+TABLES = ['user', 'admin', 'staff', 'schedule', 'shift']
+
+
+def upgrade():
+    # databases built with `flask init` (db.create_all) already have these
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'user' not in existing:
+        op.create_table(
+            'user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(length=20), nullable=False),
+            sa.Column('password', sa.String(length=256), nullable=False),
+            sa.Column('role', sa.String(length=10), nullable=False),
+            sa.Column('active_token', sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('username'),
+        )
+    for subtype in ('admin', 'staff'):
+        if subtype not in existing:
+            op.create_table(
+                subtype,
+                sa.Column('id', sa.Integer(), nullable=False),
+                sa.ForeignKeyConstraint(['id'], ['user.id']),
+                sa.PrimaryKeyConstraint('id'),
+            )
+    if 'schedule' not in existing:
+        op.create_table(
+            'schedule',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('created_by', sa.Integer(), nullable=False),
+            sa.Column('admin_id', sa.Integer(), nullable=True),
+            sa.Column('staff_id', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['created_by'], ['user.id']),
+            sa.ForeignKeyConstraint(['admin_id'], ['user.id']),
+            sa.ForeignKeyConstraint(['staff_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if 'shift' not in existing:
+        op.create_table(
+            'shift',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('staff_id', sa.Integer(), nullable=True),
+            sa.Column('schedule_id', sa.Integer(), nullable=False),
+            sa.Column('start_time', sa.DateTime(), nullable=False),
+            sa.Column('end_time', sa.DateTime(), nullable=False),
+            sa.Column('clock_in', sa.DateTime(), nullable=True),
+            sa.Column('clock_out', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['staff_id'], ['user.id']),
+            sa.ForeignKeyConstraint(['schedule_id'], ['schedule.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+
+def downgrade():
+    for name in reversed(TABLES):
+        op.drop_table(name)
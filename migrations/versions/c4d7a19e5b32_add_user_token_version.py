@@ -0,0 +1,29 @@
+"""Add user token version
+
+Revision ID: c4d7a19e5b32
+Revises: 8b1e4c0d92a7
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d7a19e5b32'
+down_revision = '8b1e4c0d92a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # databases built with `flask init` (db.create_all) already have it
+    if 'token_version' in {column['name'] for column in sa.inspect(op.get_bind()).get_columns('user')}:
+        return
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('token_version')
@@ -0,0 +1,38 @@
+"""Add clock event results
+
+Revision ID: d1a5e7c3b9f4
+Revises: c4d7a19e5b32
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1a5e7c3b9f4'
+down_revision = 'c4d7a19e5b32'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # databases built with `flask init` (db.create_all) already have it
+    if sa.inspect(op.get_bind()).has_table('clock_event_result'):
+        return
+    op.create_table(
+        'clock_event_result',
+        sa.Column('sequence', sa.String(length=40), nullable=False),
+        sa.Column('staff_id', sa.Integer(), nullable=False),
+        sa.Column('shift_id', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('error', sa.String(length=255), nullable=True),
+        sa.Column('recorded_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('sequence'),
+    )
+    op.create_index('ix_clock_event_result_recorded_at', 'clock_event_result', ['recorded_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_clock_event_result_recorded_at', table_name='clock_event_result')
+    op.drop_table('clock_event_result')
@@ -0,0 +1,46 @@
+"""Add background jobs
+
+Revision ID: e7b2f4a9c6d1
+Revises: d1a5e7c3b9f4
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b2f4a9c6d1'
+down_revision = 'd1a5e7c3b9f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # databases built with `flask init` (db.create_all) already have it
+    if sa.inspect(op.get_bind()).has_table('background_job'):
+        return
+    op.create_table(
+        'background_job',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('kind', sa.String(length=32), nullable=False),
+        sa.Column('active_key', sa.String(length=255), nullable=True),
+        sa.Column('params', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('progress', sa.JSON(), nullable=True),
+        sa.Column('submitted_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('queue_seconds', sa.Float(), nullable=True),
+        sa.Column('run_seconds', sa.Float(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('active_key'),
+    )
+    op.create_index('ix_background_job_submitted_at', 'background_job', ['submitted_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_background_job_submitted_at', table_name='background_job')
+    op.drop_table('background_job')
@@ -0,0 +1,29 @@
+"""Store the shift row an applied clock event produced
+
+Revision ID: f3c8a1d5e2b7
+Revises: e7b2f4a9c6d1
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8a1d5e2b7'
+down_revision = 'e7b2f4a9c6d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # databases built with `flask init` (db.create_all) already have it
+    if 'shift' in {column['name'] for column in sa.inspect(op.get_bind()).get_columns('clock_event_result')}:
+        return
+    with op.batch_alter_table('clock_event_result') as batch_op:
+        batch_op.add_column(sa.Column('shift', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('clock_event_result') as batch_op:
+        batch_op.drop_column('shift')
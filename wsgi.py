@@ -9,7 +9,9 @@ from App.models import User
 from App.main import create_app 
 from App.controllers import (
     create_user, get_all_users_json, get_all_users, initialize,
-    schedule_shift, get_combined_roster, clock_in, clock_out, get_shift_report, login,loginCLI
+    schedule_shift, get_combined_roster, clock_in, clock_out, get_shift_report, login,loginCLI,
+    get_combined_roster_page, get_shift_report_page, roster_window,
+    import_shifts, read_shift_rows, import_users, read_user_rows
 )
 
 app = create_app()
@@ -65,6 +67,25 @@ def list_user_command(format):
     else:
         print(get_all_users_json())
 
+@user_cli.command("import", help="Admin creates many users from a CSV file (username,password,role)")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--chunk-size", type=int, default=None, help="Users per insert transaction")
+@click.option("--workers", type=int, default=None, help="Password hashing processes (default: CPU count)")
+def import_users_command(path, chunk_size, workers):
+    admin = require_admin_login()
+
+    def progress(created, elapsed):
+        print(f"  {created} users created ({created / elapsed:.0f}/s)")
+
+    with open(path, encoding="utf-8", newline="") as f:
+        result = import_users(admin.id, read_user_rows(f), chunk_size=chunk_size, max_workers=workers, progress=progress, role=admin.role)
+    print(f"👥 Imported {result['created']} of {result['rows']} users in {result['elapsed_seconds']}s "
+          f"({result['users_per_second']}/s)")
+    for error in result["errors"][:20]:
+        print(f"  row {error['row']}: {error['error']}")
+    if result["failed"] > 20:
+        print(f"  ... and {result['failed'] - 20} more")
+
 app.cli.add_command(user_cli)
 
 
@@ -81,18 +102,29 @@ def schedule_shift_command(staff_id, schedule_id, start, end):
     admin = require_admin_login()
     start_time = datetime.fromisoformat(start)
     end_time = datetime.fromisoformat(end)
-    shift = schedule_shift(admin.id, staff_id, schedule_id, start_time, end_time)
+    shift = schedule_shift(admin.id, staff_id, schedule_id, start_time, end_time, role=admin.role)
     print(f"✅ Shift scheduled under Schedule {schedule_id} by {admin.username}:")
     print(shift.get_json())
 
 
 
 @shift_cli.command("roster", help="Staff views combined roster")
-def roster_command():
+@click.option("--from", "start", default=None, help="Window start (ISO date/time), default today")
+@click.option("--to", "end", default=None, help="Window end (ISO date/time), default a week after the start")
+@click.option("--scope", type=click.Choice(["all", "mine"]), default="all", help="Everyone's shifts or only yours")
+@click.option("--limit", type=int, default=None, help="Shifts per page")
+@click.option("--cursor", default=None, help="Cursor printed by the previous page")
+def roster_command(start, end, scope, limit, cursor):
     staff = require_staff_login()
-    roster = get_combined_roster(staff.id)
-    print(f"📋 Roster for {staff.username}:")
-    print(roster)
+    start, end = roster_window(start, end)
+    print(f"📋 Roster for {staff.username} ({scope}, {start.isoformat()} to {end.isoformat()}):")
+    if limit is None and cursor is None:
+        print(get_combined_roster(staff.id, start, end, scope, role=staff.role))
+        return
+    page = get_combined_roster_page(staff.id, limit, cursor, start, end, scope, role=staff.role)
+    print(page["data"])
+    if page["next"]:
+        print(f"➡️ Next page: --cursor {page['next']}")
 
 
 @shift_cli.command("clockin", help="Staff clocks in")
@@ -113,11 +145,33 @@ def clockout_command(shift_id):
 
 
 @shift_cli.command("report", help="Admin views shift report")
-def report_command():
+@click.option("--limit", type=int, default=None, help="Shifts per page")
+@click.option("--cursor", default=None, help="Cursor printed by the previous page")
+def report_command(limit, cursor):
     admin = require_admin_login()
-    report = get_shift_report(admin.id)
     print(f"📊 Shift report for {admin.username}:")
-    print(report)
+    if limit is None and cursor is None:
+        print(get_shift_report(admin.id, role=admin.role))
+        return
+    page = get_shift_report_page(admin.id, limit, cursor, role=admin.role)
+    print(page["data"])
+    if page["next"]:
+        print(f"➡️ Next page: --cursor {page['next']}")
+
+@shift_cli.command("import", help="Admin schedules many shifts from a CSV or JSONL file")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), default=None, help="File format (default: from the extension)")
+@click.option("--chunk-size", type=int, default=None, help="Rows per insert transaction")
+def import_shifts_command(path, fmt, chunk_size):
+    admin = require_admin_login()
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, encoding="utf-8", newline="") as f:
+        result = import_shifts(admin.id, read_shift_rows(f, fmt), chunk_size=chunk_size, role=admin.role)
+    print(f"📥 Imported {result['inserted']} of {result['rows']} shifts in {result['elapsed_seconds']}s")
+    for error in result["errors"][:20]:
+        print(f"  row {error['row']}: {error['error']}")
+    if result["failed"] > 20:
+        print(f"  ... and {result['failed'] - 20} more")
 
 app.cli.add_command(shift_cli)
 
@@ -139,6 +193,8 @@ def require_admin_login():
         user = get_user(user_id)
         if not user or user.role != "admin":
             raise PermissionError("🚫 Only an admin can use this command.")
+        if decoded.get("ver", 0) != user.token_version:
+            raise PermissionError("Session ended by a logout.")
         return user
     except Exception as e:
         raise PermissionError(f"Invalid or expired token. Please login again. ({e})")
@@ -160,6 +216,8 @@ def require_staff_login():
         user = get_user(user_id)
         if not user or user.role != "staff":
             raise PermissionError("🚫 Only staff can use this command.")
+        if decoded.get("ver", 0) != user.token_version:
+            raise PermissionError("Session ended by a logout.")
         return user
     except Exception as e:
         raise PermissionError(f"Invalid or expired token. Please login again. ({e})")
@@ -181,10 +239,10 @@ def create_schedule_command(name):
 def list_schedules_command():
     from App.models import Schedule
     admin = require_admin_login()
-    schedules = Schedule.query.all()
+    schedules = Schedule.query.options(*Schedule.list_load_options()).all()
     print(f"✅ Found {len(schedules)} schedule(s):")
     for s in schedules:
-        print(s.get_json())
+        print(s.get_json(include_shifts=False))
 
 
 @schedule_cli.command("view", help="View a schedule and its shifts")
@@ -192,13 +250,47 @@ def list_schedules_command():
 def view_schedule_command(schedule_id):
     from App.models import Schedule
     admin = require_admin_login()
-    schedule = db.session.get(Schedule, schedule_id)
+    schedule = db.session.get(Schedule, schedule_id, options=Schedule.json_load_options())
     if not schedule:
         print("⚠️ Schedule not found.")
     else:
         print(f"✅ Viewing schedule {schedule_id}:")
         print(schedule.get_json())
 
+@schedule_cli.command("autobatch", help="Auto-schedule many schedules in parallel worker processes")
+@click.argument("method")
+@click.argument("schedule_ids", type=int, nargs=-1, required=True)
+@click.option("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+def auto_schedule_batch_command(method, schedule_ids, workers):
+    from App.controllers import auto_schedule_batch
+    admin = require_admin_login()
+    result = auto_schedule_batch(admin.id, schedule_ids, method, max_workers=workers, role=admin.role)
+    if result["status"] != "success":
+        print(f"⚠️ {result['message']}")
+        return
+    for r in result["results"]:
+        if r["status"] == "success":
+            print(f"✅ Schedule {r['schedule_id']}: {r['count']} shift(s) "
+                  f"(compute {r['compute_seconds']:.3f}s, save {r['save_seconds']:.3f}s)")
+        else:
+            print(f"⚠️ Schedule {r['schedule_id']}: {r['message']}")
+    print(f"📊 {len(result['results'])} schedule(s), {result['failed']} failed, {result['elapsed_seconds']:.3f}s total")
+
+@schedule_cli.command("reschedule", help="Reassign shifts after staff join or leave")
+@click.argument("schedule_id", type=int)
+@click.option("--add", "added", type=int, multiple=True, help="Id of a staff member who joined")
+@click.option("--remove", "removed", type=int, multiple=True, help="Id of a staff member who left")
+def reschedule_command(schedule_id, added, removed):
+    from App.controllers import reschedule_staff_delta
+    admin = require_admin_login()
+    result = reschedule_staff_delta(admin.id, schedule_id, added, removed, role=admin.role)
+    if result["status"] != "success":
+        print(f"⚠️ {result['message']}")
+        return
+    print(f"✅ {len(result['data'])} shift(s) reassigned in schedule {schedule_id}:")
+    for change in result["data"]:
+        print(change)
+
 app.cli.add_command(schedule_cli)
 '''
 Test Commands